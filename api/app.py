@@ -0,0 +1,47 @@
+"""
+Vercel Serverless Function (ASGI): /api/v2/*
+Sirve la aplicación FastAPI de backend/main.py en lugar de los handlers
+síncronos: las llamadas al LLM son asíncronas (aiohttp), así que una instancia
+caliente atiende varias preguntas a la vez en lugar de bloquearse en cada una.
+
+Rutas (vercel.json reescribe /api/v2/:path* a esta función):
+- POST /api/v2/query          Consulta (con presupuesto de latencia del LLM)
+- POST /api/v2/query/stream   Consulta con Server-Sent Events
+- POST /api/v2/query/batch    Varias preguntas
+- GET  /api/v2/health, /api/v2/metrics
+"""
+
+import os
+import sys
+
+# En serverless: responder a tiempo con la respuesta simple si el LLM tarda
+# (la llamada sigue en segundo plano y deja su respuesta en la caché semántica)
+os.environ.setdefault("LLM_PRESUPUESTO", "6")
+# Los archivos de un deploy no cambian: no hace falta vigilar reglamento.json
+os.environ.setdefault("REGLAMENTO_RECARGA_SEGUNDOS", "0")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from main import app as aplicacion_fastapi
+
+# Prefijos con los que puede llegar la ruta según la reescritura de Vercel
+PREFIJOS = ("/api/v2", "/api/app")
+
+
+class AplicacionVercel:
+    """Quita el prefijo de la función antes de pasar la petición a FastAPI"""
+
+    def __init__(self, app, prefijos=PREFIJOS):
+        self.app = app
+        self.prefijos = prefijos
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket"):
+            ruta = scope["path"]
+            for prefijo in self.prefijos:
+                if ruta == prefijo or ruta.startswith(prefijo + "/"):
+                    scope = dict(scope, path=ruta[len(prefijo):] or "/")
+                    break
+        await self.app(scope, receive, send)
+
+
+app = AplicacionVercel(aplicacion_fastapi)
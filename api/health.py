@@ -6,6 +6,11 @@ Health check endpoint
 from http.server import BaseHTTPRequestHandler
 import json
 import os
+import sys
+
+# Reglamento cacheado en memoria por el núcleo compartido
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from reglamento_core import obtener_corpus, preparar_respuesta
 
 
 class handler(BaseHTTPRequestHandler):
@@ -13,29 +18,18 @@ class handler(BaseHTTPRequestHandler):
     
     def do_GET(self):
         try:
-            reglamento_path = os.path.join(os.path.dirname(__file__), "..", "backend", "reglamento.json")
-            total_entradas = 0
-            reglamento_cargado = False
-            
-            try:
-                with open(reglamento_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    total_entradas = len(data)
-                    reglamento_cargado = True
-            except:
-                pass
+            corpus = obtener_corpus()
+            total_entradas = len(corpus)
+            reglamento_cargado = total_entradas > 0
             
             response_data = {
                 "status": "healthy",
                 "reglamento_cargado": reglamento_cargado,
-                "total_entradas": total_entradas
+                "total_entradas": total_entradas,
+                "version_reglamento": corpus.version
             }
             
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps(response_data).encode('utf-8'))
+            self._responder(json.dumps(response_data).encode('utf-8'))
         
         except Exception as e:
             self.send_response(500)
@@ -44,6 +38,20 @@ class handler(BaseHTTPRequestHandler):
             self.end_headers()
             self.wfile.write(json.dumps({"error": str(e)}).encode('utf-8'))
     
+    def _responder(self, contenido: bytes):
+        """Cuerpo comprimido según Accept-Encoding, con ETag (304 si no cambió)"""
+        status, cabeceras, cuerpo = preparar_respuesta(
+            contenido, self.headers, self.command, cache_control="no-cache"
+        )
+        self.send_response(status)
+        for nombre, valor in cabeceras:
+            self.send_header(nombre, valor)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(cuerpo)
+    
+    do_HEAD = do_GET
+    
     def do_OPTIONS(self):
         """Handle CORS preflight"""
         self.send_response(200)
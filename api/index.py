@@ -6,6 +6,11 @@ Endpoint de bienvenida para el API
 from http.server import BaseHTTPRequestHandler
 import json
 import os
+import sys
+
+# Reglamento cacheado en memoria por el núcleo compartido
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from reglamento_core import LLM_MODEL, obtener_corpus, preparar_respuesta
 
 
 class handler(BaseHTTPRequestHandler):
@@ -13,34 +18,26 @@ class handler(BaseHTTPRequestHandler):
     
     def do_GET(self):
         try:
-            reglamento_path = os.path.join(os.path.dirname(__file__), "..", "backend", "reglamento.json")
-            entradas_cargadas = 0
-            
-            try:
-                with open(reglamento_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    entradas_cargadas = len(data)
-            except:
-                pass
+            entradas_cargadas = len(obtener_corpus())
             
             response_data = {
                 "mensaje": "🚗 API Chatbot Reglamento de Tránsito Hermosillo",
                 "version": "2.0 Serverless",
                 "entradas_cargadas": entradas_cargadas,
                 "llm_habilitado": bool(os.getenv("HUGGINGFACE_API_KEY")),
-                "modelo_llm": "AIDC-AI/Marco-LLM-ES" if os.getenv("HUGGINGFACE_API_KEY") else None,
+                "modelo_llm": LLM_MODEL if os.getenv("HUGGINGFACE_API_KEY") else None,
                 "endpoints": {
                     "POST /api/query": "Consultar el reglamento (soporta LLM si está configurado)",
                     "GET /api": "Este mensaje",
-                    "GET /api/health": "Estado del servicio"
+                    "GET /api/health": "Estado del servicio",
+                    "POST /api/v2/query": "Consulta servida por la app ASGI (LLM asíncrono con presupuesto de latencia)",
+                    "POST /api/v2/query/stream": "Consulta con streaming (Server-Sent Events)",
+                    "POST /api/v2/query/batch": "Varias preguntas en una sola petición",
+                    "GET /api/v2/metrics": "Métricas en formato Prometheus de las consultas /api/v2"
                 }
             }
             
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps(response_data, ensure_ascii=False).encode('utf-8'))
+            self._responder(json.dumps(response_data, ensure_ascii=False).encode('utf-8'))
         
         except Exception as e:
             self.send_response(500)
@@ -49,6 +46,20 @@ class handler(BaseHTTPRequestHandler):
             self.end_headers()
             self.wfile.write(json.dumps({"error": str(e)}).encode('utf-8'))
     
+    def _responder(self, contenido: bytes):
+        """Cuerpo comprimido según Accept-Encoding, con ETag (304 si no cambió)"""
+        status, cabeceras, cuerpo = preparar_respuesta(
+            contenido, self.headers, self.command, cache_control="public, max-age=300"
+        )
+        self.send_response(status)
+        for nombre, valor in cabeceras:
+            self.send_header(nombre, valor)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(cuerpo)
+    
+    do_HEAD = do_GET
+    
     def do_OPTIONS(self):
         """Handle CORS preflight"""
         self.send_response(200)
@@ -6,152 +6,137 @@ Consulta al chatbot de Reglamento de Tránsito Hermosillo
 from http.server import BaseHTTPRequestHandler
 import json
 import os
-from typing import List, Dict, Optional
-import urllib.request
-import urllib.error
-
-# Cargar datos del reglamento (cargado una vez, reutilizado)
-REGLAMENTO_DATA: Optional[List[Dict]] = None
+import sys
+from typing import List, Dict, Optional, Tuple
+
+# Núcleo de búsqueda compartido con el backend FastAPI
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from reglamento_core import (
+    CONSULTAS_CACHE,
+    LLAMADAS_LLM,
+    TOKENS_PROMPT,
+    anotar,
+    api_key,
+    generar_respuesta_simple,
+    iniciar_traza,
+    medir,
+    obtener_cache,
+    obtener_cache_semantica,
+    obtener_cliente_sync,
+    obtener_constructor_prompt,
+    obtener_corpus,
+    preparar_respuesta,
+    serializar_respuesta,
+)
 
 
 def cargar_reglamento() -> List[Dict]:
-    """Cargar el JSON del reglamento (lazy loading)"""
-    global REGLAMENTO_DATA
-    
-    if REGLAMENTO_DATA is not None:
-        return REGLAMENTO_DATA
-    
-    try:
-        reglamento_path = os.path.join(os.path.dirname(__file__), "..", "backend", "reglamento.json")
-        with open(reglamento_path, "r", encoding="utf-8") as f:
-            REGLAMENTO_DATA = json.load(f)
-        print(f"✅ Reglamento cargado: {len(REGLAMENTO_DATA)} entradas")
-        return REGLAMENTO_DATA
-    except Exception as e:
-        print(f"❌ Error cargando reglamento: {e}")
-        return []
+    """Entradas del reglamento (cargadas una vez por instancia)"""
+    return obtener_corpus().entradas
 
 
 def buscar_en_reglamento(pregunta: str, max_resultados: int = 3) -> List[Dict]:
-    """Busca en el JSON del reglamento entradas relevantes"""
-    reglamento = cargar_reglamento()
-    pregunta_lower = pregunta.lower()
-    palabras_clave = [p for p in pregunta_lower.split() if len(p) > 3]
-    
-    resultados = []
-    
-    for item in reglamento:
-        texto_busqueda = f"{item.get('categoria', '')} {item.get('subcategoria', '')} {item.get('descripcion', '')}".lower()
-        coincidencias = sum(1 for palabra in palabras_clave if palabra in texto_busqueda)
-        
-        if coincidencias > 0:
-            resultados.append({
-                "item": item,
-                "score": coincidencias
-            })
-    
-    resultados.sort(key=lambda x: x["score"], reverse=True)
-    return [r["item"] for r in resultados[:max_resultados]]
+    """Busca en el índice del reglamento entradas relevantes"""
+    return obtener_corpus().buscar(pregunta, max_resultados)
 
 
-def generar_respuesta_llm(pregunta: str, entradas: List[Dict]) -> Optional[str]:
+def generar_respuesta_llm(prompt: str) -> Optional[str]:
     """Genera respuesta usando Hugging Face API (síncrono para serverless)"""
-    api_key = os.getenv("HUGGINGFACE_API_KEY", "")
-    if not api_key:
+    key = api_key()
+    if not key:
         return None
     
     try:
-        # Construir contexto
-        contexto = ""
-        for entrada in entradas:
-            contexto += f"- {entrada.get('subcategoria', '')}: {entrada.get('descripcion', '')}\n"
-            if entrada.get('articulo'):
-                contexto += f"  Fundamento: {entrada.get('articulo')}\n"
-        
-        prompt = f"""Eres un asistente experto en el Reglamento de Tránsito de Hermosillo, Sonora.
-
-Pregunta del usuario: {pregunta}
-
-Información relevante del reglamento:
-{contexto}
-
-Instrucciones:
-- Responde de forma clara, concisa y profesional
-- Usa formato markdown: **negrita** para títulos, _cursiva_ para fundamentos legales
-- Menciona los artículos del reglamento cuando sea relevante
-- Si la información no es suficiente, indícalo claramente
-- Mantén un tono amigable pero formal
-
-Respuesta:"""
-
-        # Llamar a Hugging Face API (urllib para evitar dependencias)
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "inputs": prompt,
-            "parameters": {
-                "max_new_tokens": 300,
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "return_full_text": False
-            }
-        }
-        
-        req = urllib.request.Request(
-            f"https://api-inference.huggingface.co/models/AIDC-AI/Marco-LLM-ES",
-            data=json.dumps(payload).encode('utf-8'),
-            headers=headers
-        )
-        
-        with urllib.request.urlopen(req, timeout=10) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            if isinstance(result, list) and len(result) > 0:
-                return result[0].get("generated_text", "").strip()
-            return None
+        # Conexión keep-alive reutilizada entre invocaciones (http.client, sin dependencias)
+        respuesta = obtener_cliente_sync().generar(prompt, key)
+        LLAMADAS_LLM.inc(resultado="exito" if respuesta else "fallo")
+        return respuesta
     
     except Exception as e:
         print(f"❌ Error LLM: {e}")
+        LLAMADAS_LLM.inc(resultado="fallo")
         return None
 
 
-def generar_respuesta_simple(pregunta: str, entradas: List[Dict]) -> str:
-    """Genera respuesta basada en entradas encontradas (sin LLM)"""
-    if not entradas:
-        return "Lo siento, no encontré información específica sobre eso en el reglamento de tránsito de Hermosillo. ¿Podrías reformular tu pregunta o ser más específico?"
+def generar_respuesta_llm_cacheada(
+    pregunta: str, ids: List[int], prompt: str, version: str
+) -> Optional[str]:
+    """Respuesta del LLM pasando primero por la caché semántica"""
+    cache_semantica = obtener_cache_semantica()
+    respuesta = cache_semantica.buscar(pregunta, ids, version)
+    CONSULTAS_CACHE.inc(cache="semantica", resultado="acierto" if respuesta is not None else "fallo")
+    if respuesta is None:
+        respuesta = generar_respuesta_llm(prompt)
+        if respuesta:
+            cache_semantica.guardar(pregunta, ids, version, respuesta)
+    return respuesta
+
+
+def construir_respuesta(pregunta: str, ids_relevantes: List[int], corpus) -> Tuple[Dict, bytes]:
+    """
+    Respuesta a partir de las entradas recuperadas: LLM si está configurado,
+    si no (o si falla) respuesta simple; guarda en caché las respuestas definitivas
+    Devuelve los datos y su JSON, armado con las fuentes ya serializadas
+    """
+    version = corpus.version
+    entradas_relevantes = [corpus.entradas[i] for i in ids_relevantes]
     
-    respuesta = "📋 Encontré la siguiente información en el Reglamento de Tránsito de Hermosillo:\n\n"
+    # Intentar LLM
+    respuesta_texto = None
+    usa_llm = False
+    tokens_prompt = None
+    llm_habilitado = bool(api_key())
     
-    for i, entrada in enumerate(entradas, 1):
-        respuesta += f"**{i}. {entrada.get('subcategoria', 'Información')}**\n"
-        respuesta += f"{entrada.get('descripcion', '')}\n"
-        
-        if entrada.get('articulo'):
-            respuesta += f"_Fundamento: {entrada.get('articulo')}_\n"
-        
-        respuesta += "\n"
+    if llm_habilitado and entradas_relevantes:
+        with medir("prompt"):
+            prompt = obtener_constructor_prompt().construir(pregunta, entradas_relevantes)
+        TOKENS_PROMPT.observar(prompt.tokens)
+        with medir("llm"):
+            respuesta_texto = generar_respuesta_llm_cacheada(
+                pregunta, ids_relevantes, prompt.texto, version
+            )
+        if respuesta_texto:
+            usa_llm = True
+            tokens_prompt = prompt.tokens
     
-    if len(entradas) > 1:
-        respuesta += f"_Se encontraron {len(entradas)} entradas relevantes._\n"
+    # Fallback a respuesta simple
+    if not respuesta_texto:
+        with medir("respuesta_simple"):
+            respuesta_texto = generar_respuesta_simple(pregunta, entradas_relevantes)
+    anotar(usa_llm=usa_llm, tokens_prompt=tokens_prompt)
     
-    respuesta += "\n💡 ¿Necesitas más información sobre algún tema específico?"
+    response_data = {
+        "respuesta": respuesta_texto,
+        "fuentes": entradas_relevantes,
+        "usa_llm": usa_llm,
+        "tokens_prompt": tokens_prompt
+    }
+    with medir("serializacion"):
+        contenido = serializar_respuesta(
+            respuesta_texto, corpus.fuentes_json(ids_relevantes), usa_llm, tokens_prompt
+        )
     
-    return respuesta
+    # Solo se cachean respuestas definitivas: si el LLM falló se reintentará
+    if usa_llm or not llm_habilitado:
+        obtener_cache().guardar_json(pregunta, version, contenido)
+    
+    return response_data, contenido
 
 
 class handler(BaseHTTPRequestHandler):
     """Handler para Vercel Serverless Function"""
     
     def do_POST(self):
+        traza = iniciar_traza("api_query")
+        estado = "error"
         try:
             # Leer body
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length).decode('utf-8')
-            data = json.loads(body)
-            
-            pregunta = data.get("pregunta", "").strip()
+            with medir("validacion"):
+                content_length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(content_length).decode('utf-8')
+                data = json.loads(body)
+                
+                pregunta = data.get("pregunta", "").strip()
             
             if not pregunta or len(pregunta) < 3:
                 self.send_response(400)
@@ -163,35 +148,28 @@ class handler(BaseHTTPRequestHandler):
                 }).encode('utf-8'))
                 return
             
-            # Buscar en reglamento
-            entradas_relevantes = buscar_en_reglamento(pregunta)
-            
-            # Intentar LLM
-            respuesta_texto = None
-            usa_llm = False
-            
-            if entradas_relevantes:
-                respuesta_texto = generar_respuesta_llm(pregunta, entradas_relevantes)
-                if respuesta_texto:
-                    usa_llm = True
-            
-            # Fallback a respuesta simple
-            if not respuesta_texto:
-                respuesta_texto = generar_respuesta_simple(pregunta, entradas_relevantes)
-            
-            # Responder
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
+            # Respuesta cacheada para la misma pregunta normalizada
+            cache = obtener_cache()
+            corpus = obtener_corpus()
+            version = corpus.version
+            with medir("cache"):
+                contenido = cache.obtener_json(pregunta, version)
+            CONSULTAS_CACHE.inc(cache="exacta", resultado="acierto" if contenido is not None else "fallo")
+            if contenido is not None:
+                # La caché guarda el cuerpo ya serializado
+                anotar(cache=True)
+                self._responder(contenido)
+                estado = "ok"
+                return
             
-            response_data = {
-                "respuesta": respuesta_texto,
-                "fuentes": entradas_relevantes,
-                "usa_llm": usa_llm
-            }
+            # Buscar en reglamento
+            with medir("busqueda"):
+                ids_relevantes = corpus.buscar_ids(pregunta)
+            anotar(resultados=len(ids_relevantes))
             
-            self.wfile.write(json.dumps(response_data, ensure_ascii=False).encode('utf-8'))
+            _, contenido = construir_respuesta(pregunta, ids_relevantes, corpus)
+            self._responder(contenido)
+            estado = "ok"
         
         except Exception as e:
             print(f"❌ Error en query: {e}")
@@ -202,6 +180,22 @@ class handler(BaseHTTPRequestHandler):
             self.wfile.write(json.dumps({
                 "error": str(e)
             }).encode('utf-8'))
+        
+        finally:
+            traza.terminar(estado)
+    
+    def _responder(self, contenido: bytes):
+        """Cuerpo comprimido según Accept-Encoding"""
+        with medir("compresion"):
+            status, cabeceras, cuerpo = preparar_respuesta(
+                contenido, self.headers, "POST", cache_control="no-store"
+            )
+        self.send_response(status)
+        for nombre, valor in cabeceras:
+            self.send_header(nombre, valor)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(cuerpo)
     
     def do_OPTIONS(self):
         """Handle CORS preflight"""
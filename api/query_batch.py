@@ -0,0 +1,133 @@
+"""
+Vercel Serverless Function: POST /api/query/batch
+Varias preguntas al chatbot en una sola petición (kioscos, WhatsApp)
+"""
+
+from http.server import BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+# Núcleo compartido con el backend FastAPI y la lógica de respuesta de /api/query
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+sys.path.insert(0, os.path.dirname(__file__))
+from reglamento_core import (
+    CONSULTAS_CACHE,
+    LLM_CONCURRENCIA_LOTE,
+    MAX_LOTE,
+    anotar,
+    deduplicar,
+    iniciar_traza,
+    medir,
+    obtener_cache,
+    preparar_respuesta,
+    obtener_corpus,
+    validar_pregunta,
+)
+from query import construir_respuesta
+
+
+def consultar_lote(preguntas: List[str]) -> List[Dict]:
+    """
+    Resultados en el mismo orden que las preguntas; las repetidas se resuelven
+    una vez, la búsqueda se puntúa en una sola pasada y las llamadas al LLM
+    corren en paralelo con un máximo de LLM_CONCURRENCIA_LOTE hilos
+    """
+    cache = obtener_cache()
+    corpus = obtener_corpus()
+    version = corpus.version
+    
+    errores = [validar_pregunta(p) for p in preguntas]
+    validas = [p for p, error in zip(preguntas, errores) if error is None]
+    unicas, asignacion = deduplicar(validas)
+    
+    resultados: List[Optional[Dict]] = [None] * len(unicas)
+    pendientes: List[int] = []
+    for i, pregunta in enumerate(unicas):
+        resultados[i] = cache.obtener(pregunta, version)
+        CONSULTAS_CACHE.inc(cache="exacta", resultado="acierto" if resultados[i] is not None else "fallo")
+        if resultados[i] is None:
+            pendientes.append(i)
+    
+    with medir("busqueda"):
+        ids_por_pregunta = corpus.buscar_ids_lote([unicas[i] for i in pendientes])
+    anotar(preguntas=len(preguntas), unicas=len(unicas), pendientes=len(pendientes))
+    
+    def resolver(i: int, ids_relevantes: List[int]) -> Dict:
+        try:
+            datos, _ = construir_respuesta(unicas[i], ids_relevantes, corpus)
+            return datos
+        except Exception as e:
+            print(f"❌ Error en consulta del lote: {e}")
+            return {"error": str(e)}
+    
+    if pendientes:
+        # Cada hilo hereda la traza de la petición para sumar sus etapas
+        contextos = [contextvars.copy_context() for _ in pendientes]
+        with ThreadPoolExecutor(max_workers=min(LLM_CONCURRENCIA_LOTE, len(pendientes))) as pool:
+            en_contexto = lambda contexto, i, ids: contexto.run(resolver, i, ids)
+            for i, resultado in zip(pendientes, pool.map(en_contexto, contextos, pendientes, ids_por_pregunta)):
+                resultados[i] = resultado
+    
+    salida: List[Dict] = []
+    siguiente = iter(asignacion)
+    for error in errores:
+        salida.append({"error": error} if error else resultados[next(siguiente)])
+    return salida
+
+
+class handler(BaseHTTPRequestHandler):
+    """Handler para Vercel Serverless Function"""
+    
+    def do_POST(self):
+        traza = iniciar_traza("api_query_batch")
+        estado = "error"
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+            body = self.rfile.read(content_length).decode('utf-8')
+            data = json.loads(body)
+            
+            preguntas = data.get("preguntas")
+            
+            if not isinstance(preguntas, list):
+                self._responder(400, {"error": "Se esperaba una lista en 'preguntas'"})
+                return
+            
+            if len(preguntas) > MAX_LOTE:
+                self._responder(400, {"error": f"El lote admite como máximo {MAX_LOTE} preguntas"})
+                return
+            
+            self._responder(200, {"resultados": consultar_lote(preguntas)})
+            estado = "ok"
+        
+        except Exception as e:
+            print(f"❌ Error en query batch: {e}")
+            self._responder(500, {"error": str(e)})
+        
+        finally:
+            traza.terminar(estado)
+    
+    def _responder(self, status: int, response_data: Dict):
+        with medir("serializacion"):
+            contenido = json.dumps(response_data, ensure_ascii=False).encode('utf-8')
+        with medir("compresion"):
+            status, cabeceras, cuerpo = preparar_respuesta(
+                contenido, self.headers, "POST", cache_control="no-store", status=status
+            )
+        self.send_response(status)
+        for nombre, valor in cabeceras:
+            self.send_header(nombre, valor)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(cuerpo)
+    
+    def do_OPTIONS(self):
+        """Handle CORS preflight"""
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.end_headers()
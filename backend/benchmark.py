@@ -0,0 +1,529 @@
+"""
+Benchmark de carga del chatbot del reglamento
+
+Objetivos:
+- busqueda: búsqueda BM25F en proceso (lo que hace buscar_en_reglamento)
+- asgi:     POST /query contra la app FastAPI en proceso (sin red)
+- uvicorn:  POST /query contra main:app levantado con uvicorn (requiere uvicorn)
+- api:      POST contra el handler serverless api/query.py (BaseHTTPRequestHandler)
+
+Con --llm se levanta mock_hf.py con latencia y fallos configurables y los
+objetivos pasan por el camino del LLM. Cada objetivo corre en su propio
+proceso, así ninguno hereda cachés ni métricas de otro. Reporta throughput,
+p50/p95/p99 y memoria; --guardar-base guarda los resultados y --comparar
+falla (código 1) si algún objetivo empeora más que --tolerancia respecto a
+la base o no terminó. Solo se compara con una base de la misma configuración.
+
+Uso:
+    python benchmark.py --peticiones 1000 --concurrencia 32 --sin-cache
+    python benchmark.py --llm --latencia-llm 0.2 --fallos-llm 0.05 --objetivos asgi,api
+    python benchmark.py --guardar-base      # actualiza benchmark_baseline.json
+    python benchmark.py --comparar          # compara con la base
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from typing import Awaitable, Callable, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(os.path.dirname(BACKEND_DIR), "api")
+BASE_PATH = os.path.join(BACKEND_DIR, "benchmark_baseline.json")
+OBJETIVOS = ("busqueda", "asgi", "uvicorn", "api")
+
+TEMAS = [
+    "exceso de velocidad",
+    "manejar en estado de ebriedad",
+    "no usar casco en motocicleta",
+    "no usar el cinturón de seguridad",
+    "estacionarse en lugar prohibido",
+    "usar el celular al manejar",
+    "licencia de conducir vencida",
+    "velocidad en zonas escolares",
+    "pasarse el semáforo en rojo",
+    "circular por la ciclovía",
+    "placas vencidas",
+    "seguro de responsabilidad civil",
+    "niños en el asiento delantero",
+    "vidrios polarizados",
+    "usar el claxon sin necesidad",
+    "dar vuelta en U",
+    "rebasar por la derecha",
+    "obstruir la banqueta",
+    "estacionarse en lugar para discapacitados",
+    "transportar carga sobresaliente",
+]
+
+PLANTILLAS = [
+    "¿Cuál es la multa por {tema}?",
+    "¿Qué dice el reglamento sobre {tema}?",
+    "¿Qué artículo regula {tema}?",
+    "¿Me pueden multar por {tema}?",
+    "Información sobre {tema} en Hermosillo",
+    "¿Qué sanción hay por {tema}?",
+]
+
+
+def generar_preguntas(n: int, semilla: int = 0, unicas: int = 0) -> List[str]:
+    """n preguntas sintéticas en español tomadas de un conjunto de `unicas` distintas"""
+    azar = random.Random(semilla)
+    todas = [p.format(tema=t) for t in TEMAS for p in PLANTILLAS]
+    azar.shuffle(todas)
+    if unicas:
+        todas = todas[:unicas]
+    return [azar.choice(todas) for _ in range(n)]
+
+
+def rss_mb(pid: str = "self") -> Optional[float]:
+    """Memoria residente actual de un proceso (Linux)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for linea in f:
+                if linea.startswith("VmRSS:"):
+                    return round(int(linea.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil por rango más cercano"""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+
+def resumir(latencias: List[float], errores: int, duracion: float, memoria: Optional[float]) -> Dict:
+    total = len(latencias) + errores
+    return {
+        "peticiones": total,
+        "errores": errores,
+        "rps": round(total / duracion, 1) if duracion else 0.0,
+        "p50_ms": round(percentil(latencias, 50) * 1000, 3),
+        "p95_ms": round(percentil(latencias, 95) * 1000, 3),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 3),
+        "rss_mb": memoria,
+    }
+
+
+async def carga(
+    preguntas: List[str],
+    concurrencia: int,
+    enviar: Callable[[str], Awaitable[bool]],
+) -> Dict:
+    """Reparte las preguntas entre `concurrencia` trabajadores y mide cada petición"""
+    latencias: List[float] = []
+    errores = 0
+    siguiente = iter(preguntas)
+
+    async def trabajador():
+        nonlocal errores
+        for pregunta in siguiente:
+            inicio = time.perf_counter()
+            try:
+                ok = await enviar(pregunta)
+            except Exception:
+                ok = False
+            if ok:
+                latencias.append(time.perf_counter() - inicio)
+            else:
+                errores += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*[trabajador() for _ in range(concurrencia)])
+    return resumir(latencias, errores, time.perf_counter() - inicio, None)
+
+
+# --- Objetivos ---------------------------------------------------------------
+
+def bench_busqueda(preguntas: List[str], _concurrencia: int) -> Dict:
+    """Búsqueda sin HTTP: detecta regresiones del índice y del ranking"""
+    from reglamento_core import obtener_corpus
+
+    corpus = obtener_corpus()
+    latencias = []
+    inicio = time.perf_counter()
+    for pregunta in preguntas:
+        t = time.perf_counter()
+        corpus.buscar_ids(pregunta)
+        latencias.append(time.perf_counter() - t)
+    return resumir(latencias, 0, time.perf_counter() - inicio, rss_mb())
+
+
+class ClienteASGI:
+    """Peticiones directas a una app ASGI, con su ciclo de vida (lifespan)"""
+
+    def __init__(self, app):
+        self.app = app
+        self._eventos: asyncio.Queue = asyncio.Queue()
+        self._tarea: Optional[asyncio.Task] = None
+
+    async def iniciar(self):
+        listo = asyncio.Event()
+
+        async def send(mensaje):
+            if mensaje["type"].startswith("lifespan.startup"):
+                listo.set()
+
+        scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+        self._tarea = asyncio.ensure_future(self.app(scope, self._eventos.get, send))
+        await self._eventos.put({"type": "lifespan.startup"})
+        await listo.wait()
+
+    async def cerrar(self):
+        await self._eventos.put({"type": "lifespan.shutdown"})
+        await self._tarea
+
+    async def post(self, ruta: str, datos: Dict) -> int:
+        cuerpo = json.dumps(datos).encode("utf-8")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": ruta,
+            "raw_path": ruta.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(cuerpo)).encode())],
+            "client": ("127.0.0.1", 0),
+            "server": ("127.0.0.1", 80),
+            "state": {},
+        }
+        recibido = False
+        status = 0
+
+        async def receive():
+            nonlocal recibido
+            if not recibido:
+                recibido = True
+                return {"type": "http.request", "body": cuerpo, "more_body": False}
+            await asyncio.Event().wait()
+
+        async def send(mensaje):
+            nonlocal status
+            if mensaje["type"] == "http.response.start":
+                status = mensaje["status"]
+
+        await self.app(scope, receive, send)
+        return status
+
+
+def bench_asgi(preguntas: List[str], concurrencia: int) -> Dict:
+    """main:app en proceso, sin red ni servidor"""
+    sys.path.insert(0, BACKEND_DIR)
+    import main
+
+    async def correr():
+        cliente = ClienteASGI(main.app)
+        await cliente.iniciar()
+        try:
+            enviar = lambda p: _ok(cliente.post("/query", {"pregunta": p}))
+            return await carga(preguntas, concurrencia, enviar)
+        finally:
+            await cliente.cerrar()
+
+    resultado = asyncio.run(correr())
+    resultado["rss_mb"] = rss_mb()
+    return resultado
+
+
+async def _ok(status: Awaitable[int]) -> bool:
+    return await status == 200
+
+
+async def carga_http(url: str, preguntas: List[str], concurrencia: int, pid: str = "self") -> Dict:
+    """Carga por HTTP con una sesión aiohttp de `concurrencia` conexiones"""
+    import aiohttp
+
+    conector = aiohttp.TCPConnector(limit=concurrencia)
+    async with aiohttp.ClientSession(connector=conector) as sesion:
+        async def enviar(pregunta: str) -> bool:
+            async with sesion.post(url, json={"pregunta": pregunta}) as respuesta:
+                await respuesta.read()
+                return respuesta.status == 200
+
+        resultado = await carga(preguntas, concurrencia, enviar)
+    resultado["rss_mb"] = rss_mb(pid)
+    return resultado
+
+
+def bench_uvicorn(preguntas: List[str], concurrencia: int) -> Dict:
+    """main:app servido por uvicorn en otro proceso"""
+    import socket
+    import urllib.request
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        puerto = s.getsockname()[1]
+
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(puerto), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=os.environ.copy(),
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        base = f"http://127.0.0.1:{puerto}"
+        for _ in range(100):
+            if proceso.poll() is not None:
+                raise RuntimeError("uvicorn no arrancó (¿está instalado?)")
+            try:
+                urllib.request.urlopen(f"{base}/health", timeout=1).read()
+                break
+            except OSError:
+                time.sleep(0.1)
+        return asyncio.run(carga_http(f"{base}/query", preguntas, concurrencia, str(proceso.pid)))
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+
+def bench_api(preguntas: List[str], concurrencia: int) -> Dict:
+    """Handler serverless de api/query.py servido con ThreadingHTTPServer"""
+    spec = importlib.util.spec_from_file_location("api_query", os.path.join(API_DIR, "query.py"))
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+
+    # Cola de escucha amplia: con la de 5 por defecto las conexiones rechazadas
+    # se reintentan al segundo y ensucian el p99
+    clase = type("ServidorBench", (ThreadingHTTPServer,), {"request_queue_size": 256})
+    servidor = clase(("127.0.0.1", 0), modulo.handler)
+    servidor.RequestHandlerClass.log_message = lambda *args: None
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{servidor.server_address[1]}/"
+        return asyncio.run(carga_http(url, preguntas, concurrencia))
+    finally:
+        servidor.shutdown()
+
+
+def llamadas_llm() -> Dict[str, float]:
+    """Llamadas al LLM del proceso por resultado (exito, fallo, sin_cupo...)"""
+    from reglamento_core import LLAMADAS_LLM
+
+    return {clave[0]: valor for clave, valor in LLAMADAS_LLM.series().items()}
+
+
+BENCHMARKS = {
+    "busqueda": bench_busqueda,
+    "asgi": bench_asgi,
+    "uvicorn": bench_uvicorn,
+    "api": bench_api,
+}
+
+
+# --- Base y comparación ------------------------------------------------------
+
+def _correr_aislado(objetivo: str, preguntas: List[str], concurrencia: int, llm: bool, cola) -> None:
+    try:
+        resultado = BENCHMARKS[objetivo](preguntas, concurrencia)
+        if llm and objetivo != "uvicorn":
+            # Proceso nuevo: las métricas empiezan en cero
+            resultado["llm"] = {r: v for r, v in llamadas_llm().items() if v}
+        cola.put(("ok", resultado))
+    except Exception as e:
+        cola.put(("error", f"{type(e).__name__}: {e}"))
+
+
+def correr_objetivo(objetivo: str, preguntas: List[str], concurrencia: int, llm: bool) -> Dict:
+    """
+    Corre un objetivo en un proceso nuevo (spawn): cachés de respuestas,
+    caché semántica, índice y métricas empiezan de cero en cada uno
+    """
+    contexto = multiprocessing.get_context("spawn")
+    cola = contexto.Queue()
+    proceso = contexto.Process(target=_correr_aislado, args=(objetivo, preguntas, concurrencia, llm, cola))
+    proceso.start()
+    try:
+        while True:
+            try:
+                estado, valor = cola.get(timeout=1)
+                break
+            except queue.Empty:
+                if not proceso.is_alive():
+                    raise RuntimeError(f"el proceso terminó sin resultado (código {proceso.exitcode})")
+    finally:
+        proceso.join()
+    if estado != "ok":
+        raise RuntimeError(valor)
+    return valor
+
+
+def configuracion(args: argparse.Namespace, objetivos: List[str]) -> Dict:
+    """Parámetros que deben coincidir para que dos corridas sean comparables"""
+    return {
+        "objetivos": objetivos,
+        "peticiones": args.peticiones,
+        "sin_cache": args.sin_cache,
+        "concurrencia": args.concurrencia,
+        "unicas": args.unicas,
+        "semilla": args.semilla,
+        "latencia_llm": args.latencia_llm if args.llm else None,
+        "fallos_llm": args.fallos_llm if args.llm else None,
+    }
+
+
+def diferencias_configuracion(actual: Dict, guardada: Dict) -> List[str]:
+    return [
+        f"{clave}: {guardada.get(clave)} → {actual.get(clave)}"
+        for clave in sorted(set(actual) | set(guardada))
+        if actual.get(clave) != guardada.get(clave)
+    ]
+
+
+def comparar(resultados: Dict, base: Dict, tolerancia: float) -> List[str]:
+    """
+    Regresiones: p95 más alto o throughput más bajo que la base más allá de la
+    tolerancia, más errores, o un objetivo de la base que no terminó
+    """
+    regresiones = []
+    for objetivo in base:
+        if objetivo not in resultados:
+            regresiones.append(f"{objetivo}: no terminó (está en la base y no hay resultado)")
+    for objetivo, actual in resultados.items():
+        previo = base.get(objetivo)
+        if not previo:
+            continue
+        if previo["p95_ms"] and actual["p95_ms"] > previo["p95_ms"] * (1 + tolerancia):
+            regresiones.append(f"{objetivo}: p95 {previo['p95_ms']} → {actual['p95_ms']} ms")
+        if previo["rps"] and actual["rps"] < previo["rps"] * (1 - tolerancia):
+            regresiones.append(f"{objetivo}: throughput {previo['rps']} → {actual['rps']} peticiones/s")
+        if actual["errores"] > previo["errores"]:
+            regresiones.append(f"{objetivo}: errores {previo['errores']} → {actual['errores']}")
+    return regresiones
+
+
+def imprimir(resultados: Dict) -> None:
+    print(f"{'objetivo':<10} {'peticiones':>10} {'errores':>8} {'rps':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rss MB':>8}")
+    for objetivo, r in resultados.items():
+        print(
+            f"{objetivo:<10} {r['peticiones']:>10} {r['errores']:>8} {r['rps']:>10} "
+            f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} {str(r['rss_mb']):>8}"
+        )
+        if r.get("llm"):
+            print(f"{'':<10} llamadas al LLM: {', '.join(f'{k}={int(v)}' for k, v in sorted(r['llm'].items()))}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de carga del chatbot del reglamento")
+    parser.add_argument("--objetivos", default="busqueda,asgi,api", help=f"lista separada por comas de {', '.join(OBJETIVOS)}")
+    parser.add_argument("--peticiones", type=int, default=500)
+    parser.add_argument("--concurrencia", type=int, default=16)
+    parser.add_argument("--unicas", type=int, default=0, help="preguntas distintas (0 = todas las generadas)")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--sin-cache", action="store_true", help="cada petición recorre el camino completo")
+    parser.add_argument("--llm", action="store_true", help="pasar por el LLM usando mock_hf.py")
+    parser.add_argument("--latencia-llm", type=float, default=0.1)
+    parser.add_argument("--fallos-llm", type=float, default=0.0)
+    parser.add_argument("--guardar-base", action="store_true")
+    parser.add_argument("--comparar", action="store_true")
+    parser.add_argument("--tolerancia", type=float, default=0.3)
+    parser.add_argument("--base", default=BASE_PATH)
+    args = parser.parse_args(argv)
+
+    objetivos = [o.strip() for o in args.objetivos.split(",") if o.strip()]
+    desconocidos = [o for o in objetivos if o not in BENCHMARKS]
+    if desconocidos:
+        parser.error(f"objetivos desconocidos: {', '.join(desconocidos)}")
+
+    escenario = "llm" if args.llm else "sin_llm"
+    config = configuracion(args, objetivos)
+    guardada: Dict = {}
+    if args.comparar:
+        # Se valida antes de correr: con otras opciones los números no son comparables
+        if os.path.exists(args.base):
+            with open(args.base, encoding="utf-8") as f:
+                guardada = json.load(f).get(escenario, {})
+        if not guardada:
+            print(f"❌ La base {args.base} no tiene el escenario {escenario}; genérala con --guardar-base")
+            return 1
+        diferencias = diferencias_configuracion(config, guardada.get("configuracion", {}))
+        if diferencias:
+            print(f"❌ La configuración no coincide con la base ({'; '.join(diferencias)})")
+            print("   Usa las mismas opciones o regenera la base con --guardar-base")
+            return 1
+
+    # La configuración se lee al importar main y reglamento_core
+    os.environ.setdefault("METRICAS_LOG_JSON", "0")
+    if args.sin_cache:
+        # TTL 0: lo guardado expira al instante; umbral > 1: la caché semántica nunca acierta
+        os.environ["CACHE_TTL"] = "0"
+        os.environ["SEMANTIC_CACHE_UMBRAL"] = "2"
+    servidor_llm = None
+    if args.llm:
+        sys.path.insert(0, BACKEND_DIR)
+        from mock_hf import iniciar_servidor
+
+        servidor_llm, url = iniciar_servidor(latencia=args.latencia_llm, fallos=args.fallos_llm, semilla=args.semilla)
+        os.environ["HF_API_URL"] = url
+        os.environ["HUGGINGFACE_API_KEY"] = "mock"
+    else:
+        os.environ["HUGGINGFACE_API_KEY"] = ""
+    sys.path.insert(0, BACKEND_DIR)
+
+    preguntas = generar_preguntas(args.peticiones, args.semilla, args.unicas)
+    print(f"🧪 {len(preguntas)} preguntas, concurrencia {args.concurrencia}, LLM {'simulado' if args.llm else 'desactivado'}")
+
+    resultados: Dict[str, Dict] = {}
+    fallidos: List[str] = []
+    try:
+        for objetivo in objetivos:
+            try:
+                resultados[objetivo] = correr_objetivo(objetivo, preguntas, args.concurrencia, args.llm)
+            except Exception as e:
+                fallidos.append(objetivo)
+                print(f"❌ {objetivo}: {e}")
+    finally:
+        if servidor_llm is not None:
+            servidor_llm.shutdown()
+
+    imprimir(resultados)
+
+    if args.guardar_base:
+        if fallidos:
+            print(f"❌ No se guarda la base: fallaron {', '.join(fallidos)}")
+            return 1
+        base = {}
+        if os.path.exists(args.base):
+            with open(args.base, encoding="utf-8") as f:
+                base = json.load(f)
+        base[escenario] = {
+            "configuracion": config,
+            "maquina": f"{platform.system()} {platform.machine()} Python {platform.python_version()}",
+            # Máximo entre los procesos de los objetivos
+            "pico_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+            "resultados": resultados,
+        }
+        with open(args.base, "w", encoding="utf-8") as f:
+            json.dump(base, f, ensure_ascii=False, indent=2)
+        print(f"✅ Base guardada en {args.base} ({escenario})")
+
+    if args.comparar:
+        regresiones = comparar(resultados, guardada.get("resultados", {}), args.tolerancia)
+        for regresion in regresiones:
+            print(f"❌ Regresión en {regresion}")
+        if regresiones:
+            return 1
+        print("✅ Sin regresiones respecto a la base")
+
+    return 1 if fallidos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
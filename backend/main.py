@@ -4,13 +4,47 @@ Integra búsqueda en JSON local con modelo LLM de Hugging Face
 Modelo: AIDC-AI/Marco-LLM-ES (español)
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
+import asyncio
 import json
-from typing import List, Dict, Optional
 import os
-import re
+import time
+from typing import AsyncIterator, List, Dict, Optional, Set, Tuple
+
+from reglamento_core import (
+    LLM_CONCURRENCIA_LOTE,
+    LLM_ESPERA_CUPO,
+    LLM_LOCAL_MODELO,
+    LLM_MODEL,
+    MAX_LOTE,
+    CONSULTAS_CACHE,
+    LLAMADAS_LLM,
+    TOKENS_PROMPT,
+    CircuitBreaker,
+    ClienteHFAsync,
+    ClienteLocal,
+    LimitadorAdaptativo,
+    SingleFlight,
+    anotar,
+    api_key,
+    deduplicar,
+    exponer_metricas,
+    generar_respuesta_simple,
+    iniciar_traza,
+    medir,
+    normalizar_pregunta,
+    obtener_cache,
+    obtener_cache_semantica,
+    obtener_constructor_prompt,
+    obtener_corpus,
+    obtener_recargador,
+    preparar_respuesta,
+    serializar_respuesta,
+    validar_pregunta,
+)
 
 app = FastAPI(title="Chatbot Reglamento Tránsito Hermosillo")
 
@@ -23,24 +57,68 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Cargar datos del reglamento
-REGLAMENTO_PATH = os.path.join(os.path.dirname(__file__), "reglamento.json")
-reglamento_data: List[Dict] = []
+
+# Configuración del LLM
+# LLM_BACKEND: hf (API de Hugging Face), local (modelo en CPU) o stub (modelo de prueba)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "hf").lower()
+HUGGINGFACE_API_KEY = api_key()
+USE_LLM = LLM_BACKEND in ("local", "stub") or bool(HUGGINGFACE_API_KEY)
+
+
+def crear_cliente_llm():
+    """Cliente del LLM según LLM_BACKEND"""
+    if LLM_BACKEND == "local":
+        return ClienteLocal(tipo="transformers")
+    if LLM_BACKEND == "stub":
+        return ClienteLocal(tipo="stub")
+    # Cliente HTTP de Hugging Face con pool de conexiones (vida de la app)
+    return ClienteHFAsync()
+
+
+cliente_llm = crear_cliente_llm()
+
+# Preguntas idénticas simultáneas comparten una sola llamada al LLM
+coalescedor_llm = SingleFlight()
+
+# Protecciones ante degradación de Hugging Face
+limitador_llm = LimitadorAdaptativo()
+circuito_llm = CircuitBreaker()
+
+# Presupuesto de latencia del LLM en /query (segundos; 0 = esperar el timeout completo).
+# Al vencer se responde con la respuesta simple y la llamada termina en segundo plano
+# para dejar la respuesta del LLM en la caché semántica.
+LLM_PRESUPUESTO = float(os.getenv("LLM_PRESUPUESTO", "0"))
+tareas_en_fondo: Set[asyncio.Task] = set()
+
+
+def espera_cupo_llm() -> float:
+    """Tiempo máximo esperando lugar en el limitador: el presupuesto de latencia si lo hay"""
+    return LLM_PRESUPUESTO if LLM_PRESUPUESTO > 0 else LLM_ESPERA_CUPO
+
 
 @app.on_event("startup")
 async def load_reglamento():
-    """Cargar el JSON del reglamento al iniciar la aplicación"""
-    global reglamento_data
-    try:
-        with open(REGLAMENTO_PATH, "r", encoding="utf-8") as f:
-            reglamento_data = json.load(f)
-        print(f"✅ Reglamento cargado: {len(reglamento_data)} entradas")
-    except FileNotFoundError:
-        print(f"⚠️  No se encontró {REGLAMENTO_PATH}")
-        reglamento_data = []
-    except Exception as e:
-        print(f"❌ Error al cargar reglamento: {e}")
-        reglamento_data = []
+    """Cargar e indexar el reglamento al iniciar y vigilar sus cambios (REGLAMENTO_RECARGA_SEGUNDOS)"""
+    obtener_corpus()
+    obtener_recargador().iniciar()
+
+
+@app.on_event("shutdown")
+async def detener_recarga():
+    obtener_recargador().detener()
+
+
+@app.on_event("startup")
+async def abrir_cliente_llm():
+    """Abrir el pool de conexiones hacia Hugging Face o los workers del modelo local"""
+    if USE_LLM:
+        await cliente_llm.iniciar()
+
+
+@app.on_event("shutdown")
+async def cerrar_cliente_llm():
+    """Cerrar conexiones y workers del LLM"""
+    await cliente_llm.cerrar()
 
 
 class QueryRequest(BaseModel):
@@ -51,178 +129,402 @@ class QueryResponse(BaseModel):
     respuesta: str
     fuentes: Optional[List[Dict]] = []
     usa_llm: bool = False
+    tokens_prompt: Optional[int] = None
+
+
+class BatchQueryRequest(BaseModel):
+    preguntas: List[str]
+
+
+class BatchQueryItem(BaseModel):
+    respuesta: Optional[str] = None
+    fuentes: Optional[List[Dict]] = []
+    usa_llm: bool = False
+    tokens_prompt: Optional[int] = None
+    error: Optional[str] = None
 
 
-# Configuración de Hugging Face
-HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY", "")
-USE_LLM = bool(HUGGINGFACE_API_KEY)
-LLM_MODEL = "AIDC-AI/Marco-LLM-ES"
+class BatchQueryResponse(BaseModel):
+    resultados: List[BatchQueryItem]
 
 
 def buscar_en_reglamento(pregunta: str, max_resultados: int = 3) -> List[Dict]:
     """
-    Busca en el JSON del reglamento entradas relevantes a la pregunta
+    Busca en el índice del reglamento las entradas relevantes a la pregunta
     """
-    pregunta_lower = pregunta.lower()
-    palabras_clave = [p for p in pregunta_lower.split() if len(p) > 3]
-    
-    resultados = []
-    
-    for item in reglamento_data:
-        texto_busqueda = f"{item.get('categoria', '')} {item.get('subcategoria', '')} {item.get('descripcion', '')}".lower()
-        
-        # Contar coincidencias
-        coincidencias = sum(1 for palabra in palabras_clave if palabra in texto_busqueda)
-        
-        if coincidencias > 0:
-            resultados.append({
-                "item": item,
-                "score": coincidencias
-            })
-    
-    # Ordenar por relevancia
-    resultados.sort(key=lambda x: x["score"], reverse=True)
-    
-    return [r["item"] for r in resultados[:max_resultados]]
+    return obtener_corpus().buscar(pregunta, max_resultados)
 
 
-async def generar_respuesta_llm(pregunta: str, entradas: List[Dict]) -> str:
+async def generar_respuesta_llm(prompt: str) -> str:
     """
-    Genera una respuesta usando el modelo LLM de Hugging Face
+    Genera una respuesta usando el modelo LLM (Hugging Face o local)
     """
     try:
-        import aiohttp
-        
-        # Construir contexto desde las entradas encontradas
-        contexto = ""
-        for entrada in entradas:
-            contexto += f"- {entrada.get('subcategoria', '')}: {entrada.get('descripcion', '')}\n"
-            if entrada.get('articulo'):
-                contexto += f"  Fundamento: {entrada.get('articulo')}\n"
-        
-        # Construir el prompt
-        prompt = f"""Eres un asistente experto en el Reglamento de Tránsito de Hermosillo, Sonora.
+        return await cliente_llm.generar(prompt, HUGGINGFACE_API_KEY)
+    
+    except Exception as e:
+        print(f"❌ Error generando respuesta con LLM: {e}")
+        return None
 
-Pregunta del usuario: {pregunta}
 
-Información relevante del reglamento:
-{contexto}
+async def reservar_llm() -> bool:
+    """
+    Pasa el circuit breaker y toma un lugar del limitador; quien recibe True
+    debe llamar a limitador_llm.liberar y registrar el resultado en el circuito.
+    Si no hay lugar (o la espera se cancela) se devuelve la llamada de prueba
+    del circuito semiabierto para que no quede tomada para siempre
+    """
+    if not circuito_llm.permite():
+        LLAMADAS_LLM.inc(resultado="circuito_abierto")
+        return False
+    con_cupo = False
+    try:
+        con_cupo = await limitador_llm.adquirir(espera_cupo_llm())
+    finally:
+        if not con_cupo:
+            circuito_llm.cancelar_prueba()
+    if not con_cupo:
+        LLAMADAS_LLM.inc(resultado="sin_cupo")
+    return con_cupo
 
-Instrucciones:
-- Responde de forma clara, concisa y profesional
-- Usa formato markdown: **negrita** para títulos, _cursiva_ para fundamentos legales
-- Menciona los artículos del reglamento cuando sea relevante
-- Si la información no es suficiente, indícalo claramente
-- Mantén un tono amigable pero formal
 
-Respuesta:"""
+async def generar_respuesta_llm_protegida(prompt: str) -> Optional[str]:
+    """
+    Llamada al LLM detrás del circuit breaker y del limitador de concurrencia;
+    devuelve None sin llamar si el circuito está abierto o no hay cupo
+    """
+    if not await reservar_llm():
+        return None
+    
+    inicio = time.monotonic()
+    respuesta = None
+    try:
+        respuesta = await generar_respuesta_llm(prompt)
+        return respuesta
+    finally:
+        exito = bool(respuesta)
+        LLAMADAS_LLM.inc(resultado="exito" if exito else "fallo")
+        limitador_llm.liberar(exito, time.monotonic() - inicio)
+        if exito:
+            circuito_llm.registrar_exito()
+        else:
+            circuito_llm.registrar_fallo()
 
-        # Llamar a la API de Hugging Face
-        headers = {
-            "Authorization": f"Bearer {HUGGINGFACE_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "inputs": prompt,
-            "parameters": {
-                "max_new_tokens": 300,
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "return_full_text": False
-            }
-        }
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"https://api-inference.huggingface.co/models/{LLM_MODEL}",
-                headers=headers,
-                json=payload,
-                timeout=aiohttp.ClientTimeout(total=30)
-            ) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    if isinstance(result, list) and len(result) > 0:
-                        texto_generado = result[0].get("generated_text", "")
-                        return texto_generado.strip()
-                    else:
-                        print(f"⚠️ Respuesta inesperada del LLM: {result}")
-                        return None
-                else:
-                    error_text = await response.text()
-                    print(f"❌ Error en API Hugging Face ({response.status}): {error_text}")
-                    return None
+
+async def generar_respuesta_llm_cacheada(
+    pregunta: str, ids: List[int], prompt: str, version: str
+) -> Optional[str]:
+    """
+    Respuesta del LLM pasando primero por la caché semántica
+    (misma selección de entradas + pregunta parecida → misma respuesta)
+    """
+    cache_semantica = obtener_cache_semantica()
+    respuesta = cache_semantica.buscar(pregunta, ids, version)
+    CONSULTAS_CACHE.inc(cache="semantica", resultado="acierto" if respuesta is not None else "fallo")
+    if respuesta is not None:
+        return respuesta
     
-    except Exception as e:
-        print(f"❌ Error generando respuesta con LLM: {e}")
+    async def llamar_y_cachear() -> Optional[str]:
+        texto = await generar_respuesta_llm_protegida(prompt)
+        if texto:
+            cache_semantica.guardar(pregunta, ids, version, texto)
+        return texto
+    
+    clave = (version, normalizar_pregunta(pregunta), frozenset(ids))
+    trabajo = asyncio.ensure_future(coalescedor_llm.ejecutar(clave, llamar_y_cachear))
+    
+    if LLM_PRESUPUESTO <= 0:
+        return await trabajo
+    
+    try:
+        return await asyncio.wait_for(asyncio.shield(trabajo), LLM_PRESUPUESTO)
+    except asyncio.TimeoutError:
+        # Se responde sin LLM; la llamada sigue y calienta la caché semántica
+        LLAMADAS_LLM.inc(resultado="presupuesto_agotado")
+        tareas_en_fondo.add(trabajo)
+        trabajo.add_done_callback(tareas_en_fondo.discard)
         return None
 
 
-def generar_respuesta_simple(pregunta: str, entradas: List[Dict]) -> str:
+async def construir_respuesta(pregunta: str, ids_relevantes: List[int], corpus) -> Tuple[Dict, bytes]:
     """
-    Genera una respuesta basada en las entradas encontradas (sin LLM)
+    Respuesta a partir de las entradas recuperadas: LLM si está configurado,
+    si no (o si falla) respuesta simple; guarda en caché las respuestas definitivas
+    Devuelve los datos de QueryResponse y su JSON, armado con las fuentes ya serializadas
     """
-    if not entradas:
-        return "Lo siento, no encontré información específica sobre eso en el reglamento de tránsito de Hermosillo. ¿Podrías reformular tu pregunta o ser más específico?"
+    version = corpus.version
+    entradas_relevantes = [corpus.entradas[i] for i in ids_relevantes]
     
-    respuesta = "📋 Encontré la siguiente información en el Reglamento de Tránsito de Hermosillo:\n\n"
+    respuesta_texto = None
+    usa_llm = False
+    tokens_prompt = None
     
-    for i, entrada in enumerate(entradas, 1):
-        respuesta += f"**{i}. {entrada.get('subcategoria', 'Información')}**\n"
-        respuesta += f"{entrada.get('descripcion', '')}\n"
-        
-        if entrada.get('articulo'):
-            respuesta += f"_Fundamento: {entrada.get('articulo')}_\n"
-        
-        respuesta += "\n"
+    if USE_LLM and entradas_relevantes:
+        with medir("prompt"):
+            prompt = obtener_constructor_prompt().construir(pregunta, entradas_relevantes)
+        TOKENS_PROMPT.observar(prompt.tokens)
+        print(f"🤖 Generando respuesta con LLM para: {pregunta} ({prompt.tokens} tokens de prompt)")
+        with medir("llm"):
+            respuesta_texto = await generar_respuesta_llm_cacheada(
+                pregunta, ids_relevantes, prompt.texto, version
+            )
+        if respuesta_texto:
+            usa_llm = True
+            tokens_prompt = prompt.tokens
     
-    if len(entradas) > 1:
-        respuesta += f"_Se encontraron {len(entradas)} entradas relevantes._\n"
+    if not respuesta_texto:
+        with medir("respuesta_simple"):
+            respuesta_texto = generar_respuesta_simple(pregunta, entradas_relevantes)
+    anotar(usa_llm=usa_llm, tokens_prompt=tokens_prompt)
+    
+    datos = {
+        "respuesta": respuesta_texto,
+        "fuentes": entradas_relevantes,
+        "usa_llm": usa_llm,
+        "tokens_prompt": tokens_prompt
+    }
+    with medir("serializacion"):
+        contenido = serializar_respuesta(
+            respuesta_texto, corpus.fuentes_json(ids_relevantes), usa_llm, tokens_prompt
+        )
     
-    respuesta += "\n💡 ¿Necesitas más información sobre algún tema específico?"
+    # Solo se cachean respuestas definitivas: si el LLM falló se reintentará
+    if usa_llm or not USE_LLM:
+        obtener_cache().guardar_json(pregunta, version, contenido)
     
-    return respuesta
+    return datos, contenido
 
 
 @app.post("/query", response_model=QueryResponse)
-async def consultar_reglamento(request: QueryRequest):
+async def consultar_reglamento(request: QueryRequest, peticion: Request):
     """
     Endpoint principal para consultas al chatbot
     Flujo: Búsqueda JSON → Construcción de prompt → Query LLM → Respuesta formateada
     """
+    traza = iniciar_traza("query")
+    estado = "error"
     try:
-        if not request.pregunta or len(request.pregunta.strip()) < 3:
+        with medir("validacion"):
+            pregunta_valida = bool(request.pregunta) and len(request.pregunta.strip()) >= 3
+        if not pregunta_valida:
             raise HTTPException(
                 status_code=400, 
                 detail="La pregunta debe tener al menos 3 caracteres"
             )
         
-        # 1. Buscar en el reglamento JSON
-        entradas_relevantes = buscar_en_reglamento(request.pregunta)
+        # 0. Respuesta cacheada para la misma pregunta normalizada
+        cache = obtener_cache()
+        corpus = obtener_corpus()
+        version = corpus.version
+        with medir("cache"):
+            contenido = cache.obtener_json(request.pregunta, version)
+        CONSULTAS_CACHE.inc(cache="exacta", resultado="acierto" if contenido is not None else "fallo")
         
-        # 2. Intentar generar respuesta con LLM si está configurado
-        respuesta_texto = None
-        usa_llm = False
+        if contenido is not None:
+            # La caché guarda el cuerpo ya serializado
+            anotar(cache=True)
+        else:
+            # 1. Buscar en el reglamento JSON
+            with medir("busqueda"):
+                ids_relevantes = corpus.buscar_ids(request.pregunta)
+            anotar(resultados=len(ids_relevantes))
+            
+            # 2-3. LLM si está configurado, si no (o si falla) respuesta simple
+            _, contenido = await construir_respuesta(request.pregunta, ids_relevantes, corpus)
         
-        if USE_LLM and entradas_relevantes:
-            print(f"🤖 Generando respuesta con LLM para: {request.pregunta}")
-            respuesta_texto = await generar_respuesta_llm(request.pregunta, entradas_relevantes)
-            if respuesta_texto:
-                usa_llm = True
-        
-        # 3. Si LLM falló o no está configurado, usar respuesta simple
-        if not respuesta_texto:
-            respuesta_texto = generar_respuesta_simple(request.pregunta, entradas_relevantes)
-        
-        return QueryResponse(
-            respuesta=respuesta_texto,
-            fuentes=entradas_relevantes,
-            usa_llm=usa_llm
+        # Cuerpo ya serializado (FastAPI no revalida un Response), comprimido si el cliente lo acepta
+        with medir("compresion"):
+            status, cabeceras, cuerpo = preparar_respuesta(
+                contenido, peticion.headers, "POST", cache_control="no-store"
+            )
+        estado = "ok"
+        return Response(
+            content=cuerpo,
+            status_code=status,
+            headers={k: v for k, v in cabeceras if k not in ("Content-Type", "Content-Length")},
+            media_type="application/json"
         )
     
     except Exception as e:
         print(f"❌ Error en consulta: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    
+    finally:
+        traza.terminar(estado)
+
+
+@app.post("/query/batch", response_model=BatchQueryResponse)
+async def consultar_reglamento_lote(request: BatchQueryRequest):
+    """
+    Varias preguntas en una sola petición (kioscos, WhatsApp)
+    Las preguntas repetidas se resuelven una vez, la búsqueda se puntúa en
+    una sola pasada y las llamadas al LLM corren en paralelo con un límite
+    """
+    if len(request.preguntas) > MAX_LOTE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El lote admite como máximo {MAX_LOTE} preguntas"
+        )
+    
+    traza = iniciar_traza("query_batch")
+    cache = obtener_cache()
+    corpus = obtener_corpus()
+    version = corpus.version
+    
+    with medir("validacion"):
+        errores = [validar_pregunta(p) for p in request.preguntas]
+    validas = [p for p, error in zip(request.preguntas, errores) if error is None]
+    unicas, asignacion = deduplicar(validas)
+    
+    # Respuestas en caché y búsqueda vectorizada de las que faltan
+    resultados: List[Optional[BatchQueryItem]] = [None] * len(unicas)
+    pendientes: List[int] = []
+    for i, pregunta in enumerate(unicas):
+        cacheada = cache.obtener(pregunta, version)
+        CONSULTAS_CACHE.inc(cache="exacta", resultado="acierto" if cacheada is not None else "fallo")
+        if cacheada is not None:
+            resultados[i] = BatchQueryItem(**cacheada)
+        else:
+            pendientes.append(i)
+    
+    with medir("busqueda"):
+        ids_por_pregunta = corpus.buscar_ids_lote([unicas[i] for i in pendientes])
+    anotar(preguntas=len(request.preguntas), unicas=len(unicas), pendientes=len(pendientes))
+    semaforo = asyncio.Semaphore(LLM_CONCURRENCIA_LOTE)
+    
+    async def resolver(i: int, ids_relevantes: List[int]) -> None:
+        try:
+            async with semaforo:
+                datos, _ = await construir_respuesta(unicas[i], ids_relevantes, corpus)
+            resultados[i] = BatchQueryItem(**datos)
+        except Exception as e:
+            print(f"❌ Error en consulta del lote: {e}")
+            resultados[i] = BatchQueryItem(error=str(e))
+    
+    await asyncio.gather(*[resolver(i, ids) for i, ids in zip(pendientes, ids_por_pregunta)])
+    
+    # Resultados en el orden original, con el error de cada pregunta inválida
+    salida: List[BatchQueryItem] = []
+    siguiente = iter(asignacion)
+    for error in errores:
+        salida.append(BatchQueryItem(error=error) if error else resultados[next(siguiente)])
+    
+    traza.terminar()
+    return BatchQueryResponse(resultados=salida)
+
+
+def evento_sse(evento: str, datos: Dict) -> str:
+    """Formatea un evento Server-Sent Events"""
+    return f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
+
+
+async def eventos_consulta(pregunta: str) -> AsyncIterator[str]:
+    """
+    Eventos de una consulta en streaming:
+    fuentes → respuesta_simple → token* → fin
+    """
+    traza = iniciar_traza("query_stream")
+    estado = "error"
+    try:
+        async for evento in _eventos_consulta(pregunta):
+            yield evento
+        estado = "ok"
+    finally:
+        traza.terminar(estado)
+
+
+async def _eventos_consulta(pregunta: str) -> AsyncIterator[str]:
+    cache = obtener_cache()
+    corpus = obtener_corpus()
+    version = corpus.version
+    
+    cacheada = cache.obtener(pregunta, version)
+    CONSULTAS_CACHE.inc(cache="exacta", resultado="acierto" if cacheada is not None else "fallo")
+    if cacheada is not None:
+        yield evento_sse("fuentes", {"fuentes": cacheada["fuentes"]})
+        yield evento_sse("fin", {
+            "respuesta": cacheada["respuesta"],
+            "usa_llm": cacheada["usa_llm"],
+            "tokens_prompt": cacheada.get("tokens_prompt")
+        })
+        return
+    
+    # 1. Fuentes y respuesta instantánea sin LLM
+    with medir("busqueda"):
+        ids_relevantes = corpus.buscar_ids(pregunta)
+    entradas_relevantes = [corpus.entradas[i] for i in ids_relevantes]
+    with medir("respuesta_simple"):
+        respuesta_simple = generar_respuesta_simple(pregunta, entradas_relevantes)
+    
+    yield evento_sse("fuentes", {"fuentes": entradas_relevantes})
+    yield evento_sse("respuesta_simple", {"respuesta": respuesta_simple})
+    
+    # 2. Tokens del LLM a medida que llegan
+    respuesta_llm = None
+    tokens_prompt = None
+    if USE_LLM and entradas_relevantes:
+        with medir("prompt"):
+            prompt = obtener_constructor_prompt().construir(pregunta, entradas_relevantes)
+        tokens_prompt = prompt.tokens
+        TOKENS_PROMPT.observar(tokens_prompt)
+        cache_semantica = obtener_cache_semantica()
+        respuesta_llm = cache_semantica.buscar(pregunta, ids_relevantes, version)
+        CONSULTAS_CACHE.inc(cache="semantica", resultado="acierto" if respuesta_llm is not None else "fallo")
+        if respuesta_llm is not None:
+            yield evento_sse("token", {"texto": respuesta_llm})
+        elif await reservar_llm():
+            partes: List[str] = []
+            inicio = time.monotonic()
+            with medir("llm"):
+                try:
+                    async for token in cliente_llm.generar_stream(prompt.texto, HUGGINGFACE_API_KEY):
+                        partes.append(token)
+                        yield evento_sse("token", {"texto": token})
+                    respuesta_llm = "".join(partes).strip() or None
+                except Exception as e:
+                    print(f"❌ Error en streaming del LLM: {e}")
+                    yield evento_sse("error", {"detalle": "El modelo no respondió; se usa la respuesta del reglamento"})
+                finally:
+                    LLAMADAS_LLM.inc(resultado="exito" if respuesta_llm is not None else "fallo")
+                    limitador_llm.liberar(respuesta_llm is not None, time.monotonic() - inicio)
+                    if respuesta_llm:
+                        circuito_llm.registrar_exito()
+                    else:
+                        circuito_llm.registrar_fallo()
+            if respuesta_llm:
+                cache_semantica.guardar(pregunta, ids_relevantes, version, respuesta_llm)
+    
+    # 3. Respuesta final (la del LLM o, si falló, la simple)
+    usa_llm = respuesta_llm is not None
+    respuesta_final = respuesta_llm if usa_llm else respuesta_simple
+    tokens_prompt = tokens_prompt if usa_llm else None
+    if usa_llm or not USE_LLM:
+        cache.guardar(pregunta, version, {
+            "respuesta": respuesta_final,
+            "fuentes": entradas_relevantes,
+            "usa_llm": usa_llm,
+            "tokens_prompt": tokens_prompt
+        })
+    yield evento_sse("fin", {"respuesta": respuesta_final, "usa_llm": usa_llm, "tokens_prompt": tokens_prompt})
+
+
+@app.post("/query/stream")
+async def consultar_reglamento_stream(request: QueryRequest):
+    """
+    Variante de /query con streaming (Server-Sent Events)
+    Envía primero las fuentes y la respuesta simple, luego los tokens del LLM
+    """
+    if not request.pregunta or len(request.pregunta.strip()) < 3:
+        raise HTTPException(
+            status_code=400,
+            detail="La pregunta debe tener al menos 3 caracteres"
+        )
+    
+    return StreamingResponse(
+        eventos_consulta(request.pregunta),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @app.get("/")
@@ -231,13 +533,16 @@ async def root():
     return {
         "mensaje": "🚗 API Chatbot Reglamento de Tránsito Hermosillo",
         "version": "2.0",
-        "entradas_cargadas": len(reglamento_data),
+        "entradas_cargadas": len(obtener_corpus()),
         "llm_habilitado": USE_LLM,
-        "modelo_llm": LLM_MODEL if USE_LLM else None,
+        "modelo_llm": (LLM_LOCAL_MODELO if LLM_BACKEND == "local" else LLM_MODEL) if USE_LLM else None,
         "endpoints": {
             "POST /query": "Consultar el reglamento (soporta LLM si está configurado)",
+            "POST /query/stream": "Consulta con streaming de la respuesta (Server-Sent Events)",
+            "POST /query/batch": "Varias preguntas en una sola petición",
             "GET /": "Este mensaje",
-            "GET /health": "Estado del servicio"
+            "GET /health": "Estado del servicio",
+            "GET /metrics": "Métricas en formato Prometheus"
         }
     }
 
@@ -245,13 +550,29 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Endpoint de salud"""
+    corpus = obtener_corpus()
+    total_entradas = len(corpus)
     return {
         "status": "healthy",
-        "reglamento_cargado": len(reglamento_data) > 0,
-        "total_entradas": len(reglamento_data)
+        "reglamento_cargado": total_entradas > 0,
+        "total_entradas": total_entradas,
+        "version_reglamento": corpus.version,
+        "recarga_reglamento": obtener_recargador().estadisticas(),
+        "cache": obtener_cache().estadisticas(),
+        "cache_semantica": obtener_cache_semantica().estadisticas(),
+        "prompts_llm": obtener_constructor_prompt().estadisticas(),
+        "coalescencia_llm": coalescedor_llm.estadisticas(),
+        "limitador_llm": limitador_llm.estadisticas(),
+        "circuito_llm": circuito_llm.estadisticas()
     }
 
 
+@app.get("/metrics")
+async def metricas():
+    """Métricas del proceso en formato de texto de Prometheus"""
+    return Response(content=exponer_metricas(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
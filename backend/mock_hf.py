@@ -0,0 +1,123 @@
+"""
+Servidor local que imita la API de inferencia de Hugging Face
+Responde con texto determinista y, si el payload trae "stream": true,
+emite los tokens como Server-Sent Events (formato text-generation-inference).
+Puede inyectar latencia por petición y una fracción de fallos (503) para
+pruebas de carga y de resiliencia.
+
+Uso:
+    python mock_hf.py --puerto 8090 --retardo-token 0.05 --latencia 0.2 --fallos 0.05
+    HF_API_URL=http://localhost:8090/models/mock HUGGINGFACE_API_KEY=mock uvicorn main:app
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Tuple
+
+
+def generar_texto(prompt: str) -> str:
+    """Respuesta determinista a partir de la pregunta del prompt"""
+    pregunta = ""
+    for linea in prompt.splitlines():
+        if linea.startswith("Pregunta del usuario:"):
+            pregunta = linea.split(":", 1)[1].strip()
+            break
+    return f"**Respuesta simulada**\n\nSobre \"{pregunta}\", el reglamento indica lo siguiente (_respuesta de prueba_)."
+
+
+def tokens(texto: str) -> List[str]:
+    """Divide el texto en tokens conservando los espacios"""
+    partes = texto.split(" ")
+    return [p if i == 0 else " " + p for i, p in enumerate(partes)]
+
+
+class MockHFHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    retardo_token = 0.0
+    latencia = 0.0
+    fallos = 0.0
+    azar = random.Random(0)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        largo = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(largo).decode("utf-8") or "{}")
+        texto = generar_texto(payload.get("inputs", ""))
+
+        if self.latencia:
+            time.sleep(self.latencia)
+        if self.fallos and self.azar.random() < self.fallos:
+            cuerpo = json.dumps({"error": "Model is overloaded"}).encode("utf-8")
+            self.send_response(503)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+            return
+
+        if not payload.get("stream"):
+            cuerpo = json.dumps([{"generated_text": texto}], ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for i, token in enumerate(tokens(texto)):
+            if self.retardo_token:
+                time.sleep(self.retardo_token)
+            evento = {"token": {"id": i, "text": token, "special": False}, "generated_text": None}
+            self.wfile.write(f"data: {json.dumps(evento, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        final = {"token": {"id": -1, "text": "</s>", "special": True}, "generated_text": texto}
+        self.wfile.write(f"data: {json.dumps(final, ensure_ascii=False)}\n\n".encode("utf-8"))
+        self.close_connection = True
+
+
+def iniciar_servidor(
+    puerto: int = 0,
+    retardo_token: float = 0.0,
+    latencia: float = 0.0,
+    fallos: float = 0.0,
+    semilla: int = 0,
+) -> Tuple[ThreadingHTTPServer, str]:
+    """Arranca el servidor en un hilo; devuelve el servidor y la URL del modelo"""
+    handler = type("MockHF", (MockHFHandler,), {
+        "retardo_token": retardo_token,
+        "latencia": latencia,
+        "fallos": fallos,
+        "azar": random.Random(semilla),
+    })
+    # Cola de escucha amplia para pruebas de carga (la de 5 por defecto rechaza conexiones)
+    clase = type("ServidorMockHF", (ThreadingHTTPServer,), {"request_queue_size": 256})
+    servidor = clase(("127.0.0.1", puerto), handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}/models/mock"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock de la API de inferencia de Hugging Face")
+    parser.add_argument("--puerto", type=int, default=8090)
+    parser.add_argument("--retardo-token", type=float, default=0.05)
+    parser.add_argument("--latencia", type=float, default=0.0, help="segundos antes de responder")
+    parser.add_argument("--fallos", type=float, default=0.0, help="fracción de peticiones que fallan con 503")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    servidor, url = iniciar_servidor(args.puerto, args.retardo_token, args.latencia, args.fallos, args.semilla)
+    print(f"🧪 Mock HF escuchando en {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
@@ -0,0 +1,156 @@
+"""
+Núcleo de búsqueda del Reglamento de Tránsito de Hermosillo
+Compartido por el backend FastAPI (backend/main.py) y las funciones serverless (api/)
+"""
+
+from .texto import NEGACIONES, negaciones, normalizar, raiz, tokenizar, STOPWORDS
+from .correccion import CorrectorOrtografico, distancia_edicion
+from .indice import IndiceInvertido
+from .ranking import RankerBM25F
+from .cargador import (
+    Corpus,
+    REGLAMENTO_PATH,
+    RecargadorCorpus,
+    cargar_corpus,
+    corpus_cargado,
+    obtener_corpus,
+    obtener_recargador,
+)
+from .snapshot import SNAPSHOT_PATH, Snapshot, SnapshotInvalido, abrir_snapshot, compilar_snapshot
+from .cache import (
+    BackendMemoria,
+    BackendRedis,
+    BackendSQLite,
+    CacheRespuestas,
+    normalizar_pregunta,
+    obtener_cache,
+)
+from .embeddings import CodificadorNgramas
+from .densa import BUSQUEDA_DENSA, DENSA_MODELO, IndiceDenso, fusionar_rrf, obtener_codificador
+from .cache_semantica import CacheSemantica, obtener_cache_semantica
+from .coalescencia import SingleFlight
+from .resiliencia import LLM_ESPERA_CUPO, CircuitBreaker, LimitadorAdaptativo
+from .lote import ERROR_PREGUNTA_CORTA, LLM_CONCURRENCIA_LOTE, MAX_LOTE, deduplicar, validar_pregunta
+from .inferencia_local import LLM_LOCAL_MODELO, BatcherDinamico, ClienteLocal, ModeloStub, ModeloTransformers
+from .prompts import (
+    PROMPT_PRESUPUESTO_TOKENS,
+    ConstructorPrompt,
+    PromptConstruido,
+    TokenizadorLocal,
+    obtener_constructor_prompt,
+)
+from .metricas import (
+    CONSULTAS_CACHE,
+    LLAMADAS_LLM,
+    TOKENS_PROMPT,
+    RegistroMetricas,
+    Traza,
+    anotar,
+    exponer_metricas,
+    iniciar_traza,
+    medir,
+)
+from .serializacion import a_json, desde_json, serializar_respuesta
+from .compresion import calcular_etag, comprimir, elegir_codificacion, preparar_respuesta
+from .respuestas import SIN_RESULTADOS, construir_prompt, generar_respuesta_simple
+from .llm import (
+    HF_API_URL,
+    LLM_MODEL,
+    ClienteHFAsync,
+    ClienteHFSync,
+    api_key,
+    construir_headers,
+    construir_payload,
+    construir_payload_stream,
+    extraer_texto,
+    extraer_token,
+    obtener_cliente_sync,
+)
+
+__all__ = [
+    "normalizar",
+    "raiz",
+    "tokenizar",
+    "negaciones",
+    "NEGACIONES",
+    "STOPWORDS",
+    "CorrectorOrtografico",
+    "distancia_edicion",
+    "IndiceInvertido",
+    "RankerBM25F",
+    "Corpus",
+    "REGLAMENTO_PATH",
+    "RecargadorCorpus",
+    "cargar_corpus",
+    "corpus_cargado",
+    "obtener_corpus",
+    "obtener_recargador",
+    "SNAPSHOT_PATH",
+    "Snapshot",
+    "SnapshotInvalido",
+    "abrir_snapshot",
+    "compilar_snapshot",
+    "BackendMemoria",
+    "BackendRedis",
+    "BackendSQLite",
+    "CacheRespuestas",
+    "normalizar_pregunta",
+    "obtener_cache",
+    "CodificadorNgramas",
+    "BUSQUEDA_DENSA",
+    "DENSA_MODELO",
+    "IndiceDenso",
+    "fusionar_rrf",
+    "obtener_codificador",
+    "CacheSemantica",
+    "obtener_cache_semantica",
+    "SingleFlight",
+    "LLM_ESPERA_CUPO",
+    "CircuitBreaker",
+    "LimitadorAdaptativo",
+    "ERROR_PREGUNTA_CORTA",
+    "LLM_CONCURRENCIA_LOTE",
+    "MAX_LOTE",
+    "deduplicar",
+    "validar_pregunta",
+    "LLM_LOCAL_MODELO",
+    "BatcherDinamico",
+    "ClienteLocal",
+    "ModeloStub",
+    "ModeloTransformers",
+    "PROMPT_PRESUPUESTO_TOKENS",
+    "ConstructorPrompt",
+    "PromptConstruido",
+    "TokenizadorLocal",
+    "obtener_constructor_prompt",
+    "CONSULTAS_CACHE",
+    "LLAMADAS_LLM",
+    "TOKENS_PROMPT",
+    "RegistroMetricas",
+    "Traza",
+    "anotar",
+    "exponer_metricas",
+    "iniciar_traza",
+    "medir",
+    "a_json",
+    "desde_json",
+    "serializar_respuesta",
+    "calcular_etag",
+    "comprimir",
+    "elegir_codificacion",
+    "preparar_respuesta",
+    "SIN_RESULTADOS",
+    "construir_prompt",
+    "generar_respuesta_simple",
+    "HF_API_URL",
+    "LLM_MODEL",
+    "ClienteHFAsync",
+    "ClienteHFSync",
+    "api_key",
+    "construir_headers",
+    "construir_payload",
+    "construir_payload_stream",
+    "extraer_texto",
+    "extraer_token",
+    "obtener_cliente_sync",
+]
@@ -0,0 +1,10 @@
+"""
+Compila el snapshot binario del reglamento:
+    cd backend && python -m reglamento_core [reglamento.json] [reglamento.snapshot]
+"""
+
+import sys
+
+from .snapshot import main
+
+sys.exit(main(sys.argv))
@@ -0,0 +1,253 @@
+"""
+Caché de respuestas del chatbot por pregunta normalizada
+
+La clave se forma con los términos de la pregunta (sin acentos, mayúsculas
+ni palabras vacías, pero con las negaciones) y la versión (hash) del
+reglamento, así que un cambio en reglamento.json deja de usar las respuestas
+guardadas; las de la versión anterior expiran por TTL o LRU.
+
+Backends:
+- memoria: OrderedDict en el proceso (LRU + TTL + límite en bytes)
+- sqlite:  archivo local compartido entre workers del mismo servidor
+- redis:   cualquier servidor compatible con Redis (requiere el paquete redis)
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .serializacion import a_json, desde_json
+from .texto import negaciones, tokenizar
+
+CACHE_TTL = int(os.getenv("CACHE_TTL", "86400"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+
+def normalizar_pregunta(pregunta: str) -> str:
+    """Forma canónica de la pregunta: términos únicos y ordenados, negaciones incluidas"""
+    return " ".join(sorted(set(tokenizar(pregunta)) | set(negaciones(pregunta))))
+
+
+class BackendMemoria:
+    """LRU en memoria con expiración por entrada y límite total en bytes"""
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.expulsiones = 0
+        self._datos: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._datos.get(clave)
+            if item is None:
+                return None
+            expira, valor = item
+            if expira < time.time():
+                self._quitar(clave)
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def guardar(self, clave: str, valor: bytes, ttl: int) -> None:
+        if len(valor) > self.max_bytes:
+            return
+        with self._lock:
+            if clave in self._datos:
+                self._quitar(clave)
+            self._datos[clave] = (time.time() + ttl, valor)
+            self.bytes += len(valor)
+            while self.bytes > self.max_bytes:
+                self._quitar(next(iter(self._datos)))
+                self.expulsiones += 1
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._datos.clear()
+            self.bytes = 0
+
+    def _quitar(self, clave: str) -> None:
+        _, valor = self._datos.pop(clave)
+        self.bytes -= len(valor)
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+
+class BackendSQLite:
+    """Caché en un archivo SQLite; la expulsión LRU se hace por último acceso"""
+
+    def __init__(self, ruta: str, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.expulsiones = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS respuestas ("
+            " clave TEXT PRIMARY KEY, valor BLOB NOT NULL,"
+            " expira REAL NOT NULL, acceso REAL NOT NULL, tam INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS respuestas_acceso ON respuestas (acceso)")
+
+    def obtener(self, clave: str) -> Optional[bytes]:
+        ahora = time.time()
+        with self._lock:
+            fila = self._conn.execute(
+                "SELECT valor, expira FROM respuestas WHERE clave = ?", (clave,)
+            ).fetchone()
+            if fila is None:
+                return None
+            if fila[1] < ahora:
+                self._conn.execute("DELETE FROM respuestas WHERE clave = ?", (clave,))
+                return None
+            self._conn.execute("UPDATE respuestas SET acceso = ? WHERE clave = ?", (ahora, clave))
+            return fila[0]
+
+    def guardar(self, clave: str, valor: bytes, ttl: int) -> None:
+        if len(valor) > self.max_bytes:
+            return
+        ahora = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO respuestas (clave, valor, expira, acceso, tam) VALUES (?, ?, ?, ?, ?)",
+                (clave, valor, ahora + ttl, ahora, len(valor)),
+            )
+            self._conn.execute("DELETE FROM respuestas WHERE expira < ?", (ahora,))
+            total = self._conn.execute("SELECT COALESCE(SUM(tam), 0) FROM respuestas").fetchone()[0]
+            while total > self.max_bytes:
+                clave_vieja, tam = self._conn.execute(
+                    "SELECT clave, tam FROM respuestas ORDER BY acceso LIMIT 1"
+                ).fetchone()
+                self._conn.execute("DELETE FROM respuestas WHERE clave = ?", (clave_vieja,))
+                total -= tam
+                self.expulsiones += 1
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM respuestas")
+
+    @property
+    def bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(tam), 0) FROM respuestas").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM respuestas").fetchone()[0]
+
+
+class BackendRedis:
+    """
+    Caché en un servidor compatible con Redis
+    El límite en bytes y la política LRU se delegan al servidor
+    (maxmemory / maxmemory-policy allkeys-lru); el TTL se fija con SET EX.
+    """
+
+    PREFIJO = "hmo:reglamento:"
+
+    def __init__(self, cliente: Any = None, url: str = ""):
+        if cliente is None:
+            import redis
+            cliente = redis.Redis.from_url(url or os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        self._cliente = cliente
+        self.expulsiones = 0
+
+    def obtener(self, clave: str) -> Optional[bytes]:
+        return self._cliente.get(self.PREFIJO + clave)
+
+    def guardar(self, clave: str, valor: bytes, ttl: int) -> None:
+        self._cliente.set(self.PREFIJO + clave, valor, ex=ttl)
+
+    def limpiar(self) -> None:
+        for clave in self._cliente.scan_iter(match=self.PREFIJO + "*"):
+            self._cliente.delete(clave)
+
+    @property
+    def bytes(self) -> int:
+        return 0
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._cliente.scan_iter(match=self.PREFIJO + "*"))
+
+
+class CacheRespuestas:
+    """Caché de respuestas por (versión del reglamento, pregunta normalizada)"""
+
+    def __init__(self, backend=None, ttl: int = CACHE_TTL):
+        self.backend = backend if backend is not None else BackendMemoria()
+        self.ttl = ttl
+        self.aciertos = 0
+        self.fallos = 0
+
+    def _clave(self, pregunta: str, version: str) -> Optional[str]:
+        # La versión va en la clave: con un backend compartido, workers con
+        # versiones distintas (recarga o deploy gradual) no se pisan entre sí
+        normalizada = normalizar_pregunta(pregunta)
+        return f"{version}:{normalizada}" if normalizada else None
+
+    def obtener_json(self, pregunta: str, version: str) -> Optional[bytes]:
+        """Respuesta guardada tal cual (JSON compacto, lista para enviarse)"""
+        clave = self._clave(pregunta, version)
+        valor = self.backend.obtener(clave) if clave else None
+        if valor is None:
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        return valor
+
+    def obtener(self, pregunta: str, version: str) -> Optional[Dict]:
+        valor = self.obtener_json(pregunta, version)
+        return desde_json(valor) if valor is not None else None
+
+    def guardar_json(self, pregunta: str, version: str, valor: bytes) -> None:
+        clave = self._clave(pregunta, version)
+        if clave:
+            self.backend.guardar(clave, valor, self.ttl)
+
+    def guardar(self, pregunta: str, version: str, respuesta: Dict) -> None:
+        self.guardar_json(pregunta, version, a_json(respuesta))
+
+    def estadisticas(self) -> Dict[str, Any]:
+        total = self.aciertos + self.fallos
+        return {
+            "backend": type(self.backend).__name__,
+            "entradas": len(self.backend),
+            "bytes": self.backend.bytes,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "expulsiones": self.backend.expulsiones,
+            "tasa_aciertos": round(self.aciertos / total, 4) if total else 0.0,
+        }
+
+
+def crear_backend(tipo: str = ""):
+    """Backend configurado con CACHE_BACKEND (memoria, sqlite o redis)"""
+    tipo = (tipo or os.getenv("CACHE_BACKEND", "memoria")).lower()
+    if tipo == "sqlite":
+        return BackendSQLite(os.getenv(
+            "CACHE_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "reglamento_cache.sqlite3")
+        ))
+    if tipo == "redis":
+        return BackendRedis()
+    return BackendMemoria()
+
+
+_cache: Optional[CacheRespuestas] = None
+_lock = threading.Lock()
+
+
+def obtener_cache() -> CacheRespuestas:
+    """Caché de respuestas del proceso (lazy)"""
+    global _cache
+
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = CacheRespuestas(crear_backend())
+    return _cache
@@ -0,0 +1,123 @@
+"""
+Caché semántica de respuestas del LLM
+
+Una respuesta guardada se reutiliza si la nueva pregunta recuperó exactamente
+las mismas entradas del reglamento, tiene las mismas negaciones y su vector es
+suficientemente parecido
+(similitud coseno ≥ umbral) al de una pregunta ya respondida. Así las
+paráfrasis no pagan otra inferencia y las fuentes citadas no cambian.
+La versión del corpus es parte del grupo: durante una recarga las peticiones
+de la versión vieja y la nueva conviven, y los grupos viejos salen por LRU.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+ClaveGrupo = Tuple[str, FrozenSet[int], Tuple[str, ...]]
+
+import numpy as np
+
+from .embeddings import CodificadorNgramas
+from .texto import negaciones
+
+SEMANTICA_UMBRAL = float(os.getenv("SEMANTIC_CACHE_UMBRAL", "0.75"))
+SEMANTICA_MAX_ENTRADAS = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRADAS", "5000"))
+
+
+class _Grupo:
+    """Preguntas respondidas con un mismo conjunto de entradas recuperadas"""
+
+    def __init__(self, dimension: int):
+        self.vectores = np.zeros((0, dimension), dtype=np.float32)
+        self.respuestas: List[str] = []
+
+
+class CacheSemantica:
+    """Caché (entradas recuperadas, vector de la pregunta) → respuesta del LLM"""
+
+    def __init__(
+        self,
+        codificador: Optional[CodificadorNgramas] = None,
+        umbral: float = SEMANTICA_UMBRAL,
+        max_entradas: int = SEMANTICA_MAX_ENTRADAS,
+    ):
+        self.codificador = codificador or CodificadorNgramas()
+        self.umbral = umbral
+        self.max_entradas = max_entradas
+        self.total = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self._grupos: "OrderedDict[ClaveGrupo, _Grupo]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _clave(pregunta: str, ids: Iterable[int], version: str) -> ClaveGrupo:
+        # "¿no puedo...?" y "¿puedo...?" tienen vectores casi iguales: van en grupos distintos
+        return version, frozenset(ids), tuple(negaciones(pregunta))
+
+    def buscar(self, pregunta: str, ids: Iterable[int], version: str) -> Optional[str]:
+        """Respuesta guardada para una pregunta equivalente, o None"""
+        clave = self._clave(pregunta, ids, version)
+        vector = self.codificador.codificar(pregunta)
+
+        with self._lock:
+            grupo = self._grupos.get(clave)
+            if grupo is None or not grupo.respuestas:
+                self.fallos += 1
+                return None
+
+            similitudes = grupo.vectores @ vector
+            mejor = int(np.argmax(similitudes))
+            if similitudes[mejor] < self.umbral:
+                self.fallos += 1
+                return None
+
+            self._grupos.move_to_end(clave)
+            self.aciertos += 1
+            return grupo.respuestas[mejor]
+
+    def guardar(self, pregunta: str, ids: Iterable[int], version: str, respuesta: str) -> None:
+        clave = self._clave(pregunta, ids, version)
+        vector = self.codificador.codificar(pregunta)
+
+        with self._lock:
+            grupo = self._grupos.get(clave)
+            if grupo is None:
+                grupo = self._grupos[clave] = _Grupo(self.codificador.dimension)
+            grupo.vectores = np.vstack([grupo.vectores, vector[None, :]])
+            grupo.respuestas.append(respuesta)
+            self._grupos.move_to_end(clave)
+            self.total += 1
+
+            # Expulsión LRU por grupo de entradas
+            while self.total > self.max_entradas and len(self._grupos) > 1:
+                _, viejo = self._grupos.popitem(last=False)
+                self.total -= len(viejo.respuestas)
+
+    def estadisticas(self) -> Dict[str, Any]:
+        consultas = self.aciertos + self.fallos
+        return {
+            "entradas": self.total,
+            "grupos": len(self._grupos),
+            "umbral": self.umbral,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else 0.0,
+        }
+
+
+_cache: Optional[CacheSemantica] = None
+_lock = threading.Lock()
+
+
+def obtener_cache_semantica() -> CacheSemantica:
+    """Caché semántica del proceso (lazy)"""
+    global _cache
+
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = CacheSemantica()
+    return _cache
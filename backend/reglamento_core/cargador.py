@@ -0,0 +1,243 @@
+"""
+Carga del reglamento con caché por proceso
+El JSON se parsea y se indexa una sola vez; las siguientes llamadas
+(health, index, query) responden desde memoria. Si existe un snapshot
+binario vigente (mismo hash de contenido) se mapea en lugar de parsear.
+
+RecargadorCorpus vigila reglamento.json desde un hilo de fondo: al cambiar
+construye el corpus nuevo fuera del camino de las peticiones y lo reemplaza
+de una vez. Cada petición toma la referencia al corpus al empezar, así que
+nunca mezcla entradas de dos versiones.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .indice import IndiceInvertido
+from .serializacion import serializar_entradas
+from .snapshot import SNAPSHOT_PATH, SnapshotInvalido, abrir_snapshot
+
+REGLAMENTO_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "reglamento.json")
+
+# Segundos entre revisiones de reglamento.json para recargarlo en caliente (0 = desactivado)
+RECARGA_INTERVALO = float(os.getenv("REGLAMENTO_RECARGA_SEGUNDOS", "10"))
+
+
+class Corpus:
+    """Entradas del reglamento junto con su índice y hash de contenido"""
+
+    def __init__(
+        self,
+        entradas: Sequence[Dict],
+        version: str = "",
+        ruta: str = "",
+        indice: Optional[IndiceInvertido] = None,
+    ):
+        self.entradas = entradas
+        self.version = version
+        self.ruta = ruta
+        self.indice = indice if indice is not None else IndiceInvertido(entradas)
+        # JSON de cada entrada para armar las respuestas sin re-serializar las fuentes
+        self.entradas_json = serializar_entradas(entradas)
+
+    def __len__(self) -> int:
+        return len(self.entradas)
+
+    def buscar(self, pregunta: str, max_resultados: int = 3) -> List[Dict]:
+        """Entradas más relevantes a la pregunta"""
+        return self.indice.buscar(pregunta, max_resultados)
+
+    def buscar_ids(self, pregunta: str, max_resultados: int = 3) -> List[int]:
+        """Posiciones en el corpus de las entradas más relevantes"""
+        return self.indice.buscar_ids(pregunta, max_resultados)
+
+    def buscar_ids_lote(self, preguntas: List[str], max_resultados: int = 3) -> List[List[int]]:
+        """buscar_ids para varias preguntas a la vez"""
+        return self.indice.buscar_ids_lote(preguntas, max_resultados)
+
+    def fuentes_json(self, ids: List[int]) -> List[bytes]:
+        """JSON precalculado de las entradas indicadas"""
+        return [self.entradas_json[i] for i in ids]
+
+
+_corpus: Optional[Corpus] = None
+_lock = threading.Lock()
+
+
+def hash_contenido(datos: bytes) -> str:
+    """Hash SHA-256 del contenido del reglamento"""
+    return hashlib.sha256(datos).hexdigest()
+
+
+def cargar_corpus(ruta: str = REGLAMENTO_PATH, ruta_snapshot: Optional[str] = SNAPSHOT_PATH) -> Corpus:
+    """
+    Carga el reglamento; usa el snapshot si corresponde al hash del JSON
+    y si no, parsea e indexa el JSON
+    """
+    with open(ruta, "rb") as f:
+        datos = f.read()
+    return _construir_corpus(datos, ruta, ruta_snapshot)
+
+
+def _construir_corpus(datos: bytes, ruta: str, ruta_snapshot: Optional[str]) -> Corpus:
+    version = hash_contenido(datos)
+
+    if ruta_snapshot and os.path.exists(ruta_snapshot):
+        try:
+            snapshot = abrir_snapshot(version, ruta_snapshot)
+            indice = snapshot.indice()
+            return Corpus(indice.entradas, version=version, ruta=ruta_snapshot, indice=indice)
+        except SnapshotInvalido as e:
+            print(f"⚠️  {e}; se usará {ruta}")
+
+    entradas = json.loads(datos.decode("utf-8"))
+    return Corpus(entradas, version=version, ruta=ruta)
+
+
+def obtener_corpus() -> Corpus:
+    """
+    Corpus del proceso (lazy)
+    Si la carga falla se devuelve un corpus vacío y se reintenta en la siguiente llamada
+    """
+    global _corpus
+
+    if _corpus is not None:
+        return _corpus
+
+    with _lock:
+        if _corpus is None:
+            try:
+                _corpus = cargar_corpus()
+                print(f"✅ Reglamento cargado: {len(_corpus)} entradas")
+            except FileNotFoundError:
+                print(f"⚠️  No se encontró {REGLAMENTO_PATH}")
+                return Corpus([])
+            except Exception as e:
+                print(f"❌ Error al cargar reglamento: {e}")
+                return Corpus([])
+        return _corpus
+
+
+def corpus_cargado() -> bool:
+    """Indica si el corpus del proceso ya está en memoria"""
+    return _corpus is not None
+
+
+def preparar_corpus(corpus: Corpus) -> Corpus:
+    """Construye por adelantado lo que el índice crea de forma perezosa (corrector, vectores densos)"""
+    corpus.indice.corrector
+    corpus.indice.densa
+    return corpus
+
+
+class RecargadorCorpus:
+    """Recarga el corpus del proceso cuando cambia reglamento.json"""
+
+    def __init__(
+        self,
+        ruta: str = REGLAMENTO_PATH,
+        ruta_snapshot: Optional[str] = SNAPSHOT_PATH,
+        intervalo: float = RECARGA_INTERVALO,
+    ):
+        self.ruta = ruta
+        self.ruta_snapshot = ruta_snapshot
+        self.intervalo = intervalo
+        # (mtime, tamaño) del archivo en la última revisión; None = aún no revisado
+        self._firma_archivo: Optional[Tuple[int, int]] = None
+        self._hilo: Optional[threading.Thread] = None
+        self._detener = threading.Event()
+        self._lock_revision = threading.Lock()
+        self.recargas = 0
+        self.errores = 0
+        self.ultima_recarga: Optional[float] = None
+
+    def iniciar(self) -> None:
+        """Arranca el hilo de vigilancia (una sola vez por proceso)"""
+        if self.intervalo <= 0 or (self._hilo is not None and self._hilo.is_alive()):
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._vigilar, name="recarga-reglamento", daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout=5)
+            self._hilo = None
+
+    def _vigilar(self) -> None:
+        while not self._detener.wait(self.intervalo):
+            try:
+                self.revisar()
+            except Exception as e:
+                self.errores += 1
+                print(f"❌ Error al recargar reglamento: {e}")
+
+    def revisar(self) -> bool:
+        """Recarga si el archivo cambió de contenido; devuelve True si se reemplazó el corpus"""
+        with self._lock_revision:
+            try:
+                estado = os.stat(self.ruta)
+            except FileNotFoundError:
+                return False
+            firma = (estado.st_mtime_ns, estado.st_size)
+            if firma == self._firma_archivo:
+                return False
+
+            with open(self.ruta, "rb") as f:
+                datos = f.read()
+            actual = _corpus
+            if actual is not None and hash_contenido(datos) == actual.version:
+                self._firma_archivo = firma
+                return False
+
+            try:
+                nuevo = preparar_corpus(_construir_corpus(datos, self.ruta, self.ruta_snapshot))
+            except ValueError as e:
+                # JSON a medio escribir o inválido: se sigue con el corpus actual
+                self._firma_archivo = firma
+                self.errores += 1
+                print(f"⚠️  reglamento.json inválido, se mantiene la versión actual: {e}")
+                return False
+            self._firma_archivo = firma
+            if len(nuevo) == 0:
+                print("⚠️  reglamento.json sin entradas, se mantiene la versión actual")
+                return False
+
+            _reemplazar_corpus(nuevo)
+            self.recargas += 1
+            self.ultima_recarga = time.time()
+            print(f"🔄 Reglamento recargado: {len(nuevo)} entradas (versión {nuevo.version[:12]})")
+            return True
+
+    def estadisticas(self) -> Dict:
+        return {
+            "activa": self._hilo is not None and self._hilo.is_alive(),
+            "intervalo_segundos": self.intervalo,
+            "recargas": self.recargas,
+            "errores": self.errores,
+            "ultima_recarga": self.ultima_recarga,
+        }
+
+
+def _reemplazar_corpus(nuevo: Corpus) -> None:
+    global _corpus
+    with _lock:
+        _corpus = nuevo
+
+
+_recargador: Optional[RecargadorCorpus] = None
+
+
+def obtener_recargador() -> RecargadorCorpus:
+    """Recargador del proceso (lazy)"""
+    global _recargador
+    if _recargador is None:
+        with _lock:
+            if _recargador is None:
+                _recargador = RecargadorCorpus()
+    return _recargador
@@ -0,0 +1,64 @@
+"""
+Coalescencia de llamadas concurrentes (single-flight)
+Peticiones simultáneas con la misma clave esperan una sola tarea en vuelo
+en lugar de lanzar cada una su propia llamada al LLM. Si ya hay demasiadas
+esperando, las siguientes reciben `valor_desborde` de inmediato (None: la
+respuesta simple) en vez de repetir la llamada.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+MAX_ESPERANDO = 1000
+
+
+class _Vuelo:
+    def __init__(self, tarea: "asyncio.Task"):
+        self.tarea = tarea
+        self.esperando = 0
+
+
+class SingleFlight:
+    """Una tarea por clave; las llamadas concurrentes comparten su resultado"""
+
+    def __init__(self, max_esperando: int = MAX_ESPERANDO, valor_desborde: Any = None):
+        self.max_esperando = max_esperando
+        self.valor_desborde = valor_desborde
+        self.lideres = 0
+        self.coalescidas = 0
+        self.desbordadas = 0
+        self._vuelos: Dict[Hashable, _Vuelo] = {}
+
+    async def ejecutar(self, clave: Hashable, funcion: Callable[[], Awaitable[T]]) -> Optional[T]:
+        vuelo = self._vuelos.get(clave)
+
+        if vuelo is not None:
+            if vuelo.esperando >= self.max_esperando:
+                # Demasiados en espera: se responde sin llamar (otra llamada con la
+                # misma clave solo sumaría carga justo en el pico que se quiere absorber)
+                self.desbordadas += 1
+                return self.valor_desborde
+            vuelo.esperando += 1
+            self.coalescidas += 1
+            try:
+                return await asyncio.shield(vuelo.tarea)
+            finally:
+                vuelo.esperando -= 1
+
+        # La tarea es independiente de quien la lanzó: si esa petición se cancela
+        # (cliente desconectado) las demás siguen esperando el mismo resultado
+        tarea = asyncio.ensure_future(funcion())
+        self._vuelos[clave] = _Vuelo(tarea)
+        self.lideres += 1
+        tarea.add_done_callback(lambda _: self._vuelos.pop(clave, None))
+        return await asyncio.shield(tarea)
+
+    def estadisticas(self) -> Dict[str, Any]:
+        return {
+            "en_vuelo": len(self._vuelos),
+            "lideres": self.lideres,
+            "coalescidas": self.coalescidas,
+            "desbordadas": self.desbordadas,
+        }
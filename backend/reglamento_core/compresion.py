@@ -0,0 +1,132 @@
+"""
+Compresión negociada y validación con ETag para las respuestas HTTP
+
+- Accept-Encoding → br (si está instalado el paquete brotli) o gzip
+- ETag fuerte a partir del contenido sin comprimir; cada codificación lleva su
+  propio sufijo ("…-br", "…-gz") porque son representaciones distintas
+- If-None-Match en GET/HEAD → 304 sin cuerpo
+
+preparar_respuesta devuelve (status, cabeceras, cuerpo) para que cada handler
+las escriba junto a sus cabeceras propias (CORS, etc.).
+"""
+
+import gzip
+import hashlib
+from typing import Dict, List, Mapping, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Por debajo de este tamaño comprimir no compensa la cabecera extra
+MIN_BYTES_COMPRESION = 860
+
+SUFIJOS = {"br": "-br", "gzip": "-gz"}
+
+
+def codificaciones_aceptadas(accept_encoding: str) -> Dict[str, float]:
+    """Codificaciones de Accept-Encoding con su peso q"""
+    aceptadas = {}
+    for parte in (accept_encoding or "").split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        nombre = nombre.strip().lower()
+        if not nombre:
+            continue
+        q = 1.0
+        parametro = parametros.strip()
+        if parametro.startswith("q="):
+            try:
+                q = float(parametro[2:])
+            except ValueError:
+                q = 0.0
+        aceptadas[nombre] = q
+    return aceptadas
+
+
+def elegir_codificacion(accept_encoding: str) -> Optional[str]:
+    """br si el cliente lo acepta y hay brotli, si no gzip; None = sin comprimir"""
+    aceptadas = codificaciones_aceptadas(accept_encoding)
+    comodin = aceptadas.get("*", 0.0)
+    candidatas = ["br", "gzip"] if brotli is not None else ["gzip"]
+    pesos = [(aceptadas.get(c, comodin), -i, c) for i, c in enumerate(candidatas)]
+    q, _, codificacion = max(pesos)
+    return codificacion if q > 0 else None
+
+
+def comprimir(contenido: bytes, codificacion: str, nivel_alto: bool = False) -> bytes:
+    """Contenido comprimido; nivel_alto para variantes estáticas precalculadas"""
+    if codificacion == "br":
+        return brotli.compress(contenido, quality=11 if nivel_alto else 5)
+    if codificacion == "gzip":
+        return gzip.compress(contenido, compresslevel=9 if nivel_alto else 6, mtime=0)
+    raise ValueError(f"Codificación no soportada: {codificacion}")
+
+
+def calcular_etag(contenido: bytes) -> str:
+    """ETag fuerte del contenido sin comprimir"""
+    return '"' + hashlib.blake2b(contenido, digest_size=16).hexdigest() + '"'
+
+
+def etag_codificado(etag: str, codificacion: Optional[str]) -> str:
+    if not codificacion:
+        return etag
+    return etag[:-1] + SUFIJOS[codificacion] + '"'
+
+
+def coincide_etag(if_none_match: str, etag: str) -> bool:
+    """If-None-Match (comparación débil) contra el ETag de cualquier codificación"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    base = etag.strip('"')
+    for candidato in if_none_match.split(","):
+        valor = candidato.strip()
+        if valor.startswith("W/"):
+            valor = valor[2:]
+        valor = valor.strip('"')
+        for sufijo in SUFIJOS.values():
+            if valor.endswith(sufijo):
+                valor = valor[:-len(sufijo)]
+                break
+        if valor == base:
+            return True
+    return False
+
+
+def preparar_respuesta(
+    contenido: bytes,
+    cabeceras_peticion: Mapping[str, str],
+    metodo: str = "GET",
+    content_type: str = "application/json",
+    cache_control: str = "no-cache",
+    status: int = 200,
+    etag: Optional[str] = None,
+) -> Tuple[int, List[Tuple[str, str]], bytes]:
+    """
+    Status, cabeceras y cuerpo de la respuesta: comprime según Accept-Encoding
+    y, en GET/HEAD, responde 304 si el cliente ya tiene esa versión
+    """
+    validable = metodo in ("GET", "HEAD") and status == 200
+    cabeceras = [("Content-Type", content_type), ("Cache-Control", cache_control)]
+
+    if validable:
+        etag = etag or calcular_etag(contenido)
+
+    codificacion = None
+    if len(contenido) >= MIN_BYTES_COMPRESION:
+        cabeceras.append(("Vary", "Accept-Encoding"))
+        codificacion = elegir_codificacion(cabeceras_peticion.get("Accept-Encoding", ""))
+
+    if validable:
+        cabeceras.append(("ETag", etag_codificado(etag, codificacion)))
+        if coincide_etag(cabeceras_peticion.get("If-None-Match", ""), etag):
+            return 304, [c for c in cabeceras if c[0] != "Content-Type"], b""
+
+    if codificacion:
+        contenido = comprimir(contenido, codificacion)
+        cabeceras.append(("Content-Encoding", codificacion))
+
+    cabeceras.append(("Content-Length", str(len(contenido))))
+    return status, cabeceras, (b"" if metodo == "HEAD" else contenido)
@@ -0,0 +1,113 @@
+"""
+Corrección ortográfica de los términos de la consulta (estilo SymSpell)
+
+Al construir el corrector se precalculan, para cada término del vocabulario,
+todas sus variantes con hasta DISTANCIA_MAX letras borradas. Corregir un
+término de la consulta solo genera sus propios borrados y los busca en ese
+diccionario: el costo depende del largo del término, no del tamaño del
+vocabulario ("motociclta" → "motocicleta", "alcolimetro" → "alcoholimetro").
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Sequence
+
+# Términos más cortos no se corrigen (demasiados vecinos a distancia 1)
+MIN_LONGITUD_CORRECCION = 5
+
+# Distancia máxima de edición; los términos de menos de 8 letras admiten 1
+DISTANCIA_MAX = 2
+MIN_LONGITUD_DISTANCIA_2 = 8
+
+# Correcciones devueltas como máximo por término
+MAX_CORRECCIONES = 3
+
+
+def distancia_permitida(termino: str) -> int:
+    if len(termino) < MIN_LONGITUD_CORRECCION:
+        return 0
+    return DISTANCIA_MAX if len(termino) >= MIN_LONGITUD_DISTANCIA_2 else 1
+
+
+def borrados(termino: str, distancia: int) -> List[str]:
+    """Variantes del término con 1..distancia letras borradas"""
+    variantes = set()
+    nivel = {termino}
+    for _ in range(distancia):
+        nivel = {t[:i] + t[i + 1:] for t in nivel if len(t) > 1 for i in range(len(t))}
+        variantes |= nivel
+    return list(variantes)
+
+
+def distancia_edicion(a: str, b: str, maximo: int) -> int:
+    """
+    Distancia de Damerau-Levenshtein (transposiciones adyacentes) acotada:
+    si supera `maximo` devuelve maximo + 1 (se corta en cuanto se sabe)
+    """
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+    # Prefijo y sufijo comunes no cambian la distancia; casi siempre queda poco por comparar
+    inicio = 0
+    while inicio < len(a) and inicio < len(b) and a[inicio] == b[inicio]:
+        inicio += 1
+    fin = 0
+    while fin < len(a) - inicio and fin < len(b) - inicio and a[-1 - fin] == b[-1 - fin]:
+        fin += 1
+    a, b = a[inicio:len(a) - fin], b[inicio:len(b) - fin]
+    if not a or not b:
+        return min(len(a) + len(b), maximo + 1)
+    anterior2: List[int] = []
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        actual = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            costo = 0 if a[i - 1] == b[j - 1] else 1
+            actual[j] = min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + costo)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                actual[j] = min(actual[j], anterior2[j - 2] + 1)
+        if min(actual) > maximo:
+            return maximo + 1
+        anterior2, anterior = anterior, actual
+    return min(anterior[-1], maximo + 1)
+
+
+class CorrectorOrtografico:
+    """Diccionario de borrados sobre el vocabulario del índice"""
+
+    def __init__(self, terminos: Sequence[str], frecuencias: Sequence[int]):
+        self.terminos = list(terminos)
+        self.frecuencias = frecuencias
+        self._borrados: Dict[str, List[int]] = {}
+        for termino_id, termino in enumerate(terminos):
+            if len(termino) < MIN_LONGITUD_CORRECCION or not termino.isalpha():
+                continue
+            # El propio término también es clave (borrados de la consulta que coinciden con él)
+            for variante in [termino] + borrados(termino, distancia_permitida(termino)):
+                self._borrados.setdefault(variante, []).append(termino_id)
+        # Las consultas se repiten: cada término se corrige una sola vez
+        self.corregir = lru_cache(maxsize=4096)(self._corregir)
+
+    def __len__(self) -> int:
+        return len(self._borrados)
+
+    def _corregir(self, termino: str) -> List[int]:
+        """Ids de los términos más cercanos (misma distancia mínima, más frecuentes primero)"""
+        maximo = distancia_permitida(termino)
+        if maximo == 0 or not termino.isalpha():
+            return []
+
+        candidatos = set()
+        for variante in [termino] + borrados(termino, maximo):
+            candidatos.update(self._borrados.get(variante, ()))
+
+        mejores: List[int] = []
+        mejor = maximo + 1
+        for termino_id in candidatos:
+            d = distancia_edicion(termino, self.terminos[termino_id], maximo)
+            if d > maximo:
+                continue
+            if d < mejor:
+                mejor, mejores = d, [termino_id]
+            elif d == mejor:
+                mejores.append(termino_id)
+        mejores.sort(key=lambda i: -self.frecuencias[i])
+        return mejores[:MAX_CORRECCIONES]
@@ -0,0 +1,139 @@
+"""
+Recuperación densa y fusión con la búsqueda léxica
+
+Los vectores de todas las entradas forman una matriz float32 (n_entradas × d)
+precalculada al compilar el snapshot; una consulta codifica la pregunta y
+multiplica por la matriz. Con un corpus de decenas o cientos de entradas la
+búsqueda exacta cuesta microsegundos, así que no hace falta un índice ANN.
+
+Codificador:
+- DENSA_MODELO vacío (por defecto): n-gramas de caracteres con hashing
+  (sin dependencias; tolera variaciones como "manejando"/"manejar")
+- DENSA_MODELO=<modelo de sentence-transformers>: vectores semánticos
+  ("celular" ≈ "dispositivos móviles"); requiere el paquete también en
+  tiempo de consulta
+
+La búsqueda densa solo se activa por defecto con DENSA_MODELO: los n-gramas
+son una señal léxica más y, fusionados con BM25F, suben entradas que solo
+comparten fragmentos de palabras ("cinturon de seguridad" traía "Objetivo
+del Reglamento" en tercer lugar). BUSQUEDA_DENSA=1 los activa de todos modos.
+
+Los resultados densos se combinan con los de BM25F por reciprocal rank
+fusion (RRF): score = Σ 1 / (RRF_K + posición).
+"""
+
+import os
+import threading
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from .embeddings import CodificadorNgramas
+
+DENSA_MODELO = os.getenv("DENSA_MODELO", "")
+BUSQUEDA_DENSA = os.getenv("BUSQUEDA_DENSA", "1" if DENSA_MODELO else "0") == "1"
+
+# Similitud coseno mínima para que una entrada cuente como resultado denso
+DENSA_UMBRAL = float(os.getenv("DENSA_UMBRAL", "0.25"))
+
+RRF_K = 60
+
+# Candidatos de cada lista que entran a la fusión
+CANDIDATOS_FUSION = 10
+
+
+class CodificadorTransformers:
+    """Modelo de sentence-transformers en CPU (dependencia opcional)"""
+
+    def __init__(self, modelo: str = DENSA_MODELO):
+        from sentence_transformers import SentenceTransformer
+
+        self._modelo = SentenceTransformer(modelo, device="cpu")
+        self.nombre = modelo
+        self.dimension = self._modelo.get_sentence_embedding_dimension()
+
+    def codificar_lote(self, textos: List[str]) -> np.ndarray:
+        if not textos:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        vectores = self._modelo.encode(textos, normalize_embeddings=True, convert_to_numpy=True)
+        return vectores.astype(np.float32)
+
+    def codificar(self, texto: str) -> np.ndarray:
+        return self.codificar_lote([texto])[0]
+
+
+def crear_codificador(modelo: str = DENSA_MODELO):
+    """Codificador configurado; n-gramas si no hay modelo o no está instalado"""
+    if modelo:
+        try:
+            return CodificadorTransformers(modelo)
+        except ImportError:
+            print(f"⚠️  sentence-transformers no instalado; búsqueda densa con n-gramas en lugar de {modelo}")
+    return CodificadorNgramas()
+
+
+_codificador = None
+_lock = threading.Lock()
+
+
+def obtener_codificador():
+    """Codificador denso del proceso (lazy)"""
+    global _codificador
+    if _codificador is None:
+        with _lock:
+            if _codificador is None:
+                _codificador = crear_codificador()
+    return _codificador
+
+
+def texto_entrada(entrada: Dict, campos: Sequence[str]) -> str:
+    """Texto de una entrada que se codifica para la búsqueda densa"""
+    return ". ".join(str(entrada.get(c, "") or "") for c in campos if entrada.get(c))
+
+
+def fusionar_rrf(listas: Sequence[Sequence[int]], max_resultados: int, k: int = RRF_K) -> List[int]:
+    """
+    Reciprocal rank fusion de varias listas de ids ordenadas
+    (empates: el orden de la primera lista en que aparece cada id)
+    """
+    scores: Dict[int, float] = {}
+    for lista in listas:
+        for posicion, doc_id in enumerate(lista):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + posicion + 1)
+    return sorted(scores, key=lambda d: -scores[d])[:max_resultados]
+
+
+class IndiceDenso:
+    """Matriz de vectores de las entradas y búsqueda top-k por similitud coseno"""
+
+    def __init__(self, matriz: np.ndarray, codificador, umbral: float = DENSA_UMBRAL):
+        self.matriz = matriz
+        self.codificador = codificador
+        self.umbral = umbral
+
+    @classmethod
+    def desde_entradas(cls, entradas: Sequence[Dict], campos: Sequence[str], codificador) -> "IndiceDenso":
+        textos = [texto_entrada(e, campos) for e in entradas]
+        return cls(codificador.codificar_lote(textos).astype(np.float32), codificador)
+
+    def __len__(self) -> int:
+        return self.matriz.shape[0]
+
+    def _mejores(self, similitudes: np.ndarray, k: int) -> List[int]:
+        candidatos = np.flatnonzero(similitudes >= self.umbral)
+        if len(candidatos) > k:
+            candidatos = candidatos[np.argpartition(-similitudes[candidatos], k - 1)[:k]]
+        return candidatos[np.argsort(-similitudes[candidatos], kind="stable")].tolist()
+
+    def buscar(self, pregunta: str, k: int = CANDIDATOS_FUSION) -> List[int]:
+        """Ids de las k entradas más parecidas a la pregunta (sobre el umbral)"""
+        if len(self) == 0:
+            return []
+        return self._mejores(self.matriz @ self.codificador.codificar(pregunta), k)
+
+    def buscar_lote(self, preguntas: List[str], k: int = CANDIDATOS_FUSION) -> List[List[int]]:
+        """buscar para varias preguntas con un solo producto de matrices"""
+        if len(self) == 0 or not preguntas:
+            return [[] for _ in preguntas]
+        similitudes = self.codificador.codificar_lote(preguntas) @ self.matriz.T
+        return [self._mejores(fila, k) for fila in similitudes]
@@ -0,0 +1,58 @@
+"""
+Vectores de texto por n-gramas de caracteres con hashing
+No requieren modelo ni dependencias aparte de NumPy; son estables entre
+procesos (crc32) y tolerantes a variaciones de escritura.
+"""
+
+import zlib
+from functools import lru_cache
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from .texto import VERSION_TOKENIZADOR, tokenizar
+
+DIMENSION = 1024
+
+
+class CodificadorNgramas:
+    """Proyecta texto a un vector L2-normalizado de n-gramas de caracteres"""
+
+    def __init__(self, dimension: int = DIMENSION, tamanos: Sequence[int] = (3, 4)):
+        self.dimension = dimension
+        self.tamanos = tuple(tamanos)
+        # Identifica los vectores producidos (p. ej. los guardados en el snapshot)
+        self.nombre = f"ngramas-{dimension}-{'-'.join(map(str, self.tamanos))}-t{VERSION_TOKENIZADOR}"
+
+        # Posiciones y signos de los n-gramas de cada término: los términos se repiten mucho
+        self._posiciones = lru_cache(maxsize=16384)(self._posiciones_termino)
+
+    def _ngramas(self, token: str) -> Iterable[str]:
+        marcado = f"<{token}>"
+        yield marcado
+        for n in self.tamanos:
+            for i in range(len(marcado) - n + 1):
+                yield marcado[i:i + n]
+
+    def _posiciones_termino(self, token: str) -> Tuple[Tuple[int, ...], Tuple[float, ...]]:
+        hashes = [zlib.crc32(ngrama.encode("utf-8")) for ngrama in self._ngramas(token)]
+        return (
+            tuple(h % self.dimension for h in hashes),
+            tuple(1.0 if h & 0x80000000 else -1.0 for h in hashes),
+        )
+
+    def codificar(self, texto: str) -> np.ndarray:
+        posiciones: List[int] = []
+        signos: List[float] = []
+        for token in tokenizar(texto):
+            p, s = self._posiciones(token)
+            posiciones.extend(p)
+            signos.extend(s)
+        vector = np.bincount(posiciones, weights=signos, minlength=self.dimension).astype(np.float32)
+        norma = np.linalg.norm(vector)
+        return vector / norma if norma > 0 else vector
+
+    def codificar_lote(self, textos: List[str]) -> np.ndarray:
+        if not textos:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.stack([self.codificar(t) for t in textos])
@@ -0,0 +1,206 @@
+"""
+Índice invertido del reglamento
+Se construye una sola vez al cargar el JSON; cada consulta solo recorre
+las listas de postings de sus términos en lugar de todo el corpus.
+"""
+
+import hashlib
+import json
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .correccion import CorrectorOrtografico
+from .densa import BUSQUEDA_DENSA, CANDIDATOS_FUSION, IndiceDenso, fusionar_rrf, obtener_codificador
+from .metricas import observar_busqueda
+from .ranking import B_CAMPO, K1, PESOS_CAMPO, RankerBM25F
+from .texto import STOPWORDS, VERSION_TOKENIZADOR, tokenizar
+
+# Campos de cada entrada que se indexan
+CAMPOS_BUSQUEDA = tuple(PESOS_CAMPO)
+
+# Longitud mínima para expandir un término por prefijo ("moto" → "motocicleta")
+MIN_LONGITUD_PREFIJO = 4
+
+
+def firma_indice() -> str:
+    """
+    Firma de los parámetros que determinan el contenido del índice
+    (campos, tokenizador, palabras vacías y pesos BM25F)
+    """
+    parametros = {
+        "campos": CAMPOS_BUSQUEDA,
+        "tokenizador": VERSION_TOKENIZADOR,
+        "stopwords": sorted(STOPWORDS),
+        "pesos": PESOS_CAMPO,
+        "b": B_CAMPO,
+        "k1": K1,
+    }
+    return hashlib.sha256(json.dumps(parametros, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class Vocabulario:
+    """Vocabulario ordenado; el id de cada término es su posición"""
+
+    def __init__(self, terminos: List[str]):
+        self.terminos = terminos
+        self._ids = {t: i for i, t in enumerate(terminos)}
+
+    def __len__(self) -> int:
+        return len(self.terminos)
+
+    def __getitem__(self, i: int) -> str:
+        return self.terminos[i]
+
+    def id(self, termino: str) -> Optional[int]:
+        return self._ids.get(termino)
+
+    def con_prefijo(self, prefijo: str) -> List[int]:
+        """Ids de los términos que empiezan con el prefijo"""
+        ids = []
+        i = bisect_left(self.terminos, prefijo)
+        while i < len(self.terminos) and self.terminos[i].startswith(prefijo):
+            ids.append(i)
+            i += 1
+        return ids
+
+
+class IndiceInvertido:
+    """
+    Índice término → postings en formato CSC:
+    los documentos del término t son doc_ids[indptr[t]:indptr[t + 1]]
+    y tf[...] guarda la frecuencia del término en cada campo
+    """
+
+    def __init__(self, entradas: Sequence[Dict]):
+        self.entradas = entradas
+        n_campos = len(CAMPOS_BUSQUEDA)
+
+        postings: Dict[str, Dict[int, np.ndarray]] = {}
+        longitudes = np.zeros((len(entradas), n_campos), dtype=np.float32)
+
+        for doc_id, entrada in enumerate(entradas):
+            for c, campo in enumerate(CAMPOS_BUSQUEDA):
+                tokens = tokenizar(str(entrada.get(campo, "") or ""))
+                longitudes[doc_id, c] = len(tokens)
+                for termino, n in Counter(tokens).items():
+                    por_doc = postings.setdefault(termino, {})
+                    if doc_id not in por_doc:
+                        por_doc[doc_id] = np.zeros(n_campos, dtype=np.float32)
+                    por_doc[doc_id][c] = n
+
+        terminos = sorted(postings)
+
+        indptr = np.zeros(len(terminos) + 1, dtype=np.int32)
+        doc_ids: List[int] = []
+        tf: List[np.ndarray] = []
+        for i, termino in enumerate(terminos):
+            por_doc = postings[termino]
+            for doc_id in sorted(por_doc):
+                doc_ids.append(doc_id)
+                tf.append(por_doc[doc_id])
+            indptr[i + 1] = len(doc_ids)
+
+        self.vocabulario = Vocabulario(terminos)
+        self.indptr = indptr
+        self.doc_ids = np.array(doc_ids, dtype=np.int32)
+        self.tf = np.array(tf, dtype=np.float32).reshape(-1, n_campos)
+        self.longitudes = longitudes
+
+        self.ranker = RankerBM25F(CAMPOS_BUSQUEDA, self.indptr, self.doc_ids, self.tf, self.longitudes)
+
+    @classmethod
+    def desde_arrays(
+        cls,
+        entradas: Sequence[Dict],
+        vocabulario,
+        indptr: np.ndarray,
+        doc_ids: np.ndarray,
+        pesos: np.ndarray,
+        longitudes: np.ndarray,
+    ) -> "IndiceInvertido":
+        """Índice a partir de arrays ya construidos (p. ej. un snapshot mapeado en memoria)"""
+        indice = cls.__new__(cls)
+        indice.entradas = entradas
+        indice.vocabulario = vocabulario
+        indice.indptr = indptr
+        indice.doc_ids = doc_ids
+        indice.tf = None
+        indice.longitudes = longitudes
+        indice.ranker = RankerBM25F.desde_pesos(indptr, doc_ids, pesos, len(entradas))
+        return indice
+
+    def __len__(self) -> int:
+        return len(self.entradas)
+
+    def expandir(self, termino: str) -> List[int]:
+        """Ids del vocabulario que coinciden con el término de la consulta"""
+        if len(termino) < MIN_LONGITUD_PREFIJO:
+            termino_id = self.vocabulario.id(termino)
+            return [] if termino_id is None else [termino_id]
+        ids = self.vocabulario.con_prefijo(termino)
+        if ids:
+            return ids
+        # Sin coincidencias: probar con los términos a 1-2 ediciones ("motociclta")
+        return list(self.corrector.corregir(termino))
+
+    @property
+    def corrector(self) -> CorrectorOrtografico:
+        """Corrector sobre el vocabulario, construido con la primera consulta que lo necesita"""
+        corrector = self.__dict__.get("_corrector")
+        if corrector is None:
+            terminos = [self.vocabulario[i] for i in range(len(self.vocabulario))]
+            corrector = self._corrector = CorrectorOrtografico(terminos, np.diff(self.indptr).tolist())
+        return corrector
+
+    @property
+    def densa(self) -> Optional[IndiceDenso]:
+        """Índice denso de las entradas (del snapshot o calculado al primer uso); None si está desactivado"""
+        if not BUSQUEDA_DENSA:
+            return None
+        densa = self.__dict__.get("_densa")
+        if densa is None:
+            densa = self._densa = IndiceDenso.desde_entradas(self.entradas, CAMPOS_BUSQUEDA, obtener_codificador())
+        return densa
+
+    @densa.setter
+    def densa(self, valor: Optional[IndiceDenso]) -> None:
+        self._densa = valor
+
+    def terminos_consulta(self, pregunta: str) -> List[List[int]]:
+        """Ids de vocabulario agrupados por término de la pregunta"""
+        grupos = []
+        for termino in dict.fromkeys(tokenizar(pregunta)):
+            ids = self.expandir(termino)
+            if ids:
+                grupos.append(ids)
+        return grupos
+
+    def buscar_ids(self, pregunta: str, max_resultados: int = 3) -> List[int]:
+        """Ids de las entradas con mayor score BM25F, fusionado con la búsqueda densa si está activa"""
+        densa = self.densa
+        k = max(max_resultados, CANDIDATOS_FUSION) if densa is not None else max_resultados
+        ids, scores = self.ranker.top_k_con_scores(self.terminos_consulta(pregunta), k)
+        observar_busqueda(scores[:max_resultados])
+        if densa is None:
+            return ids
+        return fusionar_rrf([ids, densa.buscar(pregunta, k)], max_resultados)
+
+    def buscar_ids_lote(self, preguntas: List[str], max_resultados: int = 3) -> List[List[int]]:
+        """buscar_ids para un lote de preguntas, puntuado en una sola pasada"""
+        densa = self.densa
+        k = max(max_resultados, CANDIDATOS_FUSION) if densa is not None else max_resultados
+        consultas = [self.terminos_consulta(p) for p in preguntas]
+        resultados = self.ranker.top_k_lote_con_scores(consultas, k)
+        for _, scores in resultados:
+            observar_busqueda(scores[:max_resultados])
+        if densa is None:
+            return [ids for ids, _ in resultados]
+        densos = densa.buscar_lote(preguntas, k)
+        return [fusionar_rrf([ids, d], max_resultados) for (ids, _), d in zip(resultados, densos)]
+
+    def buscar(self, pregunta: str, max_resultados: int = 3) -> List[Dict]:
+        """Entradas más relevantes a la pregunta"""
+        return [self.entradas[i] for i in self.buscar_ids(pregunta, max_resultados)]
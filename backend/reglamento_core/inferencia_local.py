@@ -0,0 +1,213 @@
+"""
+Inferencia local del LLM (sin red) para despliegues on-prem
+
+- ModeloTransformers: modelo pequeño en CPU con transformers/torch, cuantizado
+  dinámicamente a int8 (requiere descomentar esas dependencias en requirements.txt)
+- ModeloStub: modelo determinista y sin dependencias para pruebas
+- BatcherDinamico: agrupa prompts concurrentes en una sola pasada del modelo y
+  la ejecuta en un pool de procesos para no bloquear el event loop
+- ClienteLocal: misma interfaz que ClienteHFAsync (generar / generar_stream)
+"""
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, List, Optional, Tuple
+
+LLM_LOCAL_MODELO = os.getenv("LLM_LOCAL_MODELO", "Qwen/Qwen2.5-0.5B-Instruct")
+LLM_LOCAL_WORKERS = int(os.getenv("LLM_LOCAL_WORKERS", "1"))
+LLM_LOCAL_MAX_LOTE = int(os.getenv("LLM_LOCAL_MAX_LOTE", "8"))
+LLM_LOCAL_VENTANA_MS = float(os.getenv("LLM_LOCAL_VENTANA_MS", "20"))
+MAX_NEW_TOKENS = 300
+
+
+class ModeloStub:
+    """Respuesta determinista a partir de la pregunta del prompt"""
+
+    def generar_lote(self, prompts: List[str], max_new_tokens: int = MAX_NEW_TOKENS) -> List[str]:
+        respuestas = []
+        for prompt in prompts:
+            pregunta = ""
+            for linea in prompt.splitlines():
+                if linea.startswith("Pregunta del usuario:"):
+                    pregunta = linea.split(":", 1)[1].strip()
+                    break
+            texto = f"**Respuesta local**\n\nSobre \"{pregunta}\", consulta las entradas del reglamento citadas."
+            respuestas.append(" ".join(texto.split(" ")[:max_new_tokens]))
+        return respuestas
+
+
+class ModeloTransformers:
+    """Modelo causal de Hugging Face ejecutado en CPU con cuantización dinámica int8"""
+
+    def __init__(self, nombre: str = LLM_LOCAL_MODELO, cuantizar: bool = True):
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        self._torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(nombre, padding_side="left")
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        modelo = AutoModelForCausalLM.from_pretrained(nombre, torch_dtype=torch.float32)
+        if cuantizar:
+            modelo = torch.quantization.quantize_dynamic(modelo, {torch.nn.Linear}, dtype=torch.qint8)
+        self.modelo = modelo.eval()
+
+    def generar_lote(self, prompts: List[str], max_new_tokens: int = MAX_NEW_TOKENS) -> List[str]:
+        entrada = self.tokenizer(prompts, return_tensors="pt", padding=True)
+        with self._torch.inference_mode():
+            salida = self.modelo.generate(
+                **entrada,
+                max_new_tokens=max_new_tokens,
+                do_sample=True,
+                temperature=0.7,
+                top_p=0.9,
+                pad_token_id=self.tokenizer.pad_token_id,
+            )
+        generados = salida[:, entrada["input_ids"].shape[1]:]
+        return [t.strip() for t in self.tokenizer.batch_decode(generados, skip_special_tokens=True)]
+
+
+def crear_modelo(tipo: str, nombre: str = LLM_LOCAL_MODELO):
+    if tipo == "stub":
+        return ModeloStub()
+    return ModeloTransformers(nombre)
+
+
+# Estado de cada proceso del pool: el modelo se carga una vez por worker
+_modelo_worker = None
+
+
+def _inicializar_worker(tipo: str, nombre: str) -> None:
+    global _modelo_worker
+    _modelo_worker = crear_modelo(tipo, nombre)
+
+
+def _generar_en_worker(prompts: List[str], max_new_tokens: int) -> List[str]:
+    return _modelo_worker.generar_lote(prompts, max_new_tokens)
+
+
+class BatcherDinamico:
+    """
+    Junta los prompts que llegan dentro de una ventana corta (o hasta
+    max_lote) y los envía juntos al pool; hay como máximo un lote en
+    ejecución por worker
+    """
+
+    def __init__(
+        self,
+        tipo: str = "transformers",
+        nombre: str = LLM_LOCAL_MODELO,
+        workers: int = LLM_LOCAL_WORKERS,
+        max_lote: int = LLM_LOCAL_MAX_LOTE,
+        ventana_ms: float = LLM_LOCAL_VENTANA_MS,
+        max_new_tokens: int = MAX_NEW_TOKENS,
+    ):
+        self.tipo = tipo
+        self.nombre = nombre
+        self.workers = workers
+        self.max_lote = max_lote
+        self.ventana = ventana_ms / 1000.0
+        self.max_new_tokens = max_new_tokens
+        self.lotes = 0
+        self.prompts = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._cola: Optional["asyncio.Queue[Tuple[str, asyncio.Future]]"] = None
+        self._despachador: Optional[asyncio.Task] = None
+        self._cupos: Optional[asyncio.Semaphore] = None
+        self._en_curso: set = set()
+
+    async def iniciar(self) -> None:
+        if self._despachador is not None:
+            return
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_inicializar_worker,
+            initargs=(self.tipo, self.nombre),
+        )
+        self._cola = asyncio.Queue()
+        self._cupos = asyncio.Semaphore(self.workers)
+        self._despachador = asyncio.ensure_future(self._despachar())
+
+    async def cerrar(self) -> None:
+        if self._despachador is not None:
+            self._despachador.cancel()
+            try:
+                await self._despachador
+            except asyncio.CancelledError:
+                pass
+            self._despachador = None
+        if self._en_curso:
+            await asyncio.gather(*self._en_curso, return_exceptions=True)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def generar(self, prompt: str) -> str:
+        await self.iniciar()
+        futuro = asyncio.get_running_loop().create_future()
+        await self._cola.put((prompt, futuro))
+        return await futuro
+
+    async def _despachar(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self._cola.get()]
+            limite = loop.time() + self.ventana
+            while len(lote) < self.max_lote:
+                restante = limite - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self._cola.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._cupos.acquire()
+            tarea = asyncio.ensure_future(self._ejecutar(lote))
+            self._en_curso.add(tarea)
+            tarea.add_done_callback(self._en_curso.discard)
+
+    async def _ejecutar(self, lote: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            prompts = [p for p, _ in lote]
+            self.lotes += 1
+            self.prompts += len(prompts)
+            loop = asyncio.get_running_loop()
+            try:
+                textos = await loop.run_in_executor(
+                    self._pool, _generar_en_worker, prompts, self.max_new_tokens
+                )
+            except Exception as e:
+                for _, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+                return
+            for (_, futuro), texto in zip(lote, textos):
+                if not futuro.done():
+                    futuro.set_result(texto)
+        finally:
+            self._cupos.release()
+
+
+class ClienteLocal:
+    """Cliente del LLM local con la interfaz de ClienteHFAsync"""
+
+    def __init__(self, batcher: Optional[BatcherDinamico] = None, tipo: str = "transformers"):
+        self.batcher = batcher or BatcherDinamico(tipo=tipo)
+
+    async def iniciar(self) -> None:
+        await self.batcher.iniciar()
+
+    async def cerrar(self) -> None:
+        await self.batcher.cerrar()
+
+    async def generar(self, prompt: str, key: str = "") -> Optional[str]:
+        texto = await self.batcher.generar(prompt)
+        return texto or None
+
+    async def generar_stream(self, prompt: str, key: str = "") -> AsyncIterator[str]:
+        """El modelo local genera por lotes: la respuesta llega como un solo fragmento"""
+        texto = await self.batcher.generar(prompt)
+        if texto:
+            yield texto
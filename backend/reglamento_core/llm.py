@@ -0,0 +1,237 @@
+"""
+Cliente de la API de inferencia de Hugging Face
+Las conexiones se reutilizan entre preguntas (keep-alive) para no pagar
+el handshake TCP + TLS en cada llamada:
+- ClienteHFAsync: sesión aiohttp de vida de la app (backend FastAPI)
+- ClienteHFSync: pool de conexiones http.client (funciones serverless)
+"""
+
+import asyncio
+import http.client
+import json
+import os
+import queue
+import threading
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+LLM_MODEL = os.getenv("LLM_MODEL", "AIDC-AI/Marco-LLM-ES")
+HF_API_URL = os.getenv("HF_API_URL", f"https://api-inference.huggingface.co/models/{LLM_MODEL}")
+
+# Límites del pool de conexiones
+HF_POOL_LIMITE = int(os.getenv("HF_POOL_LIMITE", "100"))
+HF_POOL_POR_HOST = int(os.getenv("HF_POOL_POR_HOST", "20"))
+HF_KEEPALIVE = float(os.getenv("HF_KEEPALIVE", "60"))
+
+
+def api_key() -> str:
+    """API key de Hugging Face (vacía si no está configurada)"""
+    return os.getenv("HUGGINGFACE_API_KEY", "")
+
+
+def construir_headers(key: str) -> Dict[str, str]:
+    return {
+        "Authorization": f"Bearer {key}",
+        "Content-Type": "application/json"
+    }
+
+
+def construir_payload(prompt: str) -> Dict[str, Any]:
+    return {
+        "inputs": prompt,
+        "parameters": {
+            "max_new_tokens": 300,
+            "temperature": 0.7,
+            "top_p": 0.9,
+            "return_full_text": False
+        }
+    }
+
+
+def construir_payload_stream(prompt: str) -> Dict[str, Any]:
+    """Payload con streaming de tokens (Server-Sent Events de text-generation-inference)"""
+    payload = construir_payload(prompt)
+    payload["stream"] = True
+    return payload
+
+
+def extraer_token(linea: bytes) -> Optional[str]:
+    """Texto del token de una línea SSE `data: {...}` de la API, o None"""
+    linea = linea.strip()
+    if not linea.startswith(b"data:"):
+        return None
+    datos = linea[5:].strip()
+    if not datos or datos == b"[DONE]":
+        return None
+    evento = json.loads(datos.decode("utf-8"))
+    token = evento.get("token") or {}
+    if token.get("special"):
+        return None
+    return token.get("text")
+
+
+def extraer_texto(resultado: Any) -> Optional[str]:
+    """Texto generado de la respuesta de la API, o None si el formato es inesperado"""
+    if isinstance(resultado, list) and len(resultado) > 0:
+        return resultado[0].get("generated_text", "").strip()
+    return None
+
+
+class ClienteHFAsync:
+    """Sesión aiohttp compartida con pool de conexiones y keep-alive"""
+
+    def __init__(
+        self,
+        url: str = HF_API_URL,
+        timeout: float = 30,
+        limite: int = HF_POOL_LIMITE,
+        limite_por_host: int = HF_POOL_POR_HOST,
+    ):
+        self.url = url
+        self.timeout = timeout
+        self.limite = limite
+        self.limite_por_host = limite_por_host
+        self._session = None
+        self._loop = None
+
+    async def iniciar(self) -> None:
+        import aiohttp
+
+        # En serverless cada invocación puede correr en otro event loop: la sesión no se comparte entre loops
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.limite,
+                limit_per_host=self.limite_por_host,
+                keepalive_timeout=HF_KEEPALIVE,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._loop = loop
+
+    async def cerrar(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+    async def generar(self, prompt: str, key: str) -> Optional[str]:
+        """Texto generado para el prompt, o None si la llamada falla"""
+        await self.iniciar()
+        async with self._session.post(
+            self.url,
+            headers=construir_headers(key),
+            json=construir_payload(prompt),
+        ) as response:
+            if response.status == 200:
+                result = await response.json()
+                texto_generado = extraer_texto(result)
+                if texto_generado is None:
+                    print(f"⚠️ Respuesta inesperada del LLM: {result}")
+                return texto_generado
+            error_text = await response.text()
+            print(f"❌ Error en API Hugging Face ({response.status}): {error_text}")
+            return None
+
+    async def generar_stream(self, prompt: str, key: str) -> AsyncIterator[str]:
+        """Tokens generados a medida que llegan; lanza RuntimeError si la API responde con error"""
+        await self.iniciar()
+        async with self._session.post(
+            self.url,
+            headers=construir_headers(key),
+            json=construir_payload_stream(prompt),
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise RuntimeError(f"Error en API Hugging Face ({response.status}): {error_text}")
+            async for linea in response.content:
+                token = extraer_token(linea)
+                if token:
+                    yield token
+
+
+class ClienteHFSync:
+    """
+    Pool de conexiones http.client reutilizables entre invocaciones
+    de una misma instancia serverless
+    """
+
+    def __init__(self, url: str = HF_API_URL, timeout: float = 10, max_conexiones: int = 4):
+        partes = urlsplit(url)
+        self.https = partes.scheme == "https"
+        self.host = partes.hostname or ""
+        self.puerto = partes.port
+        self.ruta = partes.path or "/"
+        if partes.query:
+            self.ruta += "?" + partes.query
+        self.timeout = timeout
+        self._pool: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=max_conexiones)
+
+    def _nueva_conexion(self) -> http.client.HTTPConnection:
+        clase = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return clase(self.host, self.puerto, timeout=self.timeout)
+
+    def _tomar(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """Conexión del pool (reutilizada=True) o una nueva"""
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            return self._nueva_conexion(), False
+
+    def _devolver(self, conexion: http.client.HTTPConnection) -> None:
+        try:
+            self._pool.put_nowait(conexion)
+        except queue.Full:
+            conexion.close()
+
+    def post_json(self, payload: Dict, headers: Dict[str, str]) -> Tuple[int, bytes]:
+        cuerpo = json.dumps(payload).encode("utf-8")
+        conexion, reutilizada = self._tomar()
+        try:
+            try:
+                conexion.request("POST", self.ruta, body=cuerpo, headers=headers)
+                response = conexion.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # El servidor cerró la conexión inactiva: reintentar con una nueva
+                if not reutilizada:
+                    raise
+                conexion.close()
+                conexion = self._nueva_conexion()
+                conexion.request("POST", self.ruta, body=cuerpo, headers=headers)
+                response = conexion.getresponse()
+            datos = response.read()
+        except Exception:
+            conexion.close()
+            raise
+
+        if response.will_close:
+            conexion.close()
+        else:
+            self._devolver(conexion)
+        return response.status, datos
+
+    def generar(self, prompt: str, key: str) -> Optional[str]:
+        """Texto generado para el prompt, o None si la respuesta no es válida"""
+        status, datos = self.post_json(construir_payload(prompt), construir_headers(key))
+        if status != 200:
+            print(f"❌ Error en API Hugging Face ({status}): {datos[:500].decode('utf-8', 'replace')}")
+            return None
+        return extraer_texto(json.loads(datos.decode("utf-8")))
+
+
+_cliente_sync: Optional[ClienteHFSync] = None
+_lock = threading.Lock()
+
+
+def obtener_cliente_sync() -> ClienteHFSync:
+    """Cliente síncrono del proceso (las conexiones sobreviven entre invocaciones)"""
+    global _cliente_sync
+
+    if _cliente_sync is None:
+        with _lock:
+            if _cliente_sync is None:
+                _cliente_sync = ClienteHFSync()
+    return _cliente_sync
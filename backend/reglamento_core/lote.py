@@ -0,0 +1,38 @@
+"""
+Utilidades para consultas por lote (POST /query/batch)
+"""
+
+import os
+from typing import List, Optional, Tuple
+
+from .cache import normalizar_pregunta
+from .texto import normalizar
+
+MAX_LOTE = int(os.getenv("MAX_LOTE", "50"))
+LLM_CONCURRENCIA_LOTE = int(os.getenv("LLM_CONCURRENCIA_LOTE", "8"))
+
+ERROR_PREGUNTA_CORTA = "La pregunta debe tener al menos 3 caracteres"
+
+
+def validar_pregunta(pregunta: Optional[str]) -> Optional[str]:
+    """Mensaje de error si la pregunta no es válida, o None"""
+    if not isinstance(pregunta, str) or len(pregunta.strip()) < 3:
+        return ERROR_PREGUNTA_CORTA
+    return None
+
+
+def deduplicar(preguntas: List[str]) -> Tuple[List[str], List[int]]:
+    """
+    Preguntas únicas por forma normalizada y, para cada pregunta
+    original, la posición de su representante en la lista de únicas
+    """
+    unicas: List[str] = []
+    posicion = {}
+    asignacion: List[int] = []
+    for pregunta in preguntas:
+        clave = normalizar_pregunta(pregunta) or normalizar(pregunta.strip())
+        if clave not in posicion:
+            posicion[clave] = len(unicas)
+            unicas.append(pregunta)
+        asignacion.append(posicion[clave])
+    return unicas, asignacion
@@ -0,0 +1,251 @@
+"""
+Métricas del camino caliente de las consultas
+
+- Registro mínimo de contadores e histogramas con etiquetas, expuesto en el
+  formato de texto de Prometheus (GET /metrics, /api/v2/metrics en Vercel)
+- Traza por petición: tiempos por etapa (validación, búsqueda, prompt, LLM,
+  respuesta simple, serialización) acumulados en un histograma y, al terminar,
+  una línea de log JSON con el desglose (METRICAS_LOG_JSON=0 la desactiva)
+
+Los valores son por proceso: cada worker de uvicorn expone los suyos y
+Prometheus los agrega. En Vercel cada función es un proceso aparte, así que
+/api/v2/metrics solo cuenta las consultas de la app ASGI (/api/v2/*); los
+handlers /api/query y /api/query/batch dejan únicamente la línea de log JSON.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+METRICAS_LOG_JSON = os.getenv("METRICAS_LOG_JSON", "1") == "1"
+
+BUCKETS_LATENCIA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _etiquetas(nombres: Sequence[str], valores: Tuple[str, ...], extra: str = "") -> str:
+    partes = [f'{n}="{v}"' for n, v in zip(nombres, valores)]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+def _numero(valor: float) -> str:
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+class Contador:
+    """Contador monótono con etiquetas"""
+
+    tipo = "counter"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, valor: float = 1, **etiquetas: str) -> None:
+        clave = tuple(str(etiquetas.get(n, "")) for n in self.etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def valor(self, **etiquetas: str) -> float:
+        clave = tuple(str(etiquetas.get(n, "")) for n in self.etiquetas)
+        with self._lock:
+            return self._valores.get(clave, 0)
+
+    def series(self) -> Dict[Tuple[str, ...], float]:
+        """Copia de los valores por combinación de etiquetas"""
+        with self._lock:
+            return dict(self._valores)
+
+    def exponer(self) -> List[str]:
+        with self._lock:
+            valores = sorted(self._valores.items())
+        return [f"{self.nombre}{_etiquetas(self.etiquetas, clave)} {_numero(v)}" for clave, v in valores]
+
+
+class Histograma:
+    """Histograma acumulativo con etiquetas (buckets fijos)"""
+
+    tipo = "histogram"
+
+    def __init__(
+        self,
+        nombre: str,
+        ayuda: str,
+        etiquetas: Sequence[str] = (),
+        buckets: Sequence[float] = BUCKETS_LATENCIA,
+    ):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(sorted(buckets))
+        # clave → [conteos por bucket..., suma, total]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, **etiquetas: str) -> None:
+        clave = tuple(str(etiquetas.get(n, "")) for n in self.etiquetas)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                serie = self._series[clave] = [0] * (len(self.buckets) + 2)
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[i] += 1
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def exponer(self) -> List[str]:
+        with self._lock:
+            series = sorted((clave, list(serie)) for clave, serie in self._series.items())
+        lineas = []
+        for clave, serie in series:
+            for limite, conteo in zip(self.buckets, serie):
+                le = 'le="%s"' % _numero(limite)
+                lineas.append(f"{self.nombre}_bucket{_etiquetas(self.etiquetas, clave, le)} {_numero(conteo)}")
+            le = 'le="+Inf"'
+            lineas.append(f"{self.nombre}_bucket{_etiquetas(self.etiquetas, clave, le)} {_numero(serie[-1])}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, clave)} {_numero(serie[-2])}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, clave)} {_numero(serie[-1])}")
+        return lineas
+
+
+class RegistroMetricas:
+    """Conjunto de métricas del proceso"""
+
+    def __init__(self):
+        self._metricas: List = []
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()) -> Contador:
+        metrica = Contador(nombre, ayuda, etiquetas)
+        self._metricas.append(metrica)
+        return metrica
+
+    def histograma(
+        self,
+        nombre: str,
+        ayuda: str,
+        etiquetas: Sequence[str] = (),
+        buckets: Sequence[float] = BUCKETS_LATENCIA,
+    ) -> Histograma:
+        metrica = Histograma(nombre, ayuda, etiquetas, buckets)
+        self._metricas.append(metrica)
+        return metrica
+
+    def exponer(self) -> str:
+        """Todas las métricas en formato de texto de Prometheus"""
+        lineas = []
+        for metrica in self._metricas:
+            lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+            lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+            lineas.extend(metrica.exponer())
+        return "\n".join(lineas) + "\n"
+
+
+REGISTRO = RegistroMetricas()
+
+CONSULTAS = REGISTRO.contador(
+    "hmobility_consultas_total", "Consultas atendidas por endpoint y estado", ("endpoint", "estado")
+)
+DURACION_CONSULTA = REGISTRO.histograma(
+    "hmobility_consulta_segundos", "Duración total de la consulta", ("endpoint",)
+)
+DURACION_ETAPA = REGISTRO.histograma(
+    "hmobility_etapa_segundos", "Duración de cada etapa de la consulta", ("endpoint", "etapa")
+)
+RESULTADOS_BUSQUEDA = REGISTRO.histograma(
+    "hmobility_busqueda_resultados", "Entradas devueltas por la búsqueda", (), (0, 1, 2, 3, 5, 10)
+)
+PUNTUACION_BUSQUEDA = REGISTRO.histograma(
+    "hmobility_busqueda_puntuacion", "Score BM25F del mejor resultado", (), (0.5, 1, 2, 4, 8, 16, 32)
+)
+CONSULTAS_CACHE = REGISTRO.contador(
+    "hmobility_cache_total", "Consultas a las cachés por resultado", ("cache", "resultado")
+)
+LLAMADAS_LLM = REGISTRO.contador(
+    "hmobility_llm_total", "Llamadas al LLM por resultado", ("resultado",)
+)
+TOKENS_PROMPT = REGISTRO.histograma(
+    "hmobility_prompt_tokens", "Tokens del prompt enviado al LLM", (), (64, 128, 256, 384, 512, 768, 1024, 2048)
+)
+
+
+class Traza:
+    """Tiempos por etapa de una petición"""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.inicio = time.perf_counter()
+        self.etapas: Dict[str, float] = {}
+        self.campos: Dict = {}
+        self._lock = threading.Lock()
+
+    def sumar(self, etapa: str, segundos: float) -> None:
+        # Las preguntas de un lote pueden sumar desde varios hilos
+        with self._lock:
+            self.etapas[etapa] = self.etapas.get(etapa, 0.0) + segundos
+
+    def terminar(self, estado: str = "ok") -> float:
+        """Registra la duración total y escribe el log JSON; devuelve los segundos"""
+        duracion = time.perf_counter() - self.inicio
+        CONSULTAS.inc(endpoint=self.endpoint, estado=estado)
+        DURACION_CONSULTA.observar(duracion, endpoint=self.endpoint)
+        if METRICAS_LOG_JSON:
+            print(json.dumps({
+                "evento": "consulta",
+                "endpoint": self.endpoint,
+                "estado": estado,
+                "duracion_ms": round(duracion * 1000, 3),
+                "etapas_ms": {e: round(s * 1000, 3) for e, s in self.etapas.items()},
+                **self.campos,
+            }, ensure_ascii=False))
+        return duracion
+
+
+_traza_actual: ContextVar[Optional[Traza]] = ContextVar("traza_actual", default=None)
+
+
+def iniciar_traza(endpoint: str) -> Traza:
+    """Nueva traza, activa en el contexto actual (tarea asyncio o hilo)"""
+    traza = Traza(endpoint)
+    _traza_actual.set(traza)
+    return traza
+
+
+@contextmanager
+def medir(etapa: str) -> Iterator[None]:
+    """Mide una etapa; se suma a la traza activa si la hay"""
+    traza = _traza_actual.get()
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        segundos = time.perf_counter() - inicio
+        DURACION_ETAPA.observar(segundos, endpoint=traza.endpoint if traza else "", etapa=etapa)
+        if traza is not None:
+            traza.sumar(etapa, segundos)
+
+
+def anotar(**campos) -> None:
+    """Campos extra para el log JSON de la traza activa"""
+    traza = _traza_actual.get()
+    if traza is not None:
+        traza.campos.update(campos)
+
+
+def observar_busqueda(scores: Sequence[float]) -> None:
+    """Número de resultados y score del mejor de una búsqueda"""
+    RESULTADOS_BUSQUEDA.observar(len(scores))
+    if len(scores):
+        PUNTUACION_BUSQUEDA.observar(float(scores[0]))
+
+
+def exponer_metricas() -> str:
+    return REGISTRO.exponer()
@@ -0,0 +1,187 @@
+"""
+Construcción de prompts para el LLM con presupuesto de tokens
+
+- El prefijo fijo (rol + instrucciones) va primero y se calcula una sola vez,
+  así es idéntico entre peticiones y aprovecha la caché de prefijos del servidor
+- Cada entrada se compacta a una línea (subcategoría, descripción, artículo)
+- El contexto se recorta al presupuesto PROMPT_PRESUPUESTO_TOKENS: entra en
+  orden de relevancia y la última que no cabe se resume a sus primeras frases
+- Los tokens se cuentan con el tokenizer.json del modelo (PROMPT_TOKENIZADOR,
+  requiere el paquete `tokenizers`) o con una estimación local por subpalabras
+"""
+
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+PROMPT_PRESUPUESTO_TOKENS = int(os.getenv("PROMPT_PRESUPUESTO_TOKENS", "320"))
+PROMPT_TOKENIZADOR = os.getenv("PROMPT_TOKENIZADOR", "")
+
+# Espacio mínimo para resumir una entrada que no cabe completa
+MIN_TOKENS_RESUMEN = 24
+
+PREFIJO_PROMPT = """Eres un asistente experto en el Reglamento de Tránsito de Hermosillo, Sonora.
+Responde de forma clara, concisa, profesional y amigable, en markdown (**negrita** para títulos, _cursiva_ para fundamentos).
+Cita los artículos cuando sea relevante y, si la información no basta, indícalo.
+
+"""
+
+_PIEZAS = re.compile(r"\w+|[^\w\s]")
+_FRASES = re.compile(r"(?<=[.;:])\s+")
+
+
+class TokenizadorLocal:
+    """
+    Conteo y recorte de tokens sin red: tokenizer.json del modelo si está
+    disponible, si no ~1 token por cada 4 caracteres de palabra y 1 por signo
+    """
+
+    def __init__(self, ruta: str = PROMPT_TOKENIZADOR):
+        self._tokenizer = None
+        if ruta:
+            try:
+                from tokenizers import Tokenizer
+                self._tokenizer = Tokenizer.from_file(ruta)
+            except Exception as e:
+                print(f"⚠️ Tokenizador no disponible ({e}); se usa la estimación local")
+
+    def _cortes(self, texto: str) -> List[int]:
+        """Posición final en el texto de cada token"""
+        if self._tokenizer is not None:
+            return [fin for _, fin in self._tokenizer.encode(texto, add_special_tokens=False).offsets]
+        cortes = []
+        for pieza in _PIEZAS.finditer(texto):
+            inicio, fin = pieza.span()
+            for corte in range(inicio + 4, fin, 4):
+                cortes.append(corte)
+            cortes.append(fin)
+        return cortes
+
+    def contar(self, texto: str) -> int:
+        return len(self._cortes(texto))
+
+    def recortar(self, texto: str, max_tokens: int) -> str:
+        """Prefijo del texto con como mucho max_tokens tokens"""
+        cortes = self._cortes(texto)
+        if len(cortes) <= max_tokens:
+            return texto
+        if max_tokens <= 0:
+            return ""
+        return texto[:cortes[max_tokens - 1]]
+
+
+class PromptConstruido:
+    """Prompt listo para el LLM y sus cuentas de tokens"""
+
+    def __init__(self, texto: str, tokens: int, tokens_contexto: int, entradas: int, recortado: bool):
+        self.texto = texto
+        self.tokens = tokens
+        self.tokens_contexto = tokens_contexto
+        self.entradas = entradas
+        self.recortado = recortado
+
+
+class ConstructorPrompt:
+    """Prompts con prefijo fijo precalculado y contexto ajustado a un presupuesto"""
+
+    def __init__(
+        self,
+        tokenizador: Optional[TokenizadorLocal] = None,
+        presupuesto: int = PROMPT_PRESUPUESTO_TOKENS,
+    ):
+        self.tokenizador = tokenizador or TokenizadorLocal()
+        self.presupuesto = presupuesto
+        self.prefijo = PREFIJO_PROMPT
+        self.tokens_prefijo = self.tokenizador.contar(self.prefijo)
+        # Líneas compactas por entrada: se repiten mucho entre preguntas
+        self._linea = lru_cache(maxsize=4096)(self._compactar)
+
+        self._lock = threading.Lock()
+        self.prompts = 0
+        self.tokens_total = 0
+        self.recortes = 0
+
+    def _compactar(self, subcategoria: str, descripcion: str, articulo: str) -> Tuple[str, int]:
+        linea = f"- {subcategoria}: {descripcion}"
+        if articulo:
+            linea += f" ({articulo})"
+        linea += "\n"
+        return linea, self.tokenizador.contar(linea)
+
+    def _resumir(self, subcategoria: str, descripcion: str, articulo: str, max_tokens: int) -> Tuple[str, int]:
+        """Primeras frases de la descripción que caben en max_tokens"""
+        linea, tokens = self._linea(subcategoria, "", articulo)
+        disponible = max_tokens - tokens - 1
+        resumen = ""
+        for frase in _FRASES.split(descripcion):
+            candidato = f"{resumen} {frase}".strip()
+            if self.tokenizador.contar(candidato) > disponible:
+                break
+            resumen = candidato
+        if not resumen:
+            resumen = self.tokenizador.recortar(descripcion, disponible).rstrip()
+        return self._linea(subcategoria, resumen + "…", articulo)
+
+    def construir_contexto(self, entradas: List[Dict]) -> Tuple[str, int, int, bool]:
+        """Contexto (texto, tokens, entradas incluidas, recortado) dentro del presupuesto"""
+        partes: List[str] = []
+        usados = 0
+        recortado = False
+        for entrada in entradas:
+            campos = (
+                entrada.get("subcategoria", ""),
+                entrada.get("descripcion", ""),
+                entrada.get("articulo", "") or "",
+            )
+            linea, tokens = self._linea(*campos)
+            restante = self.presupuesto - usados
+            if tokens > restante:
+                recortado = True
+                # La primera entrada siempre entra (resumida) aunque no quepa
+                if restante >= MIN_TOKENS_RESUMEN or not partes:
+                    linea, tokens = self._resumir(*campos, max(restante, MIN_TOKENS_RESUMEN))
+                    partes.append(linea)
+                    usados += tokens
+                break
+            partes.append(linea)
+            usados += tokens
+        return "".join(partes), usados, len(partes), recortado
+
+    def construir(self, pregunta: str, entradas: List[Dict]) -> PromptConstruido:
+        contexto, tokens_contexto, incluidas, recortado = self.construir_contexto(entradas)
+        sufijo = f"Reglamento:\n{contexto}\nPregunta del usuario: {pregunta}\n\nRespuesta:"
+        tokens = self.tokens_prefijo + self.tokenizador.contar(sufijo)
+
+        with self._lock:
+            self.prompts += 1
+            self.tokens_total += tokens
+            self.recortes += int(recortado)
+
+        return PromptConstruido(self.prefijo + sufijo, tokens, tokens_contexto, incluidas, recortado)
+
+    def estadisticas(self) -> Dict:
+        with self._lock:
+            return {
+                "prompts": self.prompts,
+                "tokens_promedio": round(self.tokens_total / self.prompts, 1) if self.prompts else 0.0,
+                "tokens_prefijo": self.tokens_prefijo,
+                "presupuesto_contexto": self.presupuesto,
+                "recortados": self.recortes,
+            }
+
+
+_constructor: Optional[ConstructorPrompt] = None
+_lock = threading.Lock()
+
+
+def obtener_constructor_prompt() -> ConstructorPrompt:
+    """Constructor de prompts del proceso (lazy)"""
+    global _constructor
+
+    if _constructor is None:
+        with _lock:
+            if _constructor is None:
+                _constructor = ConstructorPrompt()
+    return _constructor
@@ -0,0 +1,174 @@
+"""
+Ranking BM25F con ponderación por campo
+Los pesos por posting se precalculan al construir el índice; una consulta
+solo suma (vectorizado con NumPy) las columnas de sus términos.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Campos indexados y su peso relativo en BM25F
+PESOS_CAMPO: Dict[str, float] = {
+    "categoria": 2.0,
+    "subcategoria": 3.0,
+    "descripcion": 1.0,
+    "articulo": 1.5,
+}
+
+# Normalización por longitud de cada campo (0 = ninguna, 1 = completa)
+B_CAMPO: Dict[str, float] = {
+    "categoria": 0.3,
+    "subcategoria": 0.5,
+    "descripcion": 0.75,
+    "articulo": 0.3,
+}
+
+K1 = 1.2
+
+
+class RankerBM25F:
+    """
+    Puntúa documentos con BM25F sobre una matriz documento-término dispersa
+    en formato CSC (indptr / doc_ids / tf por campo)
+    """
+
+    def __init__(
+        self,
+        campos: Sequence[str],
+        indptr: np.ndarray,
+        doc_ids: np.ndarray,
+        tf: np.ndarray,
+        longitudes: np.ndarray,
+        k1: float = K1,
+        pesos: Optional[Dict[str, float]] = None,
+        b: Optional[Dict[str, float]] = None,
+    ):
+        pesos = pesos or PESOS_CAMPO
+        b = b or B_CAMPO
+
+        self.n_docs = longitudes.shape[0]
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+
+        w = np.array([pesos.get(c, 1.0) for c in campos], dtype=np.float32)
+        bc = np.array([b.get(c, 0.75) for c in campos], dtype=np.float32)
+        promedio = np.maximum(longitudes.mean(axis=0), 1.0) if self.n_docs else np.ones(len(campos), dtype=np.float32)
+
+        # Normas por documento y campo: 1 - b + b * len / avg_len
+        normas = (1.0 - bc) + bc * (longitudes / promedio)
+
+        # tf combinado de BM25F: sum_f w_f * tf_f / norma_f
+        tf_comb = (tf * w / normas[doc_ids]).sum(axis=1) if len(doc_ids) else np.zeros(0, dtype=np.float32)
+
+        df = np.diff(indptr).astype(np.float32)
+        idf = np.log1p((self.n_docs - df + 0.5) / (df + 0.5))
+        idf_posting = np.repeat(idf, np.diff(indptr))
+
+        self.pesos = (idf_posting * tf_comb / (k1 + tf_comb)).astype(np.float32)
+
+    @classmethod
+    def desde_pesos(cls, indptr: np.ndarray, doc_ids: np.ndarray, pesos: np.ndarray, n_docs: int) -> "RankerBM25F":
+        """Ranker con pesos por posting ya calculados"""
+        ranker = cls.__new__(cls)
+        ranker.n_docs = n_docs
+        ranker.indptr = indptr
+        ranker.doc_ids = doc_ids
+        ranker.pesos = pesos
+        return ranker
+
+    def puntuar(self, grupos: List[List[int]]) -> np.ndarray:
+        """
+        Score de cada documento para una consulta
+        Cada grupo son los términos del vocabulario de un término de la pregunta
+        (exacto + expansiones); dentro del grupo se toma el máximo
+        """
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+
+        for grupo in grupos:
+            if len(grupo) == 1:
+                t = grupo[0]
+                ini, fin = self.indptr[t], self.indptr[t + 1]
+                scores[self.doc_ids[ini:fin]] += self.pesos[ini:fin]
+                continue
+
+            parcial = np.zeros(self.n_docs, dtype=np.float32)
+            for t in grupo:
+                ini, fin = self.indptr[t], self.indptr[t + 1]
+                np.maximum.at(parcial, self.doc_ids[ini:fin], self.pesos[ini:fin])
+            scores += parcial
+
+        return scores
+
+    def puntuar_lote(self, consultas: List[List[List[int]]]) -> np.ndarray:
+        """
+        Matriz de scores (consultas × documentos) de un lote en una sola pasada:
+        todos los postings de todos los grupos se reducen con un único
+        np.maximum.at y los grupos se suman a su consulta con un np.add.at
+        """
+        scores = np.zeros((len(consultas), self.n_docs), dtype=np.float32)
+        grupo_consulta: List[int] = []
+        filas: List[np.ndarray] = []
+        docs: List[np.ndarray] = []
+        pesos: List[np.ndarray] = []
+
+        for q, grupos in enumerate(consultas):
+            for grupo in grupos:
+                g = len(grupo_consulta)
+                grupo_consulta.append(q)
+                for t in grupo:
+                    ini, fin = self.indptr[t], self.indptr[t + 1]
+                    filas.append(np.full(fin - ini, g, dtype=np.int64))
+                    docs.append(self.doc_ids[ini:fin])
+                    pesos.append(self.pesos[ini:fin])
+
+        if not grupo_consulta or self.n_docs == 0:
+            return scores
+
+        por_grupo = np.zeros((len(grupo_consulta), self.n_docs), dtype=np.float32)
+        if filas:
+            plano = np.concatenate(filas) * self.n_docs + np.concatenate(docs)
+            np.maximum.at(por_grupo.reshape(-1), plano, np.concatenate(pesos))
+        np.add.at(scores, np.array(grupo_consulta), por_grupo)
+        return scores
+
+    @staticmethod
+    def _mejores(scores: np.ndarray, k: int) -> List[int]:
+        """Top-k de una fila de scores (empates: el primero en el corpus)"""
+        candidatos = np.flatnonzero(scores > 0)
+        if len(candidatos) > k:
+            parte = np.argpartition(-scores[candidatos], k - 1)[:k]
+            corte = scores[candidatos[parte]].min()
+            candidatos = candidatos[scores[candidatos] >= corte]
+
+        orden = np.lexsort((candidatos, -scores[candidatos]))
+        return candidatos[orden][:k].tolist()
+
+    def top_k_con_scores(self, grupos: List[List[int]], k: int = 3) -> Tuple[List[int], List[float]]:
+        """top_k junto con el score de cada documento devuelto"""
+        if not grupos or self.n_docs == 0 or k <= 0:
+            return [], []
+        scores = self.puntuar(grupos)
+        ids = self._mejores(scores, k)
+        return ids, scores[ids].tolist()
+
+    def top_k(self, grupos: List[List[int]], k: int = 3) -> List[int]:
+        """Ids de los k documentos con mayor score (empates: el primero en el corpus)"""
+        return self.top_k_con_scores(grupos, k)[0]
+
+    def top_k_lote_con_scores(
+        self, consultas: List[List[List[int]]], k: int = 3
+    ) -> List[Tuple[List[int], List[float]]]:
+        """top_k_con_scores para cada consulta de un lote"""
+        if self.n_docs == 0 or k <= 0:
+            return [([], []) for _ in consultas]
+        scores = self.puntuar_lote(consultas)
+        resultados = []
+        for fila, grupos in zip(scores, consultas):
+            ids = self._mejores(fila, k) if grupos else []
+            resultados.append((ids, fila[ids].tolist()))
+        return resultados
+
+    def top_k_lote(self, consultas: List[List[List[int]]], k: int = 3) -> List[List[int]]:
+        """top_k para cada consulta de un lote"""
+        return [ids for ids, _ in self.top_k_lote_con_scores(consultas, k)]
@@ -0,0 +1,203 @@
+"""
+Protecciones del camino hacia el LLM cuando el servicio externo se degrada
+- LimitadorAdaptativo: concurrencia máxima ajustada por AIMD según latencia y errores;
+  las llamadas sin cupo esperan turno (hasta un tiempo máximo) en lugar de descartarse
+- CircuitBreaker: deja de llamar al LLM tras fallos consecutivos y prueba de nuevo más tarde
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict
+
+LLM_LATENCIA_OBJETIVO = float(os.getenv("LLM_LATENCIA_OBJETIVO", "5"))
+LLM_CONCURRENCIA_INICIAL = int(os.getenv("LLM_CONCURRENCIA_INICIAL", "32"))
+LLM_CONCURRENCIA_MAX = int(os.getenv("LLM_CONCURRENCIA_MAX", "64"))
+# Espera máxima por un lugar cuando no hay presupuesto de latencia (segundos)
+LLM_ESPERA_CUPO = float(os.getenv("LLM_ESPERA_CUPO", "10"))
+CIRCUITO_UMBRAL_FALLOS = int(os.getenv("CIRCUITO_UMBRAL_FALLOS", "5"))
+CIRCUITO_TIEMPO_APERTURA = float(os.getenv("CIRCUITO_TIEMPO_APERTURA", "30"))
+
+
+class LimitadorAdaptativo:
+    """
+    Límite de llamadas simultáneas con incremento aditivo / decremento multiplicativo:
+    cada respuesta rápida y exitosa sube el límite en 1/límite; un fallo o una
+    respuesta más lenta que el objetivo lo multiplica por `factor_reduccion`.
+    Tras una reducción, las llamadas que ya estaban en curso no vuelven a
+    reducirlo (una sola reducción por episodio de degradación).
+    Sin cupo, adquirir() espera en orden de llegada a que se libere un lugar.
+    """
+
+    def __init__(
+        self,
+        inicial: float = LLM_CONCURRENCIA_INICIAL,
+        minimo: float = 1,
+        maximo: float = LLM_CONCURRENCIA_MAX,
+        latencia_objetivo: float = LLM_LATENCIA_OBJETIVO,
+        factor_reduccion: float = 0.5,
+        reloj: Callable[[], float] = time.monotonic,
+    ):
+        self.limite = float(inicial)
+        self.minimo = float(minimo)
+        self.maximo = float(maximo)
+        self.latencia_objetivo = latencia_objetivo
+        self.factor_reduccion = factor_reduccion
+        self._reloj = reloj
+        self.en_curso = 0
+        self.rechazadas = 0
+        self.esperas = 0
+        self.reducciones = 0
+        self._ultima_reduccion = float("-inf")
+        self._en_espera: Deque[asyncio.Future] = deque()
+
+    def _hay_cupo(self) -> bool:
+        return self.en_curso < int(self.limite)
+
+    def intentar_adquirir(self) -> bool:
+        """Reserva un lugar si hay cupo y nadie espera; si no, la petición no debe llamar al LLM"""
+        if self._en_espera or not self._hay_cupo():
+            self.rechazadas += 1
+            return False
+        self.en_curso += 1
+        return True
+
+    async def adquirir(self, espera: float = LLM_ESPERA_CUPO) -> bool:
+        """
+        Reserva un lugar esperando hasta `espera` segundos;
+        False si no se liberó ninguno a tiempo (la petición no debe llamar al LLM)
+        """
+        if not self._en_espera and self._hay_cupo():
+            self.en_curso += 1
+            return True
+        if espera <= 0:
+            self.rechazadas += 1
+            return False
+
+        self.esperas += 1
+        turno = asyncio.get_running_loop().create_future()
+        self._en_espera.append(turno)
+        try:
+            await asyncio.wait_for(asyncio.shield(turno), espera)
+            return True
+        except asyncio.TimeoutError:
+            # El lugar pudo asignarse justo al vencer la espera
+            if turno.done() and not turno.cancelled():
+                return True
+            turno.cancel()
+            self.rechazadas += 1
+            return False
+        except asyncio.CancelledError:
+            if turno.done() and not turno.cancelled():
+                self.en_curso -= 1
+                self._despertar()
+            else:
+                turno.cancel()
+            raise
+
+    def _despertar(self) -> None:
+        """Pasa los lugares libres a las peticiones en espera, en orden"""
+        while self._en_espera and self._hay_cupo():
+            turno = self._en_espera.popleft()
+            if turno.done():
+                continue
+            self.en_curso += 1
+            turno.set_result(True)
+
+    def liberar(self, exito: bool, latencia: float) -> None:
+        self.en_curso -= 1
+        ahora = self._reloj()
+        if exito and latencia <= self.latencia_objetivo:
+            self.limite = min(self.maximo, self.limite + 1.0 / self.limite)
+        elif ahora - latencia >= self._ultima_reduccion:
+            # Solo las llamadas iniciadas después de la última reducción la repiten
+            self.limite = max(self.minimo, self.limite * self.factor_reduccion)
+            self._ultima_reduccion = ahora
+            self.reducciones += 1
+        self._despertar()
+
+    def estadisticas(self) -> Dict[str, Any]:
+        return {
+            "limite": round(self.limite, 2),
+            "en_curso": self.en_curso,
+            "en_espera": sum(1 for t in self._en_espera if not t.done()),
+            "esperas": self.esperas,
+            "rechazadas": self.rechazadas,
+            "reducciones": self.reducciones,
+        }
+
+
+class CircuitBreaker:
+    """
+    cerrado → (N fallos consecutivos) → abierto → (tiempo_apertura) → semiabierto
+    En semiabierto se deja pasar una sola llamada de prueba: si funciona el
+    circuito se cierra, si falla vuelve a abrirse
+    """
+
+    CERRADO = "cerrado"
+    ABIERTO = "abierto"
+    SEMIABIERTO = "semiabierto"
+
+    def __init__(
+        self,
+        umbral_fallos: int = CIRCUITO_UMBRAL_FALLOS,
+        tiempo_apertura: float = CIRCUITO_TIEMPO_APERTURA,
+        reloj: Callable[[], float] = time.monotonic,
+    ):
+        self.umbral_fallos = umbral_fallos
+        self.tiempo_apertura = tiempo_apertura
+        self._reloj = reloj
+        self.estado = self.CERRADO
+        self.fallos_consecutivos = 0
+        self.aperturas = 0
+        self.omitidas = 0
+        self._abierto_desde = 0.0
+        self._prueba_en_curso = False
+
+    def permite(self) -> bool:
+        """Indica si se puede llamar al LLM en este momento"""
+        if self.estado == self.ABIERTO:
+            if self._reloj() - self._abierto_desde < self.tiempo_apertura:
+                self.omitidas += 1
+                return False
+            self.estado = self.SEMIABIERTO
+            self._prueba_en_curso = False
+
+        if self.estado == self.SEMIABIERTO:
+            if self._prueba_en_curso:
+                self.omitidas += 1
+                return False
+            self._prueba_en_curso = True
+
+        return True
+
+    def cancelar_prueba(self) -> None:
+        """
+        La llamada autorizada por permite() no llegó a hacerse (sin cupo o
+        cancelada): en semiabierto se libera la prueba para otra petición
+        """
+        if self.estado == self.SEMIABIERTO:
+            self._prueba_en_curso = False
+
+    def registrar_exito(self) -> None:
+        self.estado = self.CERRADO
+        self.fallos_consecutivos = 0
+        self._prueba_en_curso = False
+
+    def registrar_fallo(self) -> None:
+        self.fallos_consecutivos += 1
+        if self.estado == self.SEMIABIERTO or self.fallos_consecutivos >= self.umbral_fallos:
+            if self.estado != self.ABIERTO:
+                self.aperturas += 1
+            self.estado = self.ABIERTO
+            self._abierto_desde = self._reloj()
+            self._prueba_en_curso = False
+
+    def estadisticas(self) -> Dict[str, Any]:
+        return {
+            "estado": self.estado,
+            "fallos_consecutivos": self.fallos_consecutivos,
+            "aperturas": self.aperturas,
+            "omitidas": self.omitidas,
+        }
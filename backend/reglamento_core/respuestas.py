@@ -0,0 +1,40 @@
+"""
+Construcción de prompts y respuestas del chatbot
+"""
+
+from typing import Dict, List
+
+from .prompts import obtener_constructor_prompt
+
+SIN_RESULTADOS = "Lo siento, no encontré información específica sobre eso en el reglamento de tránsito de Hermosillo. ¿Podrías reformular tu pregunta o ser más específico?"
+
+
+def construir_prompt(pregunta: str, entradas: List[Dict]) -> str:
+    """Prompt para el LLM con la pregunta y el contexto del reglamento (ver prompts.py)"""
+    return obtener_constructor_prompt().construir(pregunta, entradas).texto
+
+
+def generar_respuesta_simple(pregunta: str, entradas: List[Dict]) -> str:
+    """
+    Genera una respuesta basada en las entradas encontradas (sin LLM)
+    """
+    if not entradas:
+        return SIN_RESULTADOS
+    
+    respuesta = "📋 Encontré la siguiente información en el Reglamento de Tránsito de Hermosillo:\n\n"
+    
+    for i, entrada in enumerate(entradas, 1):
+        respuesta += f"**{i}. {entrada.get('subcategoria', 'Información')}**\n"
+        respuesta += f"{entrada.get('descripcion', '')}\n"
+        
+        if entrada.get('articulo'):
+            respuesta += f"_Fundamento: {entrada.get('articulo')}_\n"
+        
+        respuesta += "\n"
+    
+    if len(entradas) > 1:
+        respuesta += f"_Se encontraron {len(entradas)} entradas relevantes._\n"
+    
+    respuesta += "\n💡 ¿Necesitas más información sobre algún tema específico?"
+    
+    return respuesta
@@ -0,0 +1,57 @@
+"""
+Serialización JSON de las respuestas
+
+Las entradas del reglamento no cambian entre peticiones: se serializan una vez
+al cargar el corpus y la respuesta se arma pegando esos bytes alrededor del
+texto generado. La salida es idéntica byte a byte a serializar el diccionario
+completo con a_json (JSON compacto en UTF-8) y a lo que genera FastAPI con
+response_model (tests/test_serializacion.py). Usa orjson si está instalado y,
+si no, json de la biblioteca estándar con los mismos separadores; solo
+difieren en flotantes con exponente (orjson 1e-7, json 1e-07), que el
+reglamento no tiene.
+"""
+
+import json
+from typing import Any, List, Optional, Sequence
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def a_json(valor: Any) -> bytes:
+    """JSON compacto en UTF-8 (sin escapar caracteres no ASCII)"""
+    if orjson is not None:
+        return orjson.dumps(valor)
+    return json.dumps(valor, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def desde_json(datos: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(datos)
+    return json.loads(datos)
+
+
+def serializar_entradas(entradas: Sequence[dict]) -> List[bytes]:
+    """JSON de cada entrada, calculado una sola vez por corpus"""
+    return [a_json(entrada) for entrada in entradas]
+
+
+def serializar_respuesta(
+    respuesta: str,
+    fuentes_json: Sequence[bytes],
+    usa_llm: bool,
+    tokens_prompt: Optional[int] = None,
+) -> bytes:
+    """
+    Cuerpo de /query con las fuentes ya serializadas; equivale a
+    a_json({"respuesta", "fuentes", "usa_llm", "tokens_prompt"})
+    """
+    return b"".join((
+        b'{"respuesta":', a_json(respuesta),
+        b',"fuentes":[', b",".join(fuentes_json),
+        b'],"usa_llm":', b"true" if usa_llm else b"false",
+        b',"tokens_prompt":', a_json(tokens_prompt),
+        b"}",
+    ))
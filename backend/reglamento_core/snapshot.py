@@ -0,0 +1,285 @@
+"""
+Snapshot binario del reglamento para arranques en frío rápidos
+
+Compila reglamento.json a un archivo versionado que se abre con mmap y se
+consulta sin copiar: valores internados (en JSON, así números, listas, booleanos
+y null vuelven con su tipo), vocabulario ordenado, postings CSC,
+pesos BM25F por posting, longitudes por campo y la matriz float32 de vectores
+de la búsqueda densa ya calculados.
+
+Formato (little-endian):
+    MAGIC (4 bytes) | FORMATO (u32) | len(header) (u32) | header JSON | secciones
+Las secciones empiezan alineadas a 8 bytes tras el header, que guarda
+su offset relativo, dtype y forma.
+
+Uso:
+    cd backend && python -m reglamento_core
+"""
+
+import json
+import mmap
+import os
+import struct
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .densa import BUSQUEDA_DENSA, IndiceDenso, obtener_codificador
+from .indice import CAMPOS_BUSQUEDA, IndiceInvertido, firma_indice
+
+MAGIC = b"HMRS"
+FORMATO = 2
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "reglamento.snapshot")
+
+_PREFIJO = struct.Struct("<4sII")
+_ALINEACION = 8
+
+
+class SnapshotInvalido(Exception):
+    """El snapshot no existe, está corrupto o no corresponde al JSON actual"""
+
+
+def _inicio_datos(largo_header: int) -> int:
+    inicio = _PREFIJO.size + largo_header
+    return inicio + (-inicio % _ALINEACION)
+
+
+def _tabla_cadenas(cadenas: List[str]) -> Tuple[np.ndarray, bytes]:
+    """Offsets (n + 1) y blob UTF-8 de una lista de cadenas"""
+    codificadas = [c.encode("utf-8") for c in cadenas]
+    offsets = np.zeros(len(codificadas) + 1, dtype=np.int64)
+    if codificadas:
+        offsets[1:] = np.cumsum([len(c) for c in codificadas])
+    return offsets, b"".join(codificadas)
+
+
+def compilar_snapshot(entradas: List[Dict], version: str, destino: str = SNAPSHOT_PATH) -> str:
+    """Escribe el snapshot de las entradas; `version` es el hash del JSON de origen"""
+    indice = IndiceInvertido(entradas)
+
+    # Valores internados de las entradas (JSON): cada valor distinto se guarda una vez
+    campos = list(dict.fromkeys(k for e in entradas for k in e))
+    internadas: Dict[str, int] = {}
+    posiciones = {campo: j for j, campo in enumerate(campos)}
+    docs = np.full((len(entradas), len(campos)), -1, dtype=np.int32)
+    # Columnas de cada entrada en su orden original (las fuentes se serializan igual que del JSON)
+    orden = np.full((len(entradas), len(campos)), -1, dtype=np.int32)
+    for i, entrada in enumerate(entradas):
+        for k, (campo, valor) in enumerate(entrada.items()):
+            j = posiciones[campo]
+            docs[i, j] = internadas.setdefault(json.dumps(valor, ensure_ascii=False, separators=(",", ":")), len(internadas))
+            orden[i, k] = j
+
+    cad_offsets, cad_blob = _tabla_cadenas(list(internadas))
+    voc_offsets, voc_blob = _tabla_cadenas(indice.vocabulario.terminos)
+
+    secciones = {
+        "cadenas_offsets": cad_offsets,
+        "cadenas": np.frombuffer(cad_blob, dtype=np.uint8),
+        "docs": docs,
+        "orden": orden,
+        "vocab_offsets": voc_offsets,
+        "vocab": np.frombuffer(voc_blob, dtype=np.uint8),
+        "indptr": indice.indptr,
+        "doc_ids": indice.doc_ids,
+        "pesos": indice.ranker.pesos,
+        "longitudes": indice.longitudes,
+    }
+    # Vectores de la búsqueda densa; solo se usan si el codificador al cargar es el mismo
+    codificador = obtener_codificador()
+    densa = IndiceDenso.desde_entradas(entradas, CAMPOS_BUSQUEDA, codificador)
+    secciones["densa"] = densa.matriz
+
+    header = {
+        "version": version,
+        "firma": firma_indice(),
+        "campos": campos,
+        "n_docs": len(entradas),
+        "modelo_denso": codificador.nombre,
+        "secciones": {},
+    }
+
+    # Offsets relativos al inicio de los datos (primer múltiplo de 8 tras el header)
+    offset = 0
+    for nombre, arr in secciones.items():
+        offset += -offset % _ALINEACION
+        header["secciones"][nombre] = [offset, arr.dtype.str, list(arr.shape)]
+        offset += arr.nbytes
+
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    base = _inicio_datos(len(header_bytes))
+
+    tmp = destino + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_PREFIJO.pack(MAGIC, FORMATO, len(header_bytes)))
+        f.write(header_bytes)
+        for nombre, arr in secciones.items():
+            pos = base + header["secciones"][nombre][0]
+            f.write(b"\0" * (pos - f.tell()))
+            f.write(np.ascontiguousarray(arr).tobytes())
+    os.replace(tmp, destino)
+    return destino
+
+
+class VocabularioSnapshot:
+    """Vocabulario ordenado leído directamente del buffer mapeado"""
+
+    def __init__(self, offsets: np.ndarray, blob: memoryview):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def _bytes(self, i: int) -> bytes:
+        return bytes(self._blob[self._offsets[i]:self._offsets[i + 1]])
+
+    def __getitem__(self, i: int) -> str:
+        return self._bytes(i).decode("utf-8")
+
+    def _bisect(self, clave: bytes) -> int:
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._bytes(mid) < clave:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def id(self, termino: str) -> Optional[int]:
+        clave = termino.encode("utf-8")
+        i = self._bisect(clave)
+        return i if i < len(self) and self._bytes(i) == clave else None
+
+    def con_prefijo(self, prefijo: str) -> List[int]:
+        clave = prefijo.encode("utf-8")
+        ids = []
+        i = self._bisect(clave)
+        while i < len(self) and self._bytes(i).startswith(clave):
+            ids.append(i)
+            i += 1
+        return ids
+
+
+class EntradasSnapshot:
+    """Secuencia de entradas que se decodifican del snapshot al accederlas"""
+
+    def __init__(self, campos: List[str], docs: np.ndarray, orden: np.ndarray, offsets: np.ndarray, blob: memoryview):
+        self._campos = campos
+        self._docs = docs
+        self._orden = orden
+        self._offsets = offsets
+        self._blob = blob
+        self._cache: Dict[int, Dict] = {}
+
+    def __len__(self) -> int:
+        return self._docs.shape[0]
+
+    def _valor(self, i: int):
+        return json.loads(bytes(self._blob[self._offsets[i]:self._offsets[i + 1]]).decode("utf-8"))
+
+    def __getitem__(self, i: int) -> Dict:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        entrada = self._cache.get(i)
+        if entrada is None:
+            valores = self._docs[i].tolist()
+            entrada = {
+                self._campos[j]: self._valor(valores[j])
+                for j in self._orden[i].tolist()
+                if j >= 0
+            }
+            self._cache[i] = entrada
+        return entrada
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class Snapshot:
+    """Snapshot abierto con mmap; los arrays son vistas sin copia sobre el archivo"""
+
+    def __init__(self, ruta: str = SNAPSHOT_PATH):
+        try:
+            with open(ruta, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotInvalido(f"No se pudo abrir {ruta}: {e}")
+
+        if len(self._mmap) < _PREFIJO.size:
+            raise SnapshotInvalido("Snapshot truncado")
+        magic, formato, largo = _PREFIJO.unpack_from(self._mmap, 0)
+        if magic != MAGIC or formato != FORMATO:
+            raise SnapshotInvalido(f"Formato de snapshot no soportado ({magic!r} v{formato})")
+
+        inicio = _PREFIJO.size
+        try:
+            header = json.loads(bytes(self._mmap[inicio:inicio + largo]).decode("utf-8"))
+        except ValueError as e:
+            raise SnapshotInvalido(f"Header de snapshot inválido: {e}")
+        self.version: str = header["version"]
+        self.firma: str = header["firma"]
+        self.campos: List[str] = header["campos"]
+        self.modelo_denso: Optional[str] = header.get("modelo_denso")
+
+        base = _inicio_datos(largo)
+        buffer = memoryview(self._mmap)
+        arrays = {}
+        try:
+            for nombre, (offset, dtype, forma) in header["secciones"].items():
+                cuenta = int(np.prod(forma))
+                if cuenta == 0:
+                    arrays[nombre] = np.zeros(forma, dtype=np.dtype(dtype))
+                    continue
+                arrays[nombre] = np.frombuffer(
+                    buffer, dtype=np.dtype(dtype), count=cuenta, offset=base + offset
+                ).reshape(forma)
+        except ValueError as e:
+            raise SnapshotInvalido(f"Snapshot corrupto: {e}")
+        self._arrays = arrays
+
+    def indice(self) -> IndiceInvertido:
+        """Índice que consulta directamente sobre el archivo mapeado"""
+        a = self._arrays
+        entradas = EntradasSnapshot(self.campos, a["docs"], a["orden"], a["cadenas_offsets"], a["cadenas"].data)
+        vocabulario = VocabularioSnapshot(a["vocab_offsets"], a["vocab"].data)
+        indice = IndiceInvertido.desde_arrays(
+            entradas, vocabulario, a["indptr"], a["doc_ids"], a["pesos"], a["longitudes"]
+        )
+        if "densa" in a and BUSQUEDA_DENSA:
+            codificador = obtener_codificador()
+            if codificador.nombre == self.modelo_denso:
+                indice.densa = IndiceDenso(a["densa"], codificador)
+        return indice
+
+
+def abrir_snapshot(version: Optional[str], ruta: str = SNAPSHOT_PATH) -> Snapshot:
+    """
+    Abre el snapshot y verifica que corresponda al JSON (hash) y a los
+    parámetros actuales del índice; si no, lanza SnapshotInvalido
+    """
+    snapshot = Snapshot(ruta)
+    if version is not None and snapshot.version != version:
+        raise SnapshotInvalido("Snapshot desactualizado respecto a reglamento.json")
+    if snapshot.firma != firma_indice():
+        raise SnapshotInvalido("Snapshot generado con otros parámetros de índice")
+    return snapshot
+
+
+def main(argv: List[str]) -> int:
+    from .cargador import REGLAMENTO_PATH, hash_contenido
+
+    origen = argv[1] if len(argv) > 1 else REGLAMENTO_PATH
+    destino = argv[2] if len(argv) > 2 else SNAPSHOT_PATH
+
+    with open(origen, "rb") as f:
+        datos = f.read()
+    entradas = json.loads(datos.decode("utf-8"))
+
+    compilar_snapshot(entradas, hash_contenido(datos), destino)
+    print(f"✅ Snapshot generado: {destino} ({len(entradas)} entradas, {os.path.getsize(destino):,} bytes)")
+    return 0
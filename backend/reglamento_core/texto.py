@@ -0,0 +1,77 @@
+"""
+Normalización y tokenización de texto en español para la búsqueda en el reglamento
+"""
+
+import re
+import unicodedata
+from typing import List
+
+# Cambiar al modificar la normalización o la tokenización (invalida snapshots)
+VERSION_TOKENIZADOR = 2
+
+# Palabras vacías del español (sin acentos, ya que se comparan tras plegar)
+STOPWORDS = frozenset("""
+a al algo algun alguna algunas alguno algunos ante antes aqui asi aun
+cada como con contra cual cuales cuando cuanto de del desde donde dos
+e el ella ellas ello ellos en entre era eran es esa esas ese eso esos
+esta estan estas este esto estos fue fueron ha haber hace hacer han hasta
+hay la las le les lo los mas me mi mis mucho muy nada ni no nos nosotros
+o os otra otras otro otros para pero poco por porque puede pueden puedo que
+quien se sea sean segun ser si sido sin sobre solo son su sus tal tambien
+tanto te tener tengo ti tiene tienen todo todos tu tus u un una unas uno
+unos usted ustedes y ya yo
+""".split())
+
+# Palabras que invierten el sentido de la pregunta: la búsqueda las descarta,
+# pero las claves de caché las conservan ("¿no puedo...?" ≠ "¿puedo...?")
+NEGACIONES = frozenset("jamas nada nadie ni ningun ninguna ninguno no nunca sin tampoco".split())
+
+_RE_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Consonantes tras las que el plural agrega "-es" (motor → motores)
+_CONSONANTES_PLURAL = frozenset("lrndzj")
+
+
+def plegar_acentos(texto: str) -> str:
+    """Elimina acentos y diacríticos (á → a, ñ → n, ü → u)"""
+    if texto.isascii():
+        return texto
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas y sin acentos"""
+    return plegar_acentos(texto.lower())
+
+
+def raiz(termino: str) -> str:
+    """
+    Stemming ligero del español: solo quita el plural para no alterar los
+    prefijos (luces → luz, infracciones → infraccion, motores → motor,
+    multas → multa); las palabras cortas se dejan igual
+    """
+    if len(termino) <= 4 or termino.isdigit():
+        return termino
+    if termino.endswith("ces"):
+        return termino[:-3] + "z"
+    if termino.endswith("iones"):
+        return termino[:-2]
+    if termino.endswith("es") and termino[-3] in _CONSONANTES_PLURAL:
+        return termino[:-2]
+    if termino.endswith("s") and termino[-2] in "aeo":
+        return termino[:-1]
+    return termino
+
+
+def tokenizar(texto: str) -> List[str]:
+    """Divide el texto normalizado en términos (en singular), descartando palabras vacías"""
+    return [
+        raiz(t) for t in _RE_TOKEN.findall(normalizar(texto))
+        if len(t) > 1 and t not in STOPWORDS
+    ]
+
+
+def negaciones(texto: str) -> List[str]:
+    """Palabras de negación del texto, sin repetir y ordenadas"""
+    return sorted({t for t in _RE_TOKEN.findall(normalizar(texto)) if t in NEGACIONES})
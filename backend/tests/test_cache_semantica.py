@@ -0,0 +1,36 @@
+"""Caché semántica: grupos por versión del corpus y por negaciones"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reglamento_core import CacheSemantica
+
+PREGUNTA = "¿cuál es la multa por estacionarse en doble fila?"
+
+
+def test_versiones_alternadas_no_vacian_la_cache():
+    cache = CacheSemantica(umbral=0.9)
+    cache.guardar(PREGUNTA, [1, 2], "v1", "respuesta v1")
+    # Recarga en curso: peticiones de la versión nueva y de la vieja se intercalan
+    cache.guardar(PREGUNTA, [1, 2], "v2", "respuesta v2")
+    assert cache.buscar(PREGUNTA, [1, 2], "v1") == "respuesta v1"
+    assert cache.buscar(PREGUNTA, [1, 2], "v2") == "respuesta v2"
+    assert cache.buscar(PREGUNTA, [1, 2], "v1") == "respuesta v1"
+    assert cache.estadisticas()["entradas"] == 2
+
+
+def test_versiones_viejas_salen_por_lru():
+    cache = CacheSemantica(umbral=0.9, max_entradas=2)
+    cache.guardar(PREGUNTA, [1], "v1", "vieja")
+    cache.guardar(PREGUNTA, [1], "v2", "nueva")
+    cache.guardar(PREGUNTA, [2], "v2", "otra")
+    assert cache.buscar(PREGUNTA, [1], "v1") is None
+    assert cache.buscar(PREGUNTA, [1], "v2") == "nueva"
+
+
+def test_negacion_en_otro_grupo():
+    cache = CacheSemantica(umbral=0.5)
+    cache.guardar("¿puedo estacionarme aquí?", [3], "v1", "sí")
+    assert cache.buscar("¿no puedo estacionarme aquí?", [3], "v1") is None
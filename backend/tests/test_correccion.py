@@ -0,0 +1,59 @@
+"""Distancia de edición acotada y corrector ortográfico"""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reglamento_core import CorrectorOrtografico, distancia_edicion
+
+
+def referencia(a: str, b: str) -> int:
+    """Damerau-Levenshtein (transposiciones adyacentes) con la matriz completa"""
+    d = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(len(a) + 1):
+        d[i][0] = i
+    for j in range(len(b) + 1):
+        d[0][j] = j
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            costo = 0 if a[i - 1] == b[j - 1] else 1
+            d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + costo)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[-1][-1]
+
+
+@pytest.mark.parametrize("a, b, maximo, esperado", [
+    ("ca", "abbb", 2, 3),
+    ("", "abc", 1, 2),
+    ("abc", "", 5, 3),
+    ("casco", "casco", 0, 0),
+    ("sinturon", "cinturon", 1, 1),
+    ("alcolimetro", "alcoholimetro", 2, 2),
+    ("motociclta", "motociclista", 2, 2),
+    ("ab", "ba", 1, 1),
+    ("semaforo", "velocidad", 2, 3),
+])
+def test_casos(a, b, maximo, esperado):
+    assert distancia_edicion(a, b, maximo) == esperado
+
+
+def test_nunca_supera_maximo_mas_uno():
+    aleatorio = random.Random(0)
+    for _ in range(3000):
+        a = "".join(aleatorio.choices("abc", k=aleatorio.randint(0, 7)))
+        b = "".join(aleatorio.choices("abc", k=aleatorio.randint(0, 7)))
+        maximo = aleatorio.randint(0, 4)
+        assert distancia_edicion(a, b, maximo) == min(referencia(a, b), maximo + 1), (a, b, maximo)
+
+
+def test_corrector():
+    terminos = ["cinturon", "motociclista", "casco"]
+    corrector = CorrectorOrtografico(terminos, [5, 3, 4])
+    assert [terminos[i] for i in corrector.corregir("sinturon")] == ["cinturon"]
+    assert [terminos[i] for i in corrector.corregir("motociclta")] == ["motociclista"]
+    assert corrector.corregir("casa") == []
@@ -0,0 +1,86 @@
+"""Circuit breaker semiabierto junto al limitador de concurrencia del LLM"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["HUGGINGFACE_API_KEY"] = ""
+os.environ.setdefault("METRICAS_LOG_JSON", "0")
+
+import main
+from reglamento_core import CircuitBreaker, LimitadorAdaptativo
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self) -> float:
+        return self.ahora
+
+
+@pytest.fixture
+def protecciones(monkeypatch):
+    """Circuito abierto tras 1 fallo y ya listo para la prueba; limitador de 1 lugar ocupado"""
+    reloj = Reloj()
+    circuito = CircuitBreaker(umbral_fallos=1, tiempo_apertura=10, reloj=reloj)
+    circuito.registrar_fallo()
+    reloj.ahora = 11
+    limitador = LimitadorAdaptativo(inicial=1, maximo=1)
+    assert limitador.intentar_adquirir()
+    monkeypatch.setattr(main, "circuito_llm", circuito)
+    monkeypatch.setattr(main, "limitador_llm", limitador)
+    monkeypatch.setattr(main, "espera_cupo_llm", lambda: 0.05)
+    return circuito, limitador
+
+
+def test_cancelar_prueba_libera_semiabierto():
+    reloj = Reloj()
+    circuito = CircuitBreaker(umbral_fallos=1, tiempo_apertura=10, reloj=reloj)
+    circuito.registrar_fallo()
+    reloj.ahora = 11
+    assert circuito.permite()
+    assert not circuito.permite()
+    circuito.cancelar_prueba()
+    assert circuito.permite()
+
+
+def test_sin_cupo_no_bloquea_el_circuito(protecciones, monkeypatch):
+    circuito, limitador = protecciones
+
+    async def llm(_prompt):
+        return "respuesta"
+
+    monkeypatch.setattr(main, "generar_respuesta_llm", llm)
+
+    async def correr():
+        # La prueba del circuito no consigue lugar en el limitador
+        assert await main.generar_respuesta_llm_protegida("p") is None
+        assert circuito.estado == CircuitBreaker.SEMIABIERTO
+        limitador.liberar(True, 0.0)
+        # Con lugar y el LLM sano, la siguiente llamada es la prueba y cierra el circuito
+        assert await main.generar_respuesta_llm_protegida("p") == "respuesta"
+
+    asyncio.run(correr())
+    assert circuito.estado == CircuitBreaker.CERRADO
+
+
+def test_espera_cancelada_no_bloquea_el_circuito(protecciones):
+    circuito, limitador = protecciones
+
+    async def correr():
+        tarea = asyncio.ensure_future(main.reservar_llm())
+        await asyncio.sleep(0.01)
+        tarea.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await tarea
+        limitador.liberar(True, 0.0)
+        assert await main.reservar_llm()
+
+    asyncio.run(correr())
+    assert circuito.estado == CircuitBreaker.SEMIABIERTO
+    assert limitador.en_curso == 1
@@ -0,0 +1,117 @@
+"""
+Compatibilidad byte a byte de la respuesta de /query armada con las fuentes
+preserializadas (serializar_respuesta) contra a_json del diccionario completo
+y contra lo que FastAPI generaba con response_model=QueryResponse
+"""
+
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Sin LLM: /query responde con la respuesta simple y no sale a la red
+os.environ["HUGGINGFACE_API_KEY"] = ""
+os.environ.setdefault("METRICAS_LOG_JSON", "0")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import main
+from reglamento_core import a_json, desde_json, obtener_corpus, serializacion, serializar_respuesta
+
+ENTRADA = {
+    "categoria": "Seguridad vehicular",
+    "subcategoria": "Cinturón y sillas infantiles",
+    "descripcion": "Uso obligatorio de cinturón; niños menores de 12 años atrás. \"Comillas\", \\ y salto\nde línea",
+    "articulo": "Art. 19 fr. I y II",
+    "multa": 1234.5,
+    "umas": [0.1, 2.0, 10, -3.75],
+    "vigente": True,
+    "notas": None,
+    "etiquetas": [],
+    "extra": {},
+}
+
+CASOS = [
+    ("Respuesta con acentos: está prohibido 🚦", [ENTRADA], True, 812),
+    ("Sin resultados", [], False, None),
+    ("", [ENTRADA, {"categoria": "Otra", "descripcion": "ñandú"}], False, 0),
+    ("línea 1\nlínea 2\t fin", [{"a": 1, "b": [], "c": {"z": 1, "a": 2}}], True, None),
+]
+
+
+def datos(respuesta, fuentes, usa_llm, tokens_prompt):
+    return {"respuesta": respuesta, "fuentes": fuentes, "usa_llm": usa_llm, "tokens_prompt": tokens_prompt}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def motor(request, monkeypatch):
+    """Corre cada prueba con orjson y con el respaldo de la biblioteca estándar"""
+    if request.param == "json":
+        monkeypatch.setattr(serializacion, "orjson", None)
+    elif serializacion.orjson is None:
+        pytest.skip("orjson no está instalado")
+    return request.param
+
+
+@pytest.fixture(scope="module")
+def fastapi_referencia():
+    """App mínima que serializa con response_model=QueryResponse, como /query antes de preserializar"""
+    app = FastAPI()
+
+    @app.post("/query", response_model=main.QueryResponse)
+    async def query(cuerpo: dict):
+        return cuerpo
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("caso", CASOS)
+def test_igual_a_a_json(motor, caso):
+    respuesta, fuentes, usa_llm, tokens = caso
+    fuentes_json = [a_json(f) for f in fuentes]
+    assert serializar_respuesta(respuesta, fuentes_json, usa_llm, tokens) == a_json(datos(*caso))
+
+
+@pytest.mark.parametrize("caso", CASOS)
+def test_igual_a_fastapi(motor, caso, fastapi_referencia):
+    respuesta, fuentes, usa_llm, tokens = caso
+    esperado = fastapi_referencia.post("/query", json=datos(*caso)).content
+    assert serializar_respuesta(respuesta, [a_json(f) for f in fuentes], usa_llm, tokens) == esperado
+
+
+def test_no_ascii_sin_escapar(motor):
+    cuerpo = serializar_respuesta("cinturón ñ 🚦", [a_json({"descripcion": "vehículo"})], False)
+    assert "cinturón ñ 🚦".encode("utf-8") in cuerpo
+    assert "vehículo".encode("utf-8") in cuerpo
+    assert b"\\u" not in cuerpo
+
+
+def test_flotantes_en_exponente_equivalentes(motor):
+    # orjson escribe 1e-7 y json 1e-07: mismo valor, distinto texto
+    fuentes = [{"valor": 1e-7, "grande": 1e16}]
+    cuerpo = serializar_respuesta("r", [a_json(f) for f in fuentes], False)
+    assert cuerpo == a_json(datos("r", fuentes, False, None))
+    assert desde_json(cuerpo)["fuentes"] == fuentes
+
+
+def test_fuentes_del_corpus_igual_a_fastapi(fastapi_referencia):
+    corpus = obtener_corpus()
+    ids = corpus.buscar_ids("multa por no usar el cinturón de seguridad")
+    assert ids
+    entradas = [corpus.entradas[i] for i in ids]
+    cuerpo = serializar_respuesta("ok", corpus.fuentes_json(ids), True, 57)
+    assert cuerpo == a_json(datos("ok", entradas, True, 57))
+    assert cuerpo == fastapi_referencia.post("/query", json=datos("ok", entradas, True, 57)).content
+
+
+def test_endpoint_query_igual_a_fastapi(fastapi_referencia):
+    with TestClient(main.app) as cliente:
+        respuesta = cliente.post("/query", json={"pregunta": "¿Cuál es la multa por no usar casco?"})
+    assert respuesta.status_code == 200
+    esperado = fastapi_referencia.post("/query", json=desde_json(respuesta.content)).content
+    assert respuesta.content == esperado
+    assert list(desde_json(respuesta.content)) == ["respuesta", "fuentes", "usa_llm", "tokens_prompt"]
@@ -0,0 +1,36 @@
+"""Las entradas leídas del snapshot son iguales a las de reglamento.json"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reglamento_core import REGLAMENTO_PATH, a_json, abrir_snapshot, compilar_snapshot
+from reglamento_core.cargador import hash_contenido
+
+
+def test_reglamento_ida_y_vuelta(tmp_path):
+    with open(REGLAMENTO_PATH, "rb") as f:
+        datos = f.read()
+    entradas = json.loads(datos)
+    ruta = compilar_snapshot(entradas, hash_contenido(datos), str(tmp_path / "reglamento.snapshot"))
+    leidas = list(abrir_snapshot(hash_contenido(datos), ruta).indice().entradas)
+    assert leidas == entradas
+    assert [a_json(e) for e in leidas] == [a_json(e) for e in entradas]
+
+
+def test_valores_que_no_son_cadenas(tmp_path):
+    entradas = [
+        {"categoria": "Multas", "monto": 3, "umas": 10.5, "articulos": ["19", "28"], "vigente": True, "notas": None},
+        {"categoria": "Velocidad", "descripcion": "límite en zona escolar", "monto": "3", "detalle": {"km/h": 20}},
+        {"categoria": "Vacía", "articulos": [], "vigente": False},
+    ]
+    texto = json.dumps(entradas, ensure_ascii=False)
+    ruta = compilar_snapshot(entradas, "prueba", str(tmp_path / "prueba.snapshot"))
+    leidas = list(abrir_snapshot("prueba", ruta).indice().entradas)
+    # Mismo resultado que cargar el JSON: tipos y orden de campos incluidos
+    assert leidas == json.loads(texto)
+    assert [list(e) for e in leidas] == [list(e) for e in entradas]
+    assert [[type(v) for v in e.values()] for e in leidas] == [[type(v) for v in e.values()] for e in entradas]
+    assert leidas[0]["monto"] == 3 and leidas[1]["monto"] == "3"
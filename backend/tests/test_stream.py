@@ -0,0 +1,32 @@
+"""Eventos de /query/stream con y sin acierto de caché"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["HUGGINGFACE_API_KEY"] = ""
+os.environ.setdefault("METRICAS_LOG_JSON", "0")
+
+from fastapi.testclient import TestClient
+
+import main
+
+
+def eventos(cuerpo: str):
+    resultado = {}
+    for bloque in cuerpo.strip().split("\n\n"):
+        nombre, datos = bloque.split("\n", 1)
+        resultado[nombre[len("event: "):]] = json.loads(datos[len("data: "):])
+    return resultado
+
+
+def test_fin_igual_con_cache():
+    pregunta = {"pregunta": "¿qué pasa si circulo con placas vencidas en el centro?"}
+    with TestClient(main.app) as cliente:
+        primera = eventos(cliente.post("/query/stream", json=pregunta).text)
+        segunda = eventos(cliente.post("/query/stream", json=pregunta).text)
+    assert "respuesta_simple" in primera and "respuesta_simple" not in segunda
+    assert list(segunda["fin"]) == list(primera["fin"]) == ["respuesta", "usa_llm", "tokens_prompt"]
+    assert segunda["fin"] == primera["fin"]
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Formato binario columnar para las capas de public/datajson/osm (.hmgc).
+
+Mismo esquema que el snapshot del reglamento en el backend: un header JSON y
+secciones alineadas que se abren con mmap y se leen como arrays de NumPy sin
+copiar.
+
+Formato (little-endian):
+    MAGIC (4 bytes) | FORMATO (u32) | len(header) (u32) | header JSON | secciones
+
+Secciones:
+    offsets         int64 (n + 1)   primer vértice de cada feature en coords
+    tipos           uint8 (n)       0 = Point, 1 = LineString
+    coords          int32 (v, 2)    lon/lat × ESCALA, cada vértice como delta del
+                                    anterior (de todo el archivo): np.cumsum
+                                    recupera las coordenadas en una pasada
+    props           int32 (n, k)    índice en la tabla de valores por propiedad (-1 = ausente)
+    valores_offsets int64           tabla de valores distintos (JSON en UTF-8)
+    valores         uint8
+
+Uso:
+    python scripts/osm/capa_columnar.py                      # las capas de public/datajson/osm
+    python scripts/osm/capa_columnar.py ruta/capa.geojson    # genera ruta/capa.hmgc
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+import numpy as np
+
+from flujo_geojson import EXTENSION_COLUMNAR, MAGIC_COLUMNAR, PRECISION, leer_features
+
+FORMATO = 1
+ESCALA = 10 ** PRECISION
+
+TIPOS = ["Point", "LineString"]
+
+_PREFIJO = struct.Struct("<4sII")
+_ALINEACION = 8
+
+Ruta = Union[str, Path]
+
+
+def _inicio_datos(largo_header: int) -> int:
+    inicio = _PREFIJO.size + largo_header
+    return inicio + (-inicio % _ALINEACION)
+
+
+def _tabla_cadenas(cadenas: List[str]):
+    """Offsets (n + 1) y blob UTF-8 de una lista de cadenas"""
+    codificadas = [c.encode("utf-8") for c in cadenas]
+    offsets = np.zeros(len(codificadas) + 1, dtype=np.int64)
+    if codificadas:
+        offsets[1:] = np.cumsum([len(c) for c in codificadas])
+    return offsets, np.frombuffer(b"".join(codificadas), dtype=np.uint8)
+
+
+def convertir(origen: Ruta, destino: Optional[Ruta] = None) -> Path:
+    """Escribe la versión columnar del GeoJSON (leído feature por feature) y devuelve su ruta"""
+    origen = Path(origen)
+    destino = Path(destino) if destino else origen.with_suffix(EXTENSION_COLUMNAR)
+
+    offsets = array("q", [0])
+    tipos = array("B")
+    enteros = array("q")
+    claves: Dict[str, int] = {}
+    valores: Dict[str, int] = {}
+    filas: List[Dict[int, int]] = []
+
+    extras: Dict = {}
+    for feature in leer_features(origen, extras):
+        geometria = feature["geometry"]
+        if geometria["type"] not in TIPOS:
+            raise ValueError(f"Geometría no soportada: {geometria['type']}")
+        tipos.append(TIPOS.index(geometria["type"]))
+        puntos = [geometria["coordinates"]] if geometria["type"] == "Point" else geometria["coordinates"]
+        for lon, lat in puntos:
+            enteros.append(round(lon * ESCALA))
+            enteros.append(round(lat * ESCALA))
+        offsets.append(offsets[-1] + len(puntos))
+        # Cada valor distinto (nombres de calles, "primary", "yes"...) se guarda una vez
+        filas.append({
+            claves.setdefault(clave, len(claves)): valores.setdefault(
+                json.dumps(valor, ensure_ascii=False, separators=(",", ":")), len(valores)
+            )
+            for clave, valor in (feature.get("properties") or {}).items()
+        })
+
+    coords = np.frombuffer(enteros, dtype=np.int64).reshape(-1, 2)
+    deltas = np.diff(coords, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+    if len(deltas) and np.abs(deltas).max() >= 2 ** 31:
+        raise ValueError("Los saltos entre vértices no caben en int32 (¿capa que cruza el antimeridiano?)")
+    props = np.full((len(filas), len(claves)), -1, dtype=np.int32)
+    for i, fila in enumerate(filas):
+        if fila:
+            props[i, list(fila)] = list(fila.values())
+    valores_offsets, valores_blob = _tabla_cadenas(list(valores))
+
+    secciones = {
+        "offsets": np.frombuffer(offsets, dtype=np.int64),
+        "tipos": np.frombuffer(tipos, dtype=np.uint8),
+        "coords": deltas.astype(np.int32),
+        "props": props,
+        "valores_offsets": valores_offsets,
+        "valores": valores_blob,
+    }
+    header = {
+        "escala": ESCALA,
+        "n": len(filas),
+        "claves": list(claves),
+        "metadata": extras.get("metadata"),
+        "secciones": {},
+    }
+    offset = 0
+    for nombre, arr in secciones.items():
+        offset += -offset % _ALINEACION
+        header["secciones"][nombre] = [offset, arr.dtype.str, list(arr.shape)]
+        offset += arr.nbytes
+
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    base = _inicio_datos(len(header_bytes))
+    temporal = destino.with_name(destino.name + ".tmp")
+    with open(temporal, "wb") as f:
+        f.write(_PREFIJO.pack(MAGIC_COLUMNAR, FORMATO, len(header_bytes)))
+        f.write(header_bytes)
+        for nombre, arr in secciones.items():
+            pos = base + header["secciones"][nombre][0]
+            f.write(b"\0" * (pos - f.tell()))
+            f.write(np.ascontiguousarray(arr).tobytes())
+    os.replace(temporal, destino)
+    return destino
+
+
+class CapaColumnar:
+    """
+    Capa .hmgc abierta con mmap; offsets, coords, props y la tabla de valores
+    son vistas sin copia sobre el archivo. Se comporta como una secuencia de
+    features GeoJSON (se decodifican al accederlas).
+    """
+
+    def __init__(self, ruta: Ruta):
+        with open(ruta, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < _PREFIJO.size:
+            raise ValueError(f"{ruta}: archivo truncado")
+        magic, formato, largo = _PREFIJO.unpack_from(self._mmap, 0)
+        if magic != MAGIC_COLUMNAR or formato != FORMATO:
+            raise ValueError(f"{ruta}: formato no soportado ({magic!r} v{formato})")
+
+        header = json.loads(bytes(self._mmap[_PREFIJO.size:_PREFIJO.size + largo]).decode("utf-8"))
+        self.escala: int = header["escala"]
+        self.claves: List[str] = header["claves"]
+        self.metadata: Optional[Dict] = header.get("metadata")
+
+        base = _inicio_datos(largo)
+        buffer = memoryview(self._mmap)
+        arrays = {}
+        for nombre, (offset, dtype, forma) in header["secciones"].items():
+            cuenta = int(np.prod(forma))
+            if cuenta == 0:
+                arrays[nombre] = np.zeros(forma, dtype=np.dtype(dtype))
+                continue
+            arrays[nombre] = np.frombuffer(buffer, dtype=np.dtype(dtype), count=cuenta, offset=base + offset).reshape(forma)
+        self.offsets: np.ndarray = arrays["offsets"]
+        self.tipos: np.ndarray = arrays["tipos"]
+        self.deltas: np.ndarray = arrays["coords"]
+        self.props: np.ndarray = arrays["props"]
+        self._valores_offsets = arrays["valores_offsets"]
+        self._valores = arrays["valores"].data
+        self._coordenadas: Optional[np.ndarray] = None
+        self._cache_valores: Dict[int, object] = {}
+
+    def __len__(self) -> int:
+        return len(self.tipos)
+
+    @property
+    def coordenadas(self) -> np.ndarray:
+        """Todas las coordenadas (v, 2) en grados [lon, lat]; se decodifican una vez"""
+        if self._coordenadas is None:
+            self._coordenadas = np.cumsum(self.deltas, axis=0, dtype=np.int64) / self.escala
+        return self._coordenadas
+
+    def _valor(self, i: int):
+        valor = self._cache_valores.get(i)
+        if valor is None:
+            valor = json.loads(bytes(self._valores[self._valores_offsets[i]:self._valores_offsets[i + 1]]).decode("utf-8"))
+            self._cache_valores[i] = valor
+        return valor
+
+    def propiedades(self, i: int) -> Dict:
+        return {clave: self._valor(v) for clave, v in zip(self.claves, self.props[i].tolist()) if v >= 0}
+
+    def geometria(self, i: int) -> Dict:
+        puntos = self.coordenadas[self.offsets[i]:self.offsets[i + 1]].tolist()
+        tipo = TIPOS[self.tipos[i]]
+        return {"type": tipo, "coordinates": puntos[0] if tipo == "Point" else puntos}
+
+    def __getitem__(self, i: int) -> Dict:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return {"type": "Feature", "geometry": self.geometria(i), "properties": self.propiedades(i)}
+
+    def __iter__(self) -> Iterator[Dict]:
+        # Conversión a objetos de Python una sola vez para toda la capa
+        puntos = self.coordenadas.tolist()
+        offsets = self.offsets.tolist()
+        props = self.props.tolist()
+        blob = bytes(self._valores)
+        limites = self._valores_offsets.tolist()
+        valores = json.loads(b"[" + b",".join(blob[a:b] for a, b in zip(limites, limites[1:])) + b"]")
+        for i, tipo in enumerate(self.tipos.tolist()):
+            coordenadas = puntos[offsets[i]] if tipo == 0 else puntos[offsets[i]:offsets[i + 1]]
+            yield {
+                "type": "Feature",
+                "geometry": {"type": TIPOS[tipo], "coordinates": coordenadas},
+                "properties": {clave: valores[v] for clave, v in zip(self.claves, props[i]) if v >= 0},
+            }
+
+
+def main(argv: List[str]) -> int:
+    from capas import CAPAS, OUTPUT_DIR
+
+    rutas = [Path(a) for a in argv[1:]] or [OUTPUT_DIR / capa.archivo for capa in CAPAS.values()]
+    for ruta in rutas:
+        if not ruta.exists():
+            print(f"[X] Archivo no encontrado: {ruta}")
+            continue
+        inicio = time.perf_counter()
+        destino = convertir(ruta)
+        segundos = time.perf_counter() - inicio
+        original, binario = ruta.stat().st_size, destino.stat().st_size
+        print(f"[OK] {destino} ({len(CapaColumnar(destino)):,} features, {binario:,} bytes, "
+              f"{original / max(binario, 1):.1f}x más chico, {segundos:.2f} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Definición compartida de las capas OSM de Hermosillo.
+
+Cada capa indica qué elementos de OSM incluye (nodos o vías y sus filtros de
+etiquetas), cómo se arman las propiedades de cada feature y en qué archivo se
+guarda. La usan tanto la descarga por Overpass como la ingesta de un extracto
+.osm.pbf local, así las dos producen los mismos GeoJSON.
+"""
+
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from flujo_geojson import PRECISION, escribir_geojson
+
+OUTPUT_DIR = Path("public/datajson/osm")
+AREA = "Hermosillo, Sonora, México"
+
+# Bounding boxes (sur, oeste, norte, este)
+# Hermosillo centro: ~29.0729° N, -110.9559° W
+BBOX_HERMOSILLO = (29.00, -111.05, 29.15, -110.90)
+BBOX_AMPLIO = (28.90, -111.10, 29.20, -110.80)
+
+Etiquetas = Dict[str, str]
+
+
+def _propiedades_semaforo(elemento_id: int, tags: Etiquetas) -> Dict:
+    return dict(tags)
+
+
+def _propiedades_cruce(elemento_id: int, tags: Etiquetas) -> Dict:
+    return {
+        "id": elemento_id,
+        "type": "cruce_peatonal",
+        "crossing": tags.get("crossing", "unknown"),
+        "crossing_ref": tags.get("crossing_ref", ""),
+        "tactile_paving": tags.get("tactile_paving", ""),
+        "supervised": tags.get("supervised", ""),
+        "highway": tags.get("highway", "crossing"),
+    }
+
+
+def _propiedades_ciclovia(elemento_id: int, tags: Etiquetas) -> Dict:
+    return {
+        "id": elemento_id,
+        "name": tags.get("name", "Sin nombre"),
+        "highway": tags.get("highway", ""),
+        "cycleway": tags.get("cycleway", ""),
+        "bicycle": tags.get("bicycle", ""),
+        "surface": tags.get("surface", ""),
+        "width": tags.get("width", ""),
+        "lit": tags.get("lit", ""),
+    }
+
+
+def _propiedades_calle(elemento_id: int, tags: Etiquetas) -> Dict:
+    return {
+        "id": elemento_id,
+        "name": tags.get("name", "Sin nombre"),
+        "highway": tags.get("highway", "unknown"),
+        "maxspeed": tags.get("maxspeed", ""),
+        "lanes": tags.get("lanes", ""),
+        "surface": tags.get("surface", ""),
+        "lit": tags.get("lit", ""),
+        "oneway": tags.get("oneway", "no"),
+    }
+
+
+class Capa:
+    """Capa GeoJSON: elementos de OSM que incluye y formato de sus features"""
+
+    def __init__(
+        self,
+        nombre: str,
+        archivo: str,
+        elemento: str,
+        filtros: Sequence[Tuple[str, str]],
+        propiedades: Callable[[int, Etiquetas], Dict],
+        tipo: Optional[str] = None,
+        bbox: Tuple[float, float, float, float] = BBOX_HERMOSILLO,
+        timeout: int = 60,
+    ):
+        self.nombre = nombre
+        self.archivo = archivo
+        # "node" (puntos) o "way" (líneas)
+        self.elemento = elemento
+        # (clave, valor): el elemento entra si cumple cualquiera de los filtros
+        self.filtros = tuple(filtros)
+        self.propiedades = propiedades
+        self.tipo = tipo
+        self.bbox = bbox
+        self.timeout = timeout
+
+    def coincide(self, tags: Etiquetas) -> bool:
+        return any(tags.get(clave) == valor for clave, valor in self.filtros)
+
+    def feature(self, elemento_id: int, tags: Etiquetas, coordenadas) -> Dict:
+        """Feature GeoJSON; coordenadas es [lon, lat] para nodos o una lista de ellas para vías"""
+        return {
+            "type": "Feature",
+            "geometry": {
+                "type": "Point" if self.elemento == "node" else "LineString",
+                "coordinates": coordenadas,
+            },
+            "properties": self.propiedades(elemento_id, tags),
+        }
+
+
+CAPAS: Dict[str, Capa] = {
+    "semaforos": Capa(
+        "semaforos",
+        "hermosillo_semaforos_overpass.geojson",
+        "node",
+        [("highway", "traffic_signals")],
+        _propiedades_semaforo,
+        bbox=BBOX_AMPLIO,
+    ),
+    "cruces": Capa(
+        "cruces",
+        "hermosillo_cruces_peatonales.geojson",
+        "node",
+        [("highway", "crossing"), ("crossing", "zebra"), ("crossing", "marked")],
+        _propiedades_cruce,
+        tipo="cruces_peatonales",
+    ),
+    "ciclovias": Capa(
+        "ciclovias",
+        "hermosillo_ciclovias.geojson",
+        "way",
+        [("highway", "cycleway"), ("cycleway", "lane"), ("cycleway", "track"), ("bicycle", "designated")],
+        _propiedades_ciclovia,
+        tipo="ciclovias",
+        timeout=120,
+    ),
+    "calles": Capa(
+        "calles",
+        "hermosillo_calles_principales.geojson",
+        "way",
+        [("highway", "primary"), ("highway", "secondary"), ("highway", "tertiary"), ("highway", "trunk")],
+        _propiedades_calle,
+        timeout=90,
+    ),
+}
+
+
+def dentro_bbox(lat: float, lon: float, bbox: Tuple[float, float, float, float]) -> bool:
+    sur, oeste, norte, este = bbox
+    return sur <= lat <= norte and oeste <= lon <= este
+
+
+def metadata_capa(capa: Capa, total: int = 0, fuente: str = "OpenStreetMap") -> Dict:
+    metadata = {
+        "source": fuente,
+        "date": date.today().isoformat(),
+        "count": total,
+        "area": AREA,
+    }
+    if capa.tipo:
+        metadata["type"] = capa.tipo
+    return metadata
+
+
+def guardar_capa(
+    capa: Capa,
+    features: Iterable[Dict],
+    output_dir: Path = OUTPUT_DIR,
+    fuente: str = "OpenStreetMap",
+    precision: Optional[int] = PRECISION,
+) -> Path:
+    """
+    Escribe el GeoJSON de la capa (compacto, feature por feature; acepta un
+    generador) y devuelve su ruta
+    """
+    output_file = output_dir / capa.archivo
+    escribir_geojson(output_file, features, metadata_capa(capa, fuente=fuente), precision)
+    return output_file
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Descarga las capas OSM de Hermosillo desde Overpass y genera los GeoJSON.
+
+Todas las consultas (capas × teselas) salen juntas con paralelismo acotado;
+las respuestas quedan en cache/ y una segunda ejecución el mismo día no
+vuelve a consultar el servidor. Con --incremental solo se piden los
+elementos modificados desde la descarga anterior.
+
+Uso:
+    python scripts/osm/descargar_capas.py
+    python scripts/osm/descargar_capas.py --capas calles,ciclovias --teselas 2x2
+    python scripts/osm/descargar_capas.py --incremental
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Optional, Sequence
+
+from capas import CAPAS, OUTPUT_DIR, guardar_capa
+from flujo_geojson import PRECISION
+from overpass import CACHE_DIR, CACHE_TTL, OVERPASS_URL, PARALELISMO, ClienteOverpass, ErrorOverpass, descargar_capas
+
+
+def _division(texto: str):
+    filas, _, columnas = texto.lower().partition("x")
+    return int(filas), int(columnas or filas)
+
+
+def main(capas_por_defecto: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Capas GeoJSON de Hermosillo desde Overpass")
+    parser.add_argument("--capas", default=",".join(capas_por_defecto or CAPAS), help=f"lista separada por comas de {', '.join(CAPAS)}")
+    parser.add_argument("--teselas", type=_division, default=(1, 1), help="dividir cada consulta en FILASxCOLUMNAS (p. ej. 2x2)")
+    parser.add_argument("--incremental", action="store_true", help="solo pedir lo modificado desde la descarga anterior")
+    parser.add_argument("--paralelismo", type=int, default=PARALELISMO, help="consultas simultáneas al servidor")
+    parser.add_argument("--sin-cache", action="store_true", help="ignorar las respuestas guardadas en cache/")
+    parser.add_argument("--url", default=OVERPASS_URL)
+    parser.add_argument("--precision", type=int, default=PRECISION, help="decimales de las coordenadas")
+    parser.add_argument("--salida", default=str(OUTPUT_DIR))
+    args = parser.parse_args()
+
+    nombres = [n.strip() for n in args.capas.split(",") if n.strip()]
+    desconocidas = [n for n in nombres if n not in CAPAS]
+    if desconocidas:
+        print(f"[ERROR] Capas desconocidas: {', '.join(desconocidas)}")
+        sys.exit(1)
+
+    cliente = ClienteOverpass(
+        url=args.url,
+        cache_dir=CACHE_DIR,
+        cache_ttl=0 if args.sin_cache else CACHE_TTL,
+        paralelismo=args.paralelismo,
+    )
+    print(f"[INFO] Descargando {', '.join(nombres)} de Hermosillo...")
+    inicio = time.perf_counter()
+    try:
+        features = descargar_capas(nombres, cliente, division=args.teselas, incremental=args.incremental)
+    except ErrorOverpass as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+    for nombre in nombres:
+        ruta = guardar_capa(CAPAS[nombre], features[nombre], Path(args.salida), precision=args.precision)
+        print(f"[OK] Guardado: {ruta} ({len(features[nombre]):,} features)")
+    print(f"[INFO] Tiempo total: {time.perf_counter() - inicio:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
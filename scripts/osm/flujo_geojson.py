@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Escritura y lectura de GeoJSON por partes, sin tener toda la capa en memoria.
+
+- EscritorGeoJSON escribe cada feature en cuanto se produce, en JSON compacto
+  y con las coordenadas redondeadas a `precision` decimales (7 ≈ 1 cm); el
+  conteo de la metadata se escribe al cerrar. El archivo se reemplaza de forma
+  atómica, así que un error a medias no deja un GeoJSON truncado.
+- leer_features recorre las features de un FeatureCollection una por una.
+  Usa ijson si está instalado y, si no, un lector incremental con
+  json.JSONDecoder.raw_decode sobre bloques del archivo. También lee las capas
+  en formato columnar (.hmgc, ver capa_columnar.py) sin que el llamador tenga
+  que distinguirlas.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+PRECISION = 7
+
+# Capas en formato columnar (capa_columnar.py)
+EXTENSION_COLUMNAR = ".hmgc"
+MAGIC_COLUMNAR = b"HMGC"
+
+# Caracteres leídos por bloque en el lector sin ijson
+TAMANO_BLOQUE = 1 << 16
+
+Ruta = Union[str, Path]
+
+
+def redondear(coordenadas, precision: int = PRECISION):
+    """Coordenadas (punto, línea o anidadas) redondeadas a `precision` decimales"""
+    if coordenadas and isinstance(coordenadas[0], (int, float)):
+        return [round(c, precision) for c in coordenadas]
+    return [redondear(c, precision) for c in coordenadas]
+
+
+class EscritorGeoJSON:
+    """
+    FeatureCollection escrito feature por feature:
+
+        with EscritorGeoJSON(ruta, metadata) as escritor:
+            for feature in features:
+                escritor.escribir(feature)
+    """
+
+    def __init__(self, ruta: Ruta, metadata: Optional[Dict] = None, precision: Optional[int] = PRECISION):
+        self.ruta = Path(ruta)
+        self.metadata = metadata
+        self.precision = precision
+        self.total = 0
+        self._temporal = self.ruta.with_name(self.ruta.name + ".tmp")
+        self._archivo = None
+
+    def __enter__(self) -> "EscritorGeoJSON":
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self._archivo = open(self._temporal, "w", encoding="utf-8")
+        self._archivo.write('{"type":"FeatureCollection","features":[')
+        return self
+
+    def escribir(self, feature: Dict) -> None:
+        geometria = feature.get("geometry")
+        if self.precision is not None and geometria and geometria.get("coordinates") is not None:
+            feature = dict(feature, geometry=dict(geometria, coordinates=redondear(geometria["coordinates"], self.precision)))
+        if self.total:
+            self._archivo.write(",\n")
+        self._archivo.write(json.dumps(feature, ensure_ascii=False, separators=(",", ":")))
+        self.total += 1
+
+    def escribir_varios(self, features: Iterable[Dict]) -> None:
+        for feature in features:
+            self.escribir(feature)
+
+    def __exit__(self, tipo, valor, traza) -> None:
+        if tipo is not None:
+            self._archivo.close()
+            os.remove(self._temporal)
+            return
+        self._archivo.write("]")
+        if self.metadata is not None:
+            # El conteo real solo se conoce al final
+            metadata = dict(self.metadata)
+            if "count" in metadata:
+                metadata["count"] = self.total
+            self._archivo.write(',"metadata":' + json.dumps(metadata, ensure_ascii=False, separators=(",", ":")))
+        self._archivo.write("}\n")
+        self._archivo.close()
+        os.replace(self._temporal, self.ruta)
+
+
+def escribir_geojson(ruta: Ruta, features: Iterable[Dict], metadata: Optional[Dict] = None, precision: Optional[int] = PRECISION) -> int:
+    """Escribe las features (lista o generador) y devuelve cuántas se escribieron"""
+    with EscritorGeoJSON(ruta, metadata, precision) as escritor:
+        escritor.escribir_varios(features)
+    return escritor.total
+
+
+class _LectorIncremental:
+    """Valores JSON de un archivo de texto leído por bloques"""
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.fin_archivo = False
+
+    def _leer_mas(self) -> bool:
+        if self.fin_archivo:
+            return False
+        bloque = self.archivo.read(TAMANO_BLOQUE)
+        if not bloque:
+            self.fin_archivo = True
+            return False
+        # Se descarta lo ya consumido para que el buffer no crezca con el archivo
+        self.buffer = self.buffer[self.pos:] + bloque
+        self.pos = 0
+        return True
+
+    def siguiente_caracter(self) -> str:
+        """Siguiente carácter que no es espacio (lo consume)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                caracter = self.buffer[self.pos]
+                self.pos += 1
+                return caracter
+            if not self._leer_mas():
+                raise ValueError("GeoJSON incompleto")
+
+    def valor(self):
+        """Siguiente valor JSON completo"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            try:
+                valor, fin = self.decoder.raw_decode(self.buffer, self.pos)
+                # Un número al final del buffer puede estar cortado: se confirma con el siguiente bloque
+                if fin < len(self.buffer) or self.fin_archivo:
+                    self.pos = fin
+                    return valor
+            except json.JSONDecodeError:
+                pass
+            if not self._leer_mas():
+                valor, self.pos = self.decoder.raw_decode(self.buffer, self.pos)
+                return valor
+
+
+def _features_raw_decode(archivo, extras: Optional[Dict] = None) -> Iterator[Dict]:
+    lector = _LectorIncremental(archivo)
+    if lector.siguiente_caracter() != "{":
+        raise ValueError("Se esperaba un objeto GeoJSON")
+    while True:
+        clave = lector.valor()
+        if lector.siguiente_caracter() != ":":
+            raise ValueError("GeoJSON inválido")
+        if clave == "features":
+            if lector.siguiente_caracter() != "[":
+                raise ValueError("'features' no es una lista")
+            separador = lector.siguiente_caracter()
+            if separador != "]":
+                lector.pos -= 1
+                while separador != "]":
+                    yield lector.valor()
+                    separador = lector.siguiente_caracter()
+                    if separador not in ",]":
+                        raise ValueError("GeoJSON inválido")
+        else:
+            valor = lector.valor()
+            if extras is not None:
+                extras[clave] = valor
+        separador = lector.siguiente_caracter()
+        if separador == "}":
+            return
+        if separador != ",":
+            raise ValueError("GeoJSON inválido")
+
+
+def es_columnar(ruta: Ruta) -> bool:
+    with open(ruta, "rb") as f:
+        return f.read(len(MAGIC_COLUMNAR)) == MAGIC_COLUMNAR
+
+
+def ruta_capa(ruta: Ruta) -> Path:
+    """La versión columnar de la capa si existe y no es más vieja que el GeoJSON; si no, el GeoJSON"""
+    ruta = Path(ruta)
+    columnar = ruta.with_suffix(EXTENSION_COLUMNAR)
+    if columnar.exists() and (not ruta.exists() or columnar.stat().st_mtime >= ruta.stat().st_mtime):
+        return columnar
+    return ruta
+
+
+def leer_features(ruta: Ruta, extras: Optional[Dict] = None) -> Iterator[Dict]:
+    """
+    Features del FeatureCollection (GeoJSON o columnar), una a la vez;
+    si se pasa `extras`, ahí quedan las demás claves del GeoJSON (metadata)
+    """
+    if es_columnar(ruta):
+        from capa_columnar import CapaColumnar
+
+        capa = CapaColumnar(ruta)
+        if extras is not None and capa.metadata is not None:
+            extras["metadata"] = capa.metadata
+        yield from capa
+        return
+    if ijson is not None and extras is None:
+        with open(ruta, "rb") as f:
+            yield from ijson.items(f, "features.item", use_float=True)
+        return
+    with open(ruta, "r", encoding="utf-8") as f:
+        yield from _features_raw_decode(f, extras)
+
+
+def contar_features(ruta: Ruta) -> Tuple[int, Optional[Dict]]:
+    """(número de features, primera feature) sin cargar la capa completa"""
+    if es_columnar(ruta):
+        from capa_columnar import CapaColumnar
+
+        capa = CapaColumnar(ruta)
+        return len(capa), capa[0] if len(capa) else None
+    total = 0
+    primera = None
+    for feature in leer_features(ruta):
+        if primera is None:
+            primera = feature
+        total += 1
+    return total, primera
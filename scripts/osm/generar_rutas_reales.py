@@ -8,12 +8,12 @@ import json
 from pathlib import Path
 import random
 
+from flujo_geojson import leer_features, ruta_capa
+
 def cargar_calles():
     """Carga las calles principales desde GeoJSON"""
     geojson_path = Path("public/datajson/osm/hermosillo_calles_principales.geojson")
-    with open(geojson_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    return data['features']
+    return list(leer_features(ruta_capa(geojson_path)))
 
 def filtrar_calles_por_nombre(calles, nombres_parciales):
     """Filtra calles que contienen alguno de los nombres"""
@@ -129,13 +129,11 @@ def generar_rutas_reales():
         rutas_base.append(ruta)
     
     # Agregar ciclovías si existen
-    ciclovias_path = Path("public/datajson/osm/hermosillo_ciclovias.geojson")
+    ciclovias_path = ruta_capa(Path("public/datajson/osm/hermosillo_ciclovias.geojson"))
     if ciclovias_path.exists():
-        with open(ciclovias_path, 'r', encoding='utf-8') as f:
-            ciclovias_data = json.load(f)
-        
-        if ciclovias_data['features']:
-            ciclovia = ciclovias_data['features'][0]
+        # Solo se usa la primera ciclovía: no hace falta leer el resto del archivo
+        ciclovia = next(leer_features(ciclovias_path), None)
+        if ciclovia is not None:
             ruta = generar_ruta_desde_calle(
                 ciclovia, "bicicleta",
                 f"Ciclovía - {ciclovia['properties']['name']}", 
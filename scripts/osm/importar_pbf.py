@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Genera las capas OSM de Hermosillo desde un extracto .osm.pbf local, sin Overpass.
+
+Lee el archivo una sola vez: los bloques se decodifican en paralelo en un
+pool de procesos (con un número acotado en vuelo, la memoria no crece con el
+tamaño del archivo) y de cada bloque solo vuelven los nodos dentro del área
+y los elementos que coinciden con alguna capa. Al final se arman las
+geometrías de las vías y se escriben las cuatro capas (semáforos, cruces,
+ciclovías y calles) con el mismo formato que los scripts de Overpass.
+
+Funciona sin conexión. Para obtener un extracto:
+    wget https://download.geofabrik.de/north-america/mexico-latest.osm.pbf
+    osmium extract -b -111.10,28.90,-110.80,29.20 mexico-latest.osm.pbf -o hermosillo.osm.pbf
+
+Uso:
+    python scripts/osm/importar_pbf.py hermosillo.osm.pbf
+    python scripts/osm/importar_pbf.py hermosillo.osm.pbf --capas calles,ciclovias --procesos 4
+"""
+
+import argparse
+import os
+import sys
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from capas import CAPAS, OUTPUT_DIR, Capa, dentro_bbox, guardar_capa
+from flujo_geojson import PRECISION
+from pbf import ErrorPBF, decodificar_bloque, descomprimir, leer_bloques, verificar_cabecera
+
+# Margen (grados) alrededor del área para conservar los nodos de vías que salen de ella
+MARGEN_NODOS = 0.05
+
+# Bloques en vuelo por proceso
+BLOQUES_POR_PROCESO = 4
+
+
+def _area_nodos(capas: Sequence[Capa], margen: float) -> Tuple[float, float, float, float]:
+    """Bounding box que cubre todas las capas, ampliado por el margen"""
+    return (
+        min(c.bbox[0] for c in capas) - margen,
+        min(c.bbox[1] for c in capas) - margen,
+        max(c.bbox[2] for c in capas) + margen,
+        max(c.bbox[3] for c in capas) + margen,
+    )
+
+
+def procesar_bloque(blob: bytes, nombres: Sequence[str], area: Tuple[float, float, float, float]) -> Dict:
+    """
+    Decodifica un bloque (en un proceso del pool) y devuelve solo lo útil:
+    coordenadas de los nodos dentro del área y elementos de cada capa
+    """
+    capas_nodo = [CAPAS[n] for n in nombres if CAPAS[n].elemento == "node"]
+    capas_via = [CAPAS[n] for n in nombres if CAPAS[n].elemento == "way"]
+    ids, lons, lats = array("q"), array("d"), array("d")
+    puntos: Dict[str, List] = {c.nombre: [] for c in capas_nodo}
+    vias: Dict[str, List] = {c.nombre: [] for c in capas_via}
+
+    for elemento in decodificar_bloque(descomprimir(blob)):
+        if elemento[0] == "node":
+            _, nodo_id, lat, lon, tags = elemento
+            if capas_via and dentro_bbox(lat, lon, area):
+                ids.append(nodo_id)
+                lons.append(lon)
+                lats.append(lat)
+            if tags:
+                for capa in capas_nodo:
+                    if capa.coincide(tags) and dentro_bbox(lat, lon, capa.bbox):
+                        puntos[capa.nombre].append((nodo_id, lon, lat, tags))
+        elif elemento[0] == "way" and capas_via:
+            _, via_id, tags, refs = elemento
+            for capa in capas_via:
+                if capa.coincide(tags):
+                    vias[capa.nombre].append((via_id, tags, array("q", refs)))
+
+    return {"nodos": (ids, lons, lats), "puntos": puntos, "vias": vias}
+
+
+def _en_orden(pool: ProcessPoolExecutor, bloques, nombres, area, en_vuelo: int):
+    """Resultados de procesar_bloque en el orden del archivo, con a lo más en_vuelo pendientes"""
+    pendientes = deque()
+    for blob in bloques:
+        pendientes.append(pool.submit(procesar_bloque, blob, nombres, area))
+        if len(pendientes) >= en_vuelo:
+            yield pendientes.popleft().result()
+    while pendientes:
+        yield pendientes.popleft().result()
+
+
+def importar(ruta: str, nombres: Sequence[str], procesos: int, margen: float = MARGEN_NODOS) -> Dict[str, List[Dict]]:
+    """Features de cada capa leídas del extracto"""
+    capas = [CAPAS[n] for n in nombres]
+    area = _area_nodos(capas, margen)
+    coordenadas: Dict[int, Tuple[float, float]] = {}
+    puntos: Dict[str, List] = {c.nombre: [] for c in capas if c.elemento == "node"}
+    vias: Dict[str, List] = {c.nombre: [] for c in capas if c.elemento == "way"}
+
+    def bloques_datos():
+        for tipo, blob in leer_bloques(ruta):
+            if tipo == "OSMHeader":
+                verificar_cabecera(blob)
+            elif tipo == "OSMData":
+                yield blob
+
+    n_bloques = 0
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        for resultado in _en_orden(pool, bloques_datos(), list(nombres), area, procesos * BLOQUES_POR_PROCESO):
+            n_bloques += 1
+            ids, lons, lats = resultado["nodos"]
+            coordenadas.update(zip(ids, zip(lons, lats)))
+            for nombre, elementos in resultado["puntos"].items():
+                puntos[nombre].extend(elementos)
+            for nombre, elementos in resultado["vias"].items():
+                vias[nombre].extend(elementos)
+    print(f"[INFO] {n_bloques} bloques, {len(coordenadas):,} nodos en el área")
+
+    features: Dict[str, List[Dict]] = {}
+    for nombre, elementos in puntos.items():
+        capa = CAPAS[nombre]
+        features[nombre] = [
+            capa.feature(nodo_id, tags, [lon, lat])
+            for nodo_id, lon, lat, tags in sorted(elementos, key=lambda e: e[0])
+        ]
+    for nombre, elementos in vias.items():
+        capa = CAPAS[nombre]
+        features[nombre] = []
+        for via_id, tags, refs in sorted(elementos, key=lambda e: e[0]):
+            puntos_via = [coordenadas[r] for r in refs if r in coordenadas]
+            # Como Overpass: la vía entra si toca el área de la capa
+            if len(puntos_via) < 2 or not any(dentro_bbox(lat, lon, capa.bbox) for lon, lat in puntos_via):
+                continue
+            coords = [[lon, lat] for lon, lat in puntos_via]
+            features[nombre].append(capa.feature(via_id, tags, coords))
+    return features
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capas GeoJSON de Hermosillo desde un extracto .osm.pbf")
+    parser.add_argument("pbf", help="archivo .osm.pbf")
+    parser.add_argument("--capas", default=",".join(CAPAS), help=f"lista separada por comas de {', '.join(CAPAS)}")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--margen", type=float, default=MARGEN_NODOS, help="grados alrededor del área para nodos de vías")
+    parser.add_argument("--precision", type=int, default=PRECISION, help="decimales de las coordenadas")
+    parser.add_argument("--salida", default=str(OUTPUT_DIR))
+    args = parser.parse_args()
+
+    nombres = [n.strip() for n in args.capas.split(",") if n.strip()]
+    desconocidas = [n for n in nombres if n not in CAPAS]
+    if desconocidas:
+        print(f"[ERROR] Capas desconocidas: {', '.join(desconocidas)}")
+        sys.exit(1)
+
+    print(f"[INFO] Leyendo {args.pbf} con {args.procesos} procesos...")
+    inicio = time.perf_counter()
+    try:
+        features = importar(args.pbf, nombres, args.procesos, args.margen)
+    except (OSError, ErrorPBF) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+    fuente = f"OpenStreetMap ({Path(args.pbf).name})"
+    for nombre in nombres:
+        ruta = guardar_capa(CAPAS[nombre], features[nombre], Path(args.salida), fuente, args.precision)
+        print(f"[OK] Guardado: {ruta} ({len(features[nombre]):,} features)")
+    print(f"[INFO] Tiempo total: {time.perf_counter() - inicio:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Cliente de Overpass compartido por los scripts de descarga.
+
+- Consultas en paralelo con un máximo de peticiones simultáneas (el servidor
+  público admite pocas por IP) y reintentos con espera exponencial ante
+  429/5xx o errores de red (respeta Retry-After)
+- Caché en disco direccionada por contenido, como la de osmnx en cache/:
+  cada respuesta se guarda en cache/<sha1(url + consulta)>.json y se reutiliza
+  mientras tenga menos de CACHE_TTL segundos
+- Teselas: una capa se puede pedir en n×m consultas más pequeñas; los
+  elementos repetidos en varias teselas se unen por id
+- Actualización incremental: con el estado de la descarga anterior solo se
+  piden los elementos modificados desde entonces (filtro newer) y la lista de
+  ids vigentes (out ids) para quitar los borrados, tesela por tesela. Mover
+  un nodo no cambia la versión de la vía que lo contiene, así que también se
+  piden las vías de la capa con algún nodo modificado (recurse bn)
+
+OVERPASS_URL permite apuntar a otra instancia (o a un servidor local de pruebas).
+"""
+
+import hashlib
+import json
+import os
+import random
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from capas import CAPAS, Capa
+
+OVERPASS_URL = os.getenv("OVERPASS_URL", "https://overpass-api.de/api/interpreter")
+CACHE_DIR = Path("cache")
+CACHE_TTL = float(os.getenv("OVERPASS_CACHE_TTL", str(24 * 3600)))
+
+# Consultas simultáneas al servidor
+PARALELISMO = 2
+
+REINTENTOS = 4
+ESPERA_BASE = 2.0
+ESPERA_MAXIMA = 60.0
+
+# Respuestas que vale la pena reintentar (límite de uso o servidor saturado)
+STATUS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+Bbox = Tuple[float, float, float, float]
+
+
+class ErrorOverpass(Exception):
+    """La consulta falló después de todos los reintentos"""
+
+
+def teselas(bbox: Bbox, filas: int = 1, columnas: int = 1) -> List[Bbox]:
+    """Divide el bbox (sur, oeste, norte, este) en filas × columnas"""
+    sur, oeste, norte, este = bbox
+    alto = (norte - sur) / filas
+    ancho = (este - oeste) / columnas
+    return [
+        (
+            round(sur + i * alto, 6),
+            round(oeste + j * ancho, 6),
+            round(sur + (i + 1) * alto, 6),
+            round(oeste + (j + 1) * ancho, 6),
+        )
+        for i in range(filas)
+        for j in range(columnas)
+    ]
+
+
+def consulta_capa(capa: Capa, bbox: Bbox, salida: str = "geom", newer: Optional[str] = None) -> str:
+    """
+    Consulta Overpass QL de la capa en el bbox
+    salida: "geom" (elementos con geometría) o "ids" (solo ids)
+    newer: solo elementos modificados desde esa fecha ISO 8601; en capas de
+    vías incluye las que tienen algún nodo modificado (cambio de geometría)
+    """
+    area = ",".join(str(c) for c in bbox)
+    filtro_fecha = f'(newer:"{newer}")' if newer else ""
+    lineas = [
+        f'  {capa.elemento}["{clave}"="{valor}"]{filtro_fecha}({area});'
+        for clave, valor in capa.filtros
+    ]
+    previas = ""
+    if newer and capa.elemento == "way":
+        previas = f'node{filtro_fecha}({area})->.nodos;\n'
+        lineas += [f'  way["{clave}"="{valor}"](bn.nodos);' for clave, valor in capa.filtros]
+    if salida == "ids":
+        out = "out ids;"
+    else:
+        out = "out body geom;" if capa.elemento == "way" else "out body;"
+    return f"[out:json][timeout:{capa.timeout}];\n{previas}(\n" + "\n".join(lineas) + f"\n);\n{out}\n"
+
+
+class ClienteOverpass:
+    """Consultas a Overpass con caché en disco, reintentos y paralelismo acotado"""
+
+    def __init__(
+        self,
+        url: str = OVERPASS_URL,
+        cache_dir: Optional[Path] = CACHE_DIR,
+        cache_ttl: float = CACHE_TTL,
+        paralelismo: int = PARALELISMO,
+        reintentos: int = REINTENTOS,
+        espera_base: float = ESPERA_BASE,
+    ):
+        self.url = url
+        self.cache_dir = cache_dir
+        self.cache_ttl = cache_ttl
+        self.paralelismo = paralelismo
+        self.reintentos = reintentos
+        self.espera_base = espera_base
+        self.aciertos_cache = 0
+        self.peticiones = 0
+
+    def _ruta_cache(self, consulta: str) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        clave = hashlib.sha1(f"{self.url}\n{consulta}".encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{clave}.json"
+
+    def _leer_cache(self, ruta: Optional[Path]) -> Optional[Dict]:
+        if ruta is None or not ruta.exists():
+            return None
+        if self.cache_ttl >= 0 and time.time() - ruta.stat().st_mtime > self.cache_ttl:
+            return None
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except ValueError:
+            return None
+
+    def _guardar_cache(self, ruta: Optional[Path], contenido: bytes) -> None:
+        if ruta is None:
+            return
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        temporal = ruta.with_name(ruta.name + ".tmp")
+        temporal.write_bytes(contenido)
+        os.replace(temporal, ruta)
+
+    def _espera(self, intento: int, retry_after: Optional[str]) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), ESPERA_MAXIMA)
+        # Exponencial con jitter para no sincronizar los reintentos de varias consultas
+        return min(self.espera_base * (2 ** intento), ESPERA_MAXIMA) * random.uniform(0.5, 1.0)
+
+    def consultar(self, consulta: str, usar_cache: bool = True) -> Dict:
+        """Respuesta JSON de la consulta (desde la caché si está vigente y usar_cache)"""
+        ruta = self._ruta_cache(consulta)
+        cacheada = self._leer_cache(ruta) if usar_cache else None
+        if cacheada is not None:
+            self.aciertos_cache += 1
+            return cacheada
+
+        datos = urllib.parse.urlencode({"data": consulta}).encode("utf-8")
+        ultimo_error = ""
+        for intento in range(self.reintentos + 1):
+            retry_after = None
+            try:
+                self.peticiones += 1
+                with urllib.request.urlopen(self.url, data=datos, timeout=180) as respuesta:
+                    contenido = respuesta.read()
+                resultado = json.loads(contenido)
+                if "remark" in resultado and "runtime error" in resultado["remark"]:
+                    # Timeout o memoria agotada en el servidor: se reintenta igual que un 504
+                    raise ErrorOverpass(resultado["remark"])
+                self._guardar_cache(ruta, contenido)
+                return resultado
+            except urllib.error.HTTPError as e:
+                if e.code not in STATUS_REINTENTABLES:
+                    raise ErrorOverpass(f"HTTP {e.code}: {e.reason}")
+                retry_after = e.headers.get("Retry-After")
+                ultimo_error = f"HTTP {e.code}"
+            except (urllib.error.URLError, TimeoutError, ConnectionError, ErrorOverpass, ValueError) as e:
+                ultimo_error = str(e)
+
+            if intento < self.reintentos:
+                espera = self._espera(intento, retry_after)
+                print(f"[WARN] Overpass: {ultimo_error}; reintento {intento + 1}/{self.reintentos} en {espera:.1f} s")
+                time.sleep(espera)
+        raise ErrorOverpass(f"Consulta fallida tras {self.reintentos + 1} intentos: {ultimo_error}")
+
+    def consultar_varias(self, consultas: Sequence[str], usar_cache: Optional[Sequence[bool]] = None) -> List[Dict]:
+        """Respuestas de varias consultas, con a lo más `paralelismo` simultáneas"""
+        usar_cache = list(usar_cache) if usar_cache is not None else [True] * len(consultas)
+        if len(consultas) <= 1 or self.paralelismo <= 1:
+            return [self.consultar(c, u) for c, u in zip(consultas, usar_cache)]
+        with ThreadPoolExecutor(max_workers=self.paralelismo) as pool:
+            return list(pool.map(self.consultar, consultas, usar_cache))
+
+
+def _elementos(respuestas: Sequence[Dict], tipo: str) -> Dict[int, Dict]:
+    """Elementos de las respuestas sin repetir (una vía puede venir en varias teselas)"""
+    elementos: Dict[int, Dict] = {}
+    for respuesta in respuestas:
+        for elemento in respuesta.get("elements", []):
+            if elemento.get("type") == tipo:
+                elementos[elemento["id"]] = elemento
+    return elementos
+
+
+def _fecha_base(respuestas: Sequence[Dict]) -> Optional[str]:
+    """Fecha de los datos del servidor (la más antigua de las respuestas)"""
+    fechas = [r.get("osm3s", {}).get("timestamp_osm_base") for r in respuestas]
+    fechas = [f for f in fechas if f]
+    return min(fechas) if fechas else None
+
+
+def features_capa(capa: Capa, elementos: Dict[int, Dict]) -> List[Dict]:
+    """Features GeoJSON de los elementos de Overpass, ordenadas por id"""
+    features = []
+    for elemento_id in sorted(elementos):
+        elemento = elementos[elemento_id]
+        tags = elemento.get("tags", {})
+        if capa.elemento == "node":
+            features.append(capa.feature(elemento_id, tags, [float(elemento["lon"]), float(elemento["lat"])]))
+        else:
+            coords = [[float(p["lon"]), float(p["lat"])] for p in elemento.get("geometry") or [] if p]
+            if len(coords) >= 2:
+                features.append(capa.feature(elemento_id, tags, coords))
+    return features
+
+
+def _ruta_estado(cache_dir: Path, capa: Capa) -> Path:
+    return cache_dir / f"overpass_estado_{capa.nombre}.json"
+
+
+def _leer_estado(cache_dir: Optional[Path], capa: Capa, bbox: Bbox) -> Optional[Dict]:
+    if cache_dir is None:
+        return None
+    ruta = _ruta_estado(cache_dir, capa)
+    if not ruta.exists():
+        return None
+    with open(ruta, "r", encoding="utf-8") as f:
+        estado = json.load(f)
+    # Un estado de otra área no sirve como base
+    return estado if tuple(estado.get("bbox", ())) == tuple(bbox) and estado.get("fecha") else None
+
+
+def _guardar_estado(cache_dir: Optional[Path], capa: Capa, bbox: Bbox, fecha: Optional[str], elementos: Dict[int, Dict]) -> None:
+    if cache_dir is None or not fecha:
+        return
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    ruta = _ruta_estado(cache_dir, capa)
+    temporal = ruta.with_name(ruta.name + ".tmp")
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump({"bbox": list(bbox), "fecha": fecha, "elementos": list(elementos.values())}, f, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+def descargar_capas(
+    nombres: Sequence[str],
+    cliente: Optional[ClienteOverpass] = None,
+    division: Tuple[int, int] = (1, 1),
+    incremental: bool = False,
+    bbox: Optional[Bbox] = None,
+) -> Dict[str, List[Dict]]:
+    """
+    Features de cada capa; todas las consultas (capas × teselas) se envían
+    juntas con el paralelismo del cliente
+    """
+    cliente = cliente or ClienteOverpass()
+    capas = [CAPAS[n] for n in nombres]
+    areas = {c.nombre: bbox or c.bbox for c in capas}
+    estados = {c.nombre: _leer_estado(cliente.cache_dir, c, areas[c.nombre]) if incremental else None for c in capas}
+
+    # Plan de consultas: (capa, clase, consulta); las incrementales siempre van al servidor
+    plan: List[Tuple[str, str, str]] = []
+    for capa in capas:
+        estado = estados[capa.nombre]
+        for tesela in teselas(areas[capa.nombre], *division):
+            if estado is None:
+                plan.append((capa.nombre, "completa", consulta_capa(capa, tesela)))
+            else:
+                plan.append((capa.nombre, "ids", consulta_capa(capa, tesela, salida="ids")))
+                plan.append((capa.nombre, "cambios", consulta_capa(capa, tesela, newer=estado["fecha"])))
+
+    print(f"[INFO] {len(plan)} consultas a Overpass ({cliente.paralelismo} en paralelo)...")
+    respuestas = cliente.consultar_varias(
+        [consulta for _, _, consulta in plan],
+        usar_cache=[clase == "completa" for _, clase, _ in plan],
+    )
+
+    resultado: Dict[str, List[Dict]] = {}
+    for capa in capas:
+        propias = {
+            clase: [r for (nombre, c, _), r in zip(plan, respuestas) if nombre == capa.nombre and c == clase]
+            for clase in ("completa", "ids", "cambios")
+        }
+        estado = estados[capa.nombre]
+        if estado is None:
+            elementos = _elementos(propias["completa"], capa.elemento)
+            fecha = _fecha_base(propias["completa"])
+        else:
+            previos = {e["id"]: e for e in estado["elementos"]}
+            vigentes = _elementos(propias["ids"], capa.elemento)
+            cambios = _elementos(propias["cambios"], capa.elemento)
+            elementos = {i: cambios.get(i) or previos.get(i) for i in vigentes}
+            faltantes = [i for i, e in elementos.items() if e is None]
+            if faltantes:
+                print(f"[WARN] {capa.nombre}: {len(faltantes)} elementos sin datos; se omiten hasta la próxima descarga completa")
+                elementos = {i: e for i, e in elementos.items() if e is not None}
+            borrados = len(set(previos) - set(vigentes))
+            print(f"[INFO] {capa.nombre}: {len(cambios)} modificados, {borrados} borrados desde {estado['fecha']}")
+            fecha = _fecha_base(propias["ids"] + propias["cambios"])
+        _guardar_estado(cliente.cache_dir, capa, areas[capa.nombre], fecha, elementos)
+        resultado[capa.nombre] = features_capa(capa, elementos)
+
+    print(f"[INFO] Peticiones: {cliente.peticiones}, respuestas desde caché: {cliente.aciertos_cache}")
+    return resultado
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Lector mínimo de extractos .osm.pbf sin dependencias (solo biblioteca estándar).
+
+Formato: secuencia de [largo (u32 big-endian)][BlobHeader][Blob]; cada Blob
+guarda (normalmente comprimido con zlib) un HeaderBlock o un PrimitiveBlock
+con nodos (simples o DenseNodes), vías y relaciones codificados en protobuf.
+Cada bloque se decodifica por separado, así que se pueden repartir entre
+procesos: leer_bloques solo lee los bytes y decodificar_bloque hace el resto.
+
+Referencia: https://wiki.openstreetmap.org/wiki/PBF_Format
+"""
+
+import struct
+import zlib
+from typing import Dict, Iterator, List, Tuple, Union
+
+# Funcionalidades del HeaderBlock que este lector entiende
+FUNCIONALIDADES_SOPORTADAS = {"OsmSchema-V0.6", "DenseNodes", "HistoricalInformation"}
+
+# Un blob no puede superar 32 MiB según la especificación
+MAX_TAMANO_BLOB = 32 * 1024 * 1024
+
+Valor = Union[int, memoryview]
+
+
+class ErrorPBF(Exception):
+    """Archivo .osm.pbf inválido o con funcionalidades no soportadas"""
+
+
+def _varint(buf: memoryview, pos: int) -> Tuple[int, int]:
+    resultado = 0
+    desplazamiento = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        resultado |= (byte & 0x7F) << desplazamiento
+        if byte < 0x80:
+            return resultado, pos
+        desplazamiento += 7
+
+
+def campos(buf: Union[bytes, memoryview]) -> Iterator[Tuple[int, Valor]]:
+    """(número de campo, valor) de un mensaje protobuf; los campos de largo variable son memoryview"""
+    buf = memoryview(buf)
+    pos = 0
+    fin = len(buf)
+    while pos < fin:
+        clave, pos = _varint(buf, pos)
+        numero, tipo = clave >> 3, clave & 7
+        if tipo == 0:
+            valor, pos = _varint(buf, pos)
+        elif tipo == 2:
+            largo, pos = _varint(buf, pos)
+            valor = buf[pos:pos + largo]
+            pos += largo
+        elif tipo == 1:
+            valor = buf[pos:pos + 8]
+            pos += 8
+        elif tipo == 5:
+            valor = buf[pos:pos + 4]
+            pos += 4
+        else:
+            raise ErrorPBF(f"Tipo de campo protobuf no soportado: {tipo}")
+        yield numero, valor
+
+
+def empaquetados(buf: memoryview) -> List[int]:
+    """Varints de un campo repetido empaquetado (packed)"""
+    valores = []
+    pos = 0
+    fin = len(buf)
+    while pos < fin:
+        valor, pos = _varint(buf, pos)
+        valores.append(valor)
+    return valores
+
+
+def _zigzag(n: int) -> int:
+    return (n >> 1) ^ -(n & 1)
+
+
+def _int64(n: int) -> int:
+    """int64 de protobuf (los negativos se codifican en complemento a dos)"""
+    return n - (1 << 64) if n >= 1 << 63 else n
+
+
+def _deltas(valores: List[int]) -> List[int]:
+    """Decodifica sint64 con delta (ids, lat, lon y refs se guardan así)"""
+    acumulado = 0
+    resultado = []
+    for valor in valores:
+        acumulado += _zigzag(valor)
+        resultado.append(acumulado)
+    return resultado
+
+
+def leer_bloques(ruta: str) -> Iterator[Tuple[str, bytes]]:
+    """(tipo, blob sin decodificar) de cada bloque del archivo, en orden"""
+    with open(ruta, "rb") as f:
+        while True:
+            prefijo = f.read(4)
+            if not prefijo:
+                return
+            if len(prefijo) < 4:
+                raise ErrorPBF("Archivo truncado")
+            (largo,) = struct.unpack(">I", prefijo)
+            tipo = ""
+            tamano = 0
+            for numero, valor in campos(f.read(largo)):
+                if numero == 1:
+                    tipo = bytes(valor).decode("utf-8")
+                elif numero == 3:
+                    tamano = valor
+            if tamano > MAX_TAMANO_BLOB:
+                raise ErrorPBF(f"Blob de {tamano} bytes excede el máximo")
+            blob = f.read(tamano)
+            if len(blob) < tamano:
+                raise ErrorPBF("Archivo truncado")
+            yield tipo, blob
+
+
+def descomprimir(blob: bytes) -> bytes:
+    """Contenido de un Blob (sin comprimir o zlib)"""
+    for numero, valor in campos(blob):
+        if numero == 1:
+            return bytes(valor)
+        if numero == 3:
+            return zlib.decompress(valor)
+        if numero in (4, 5, 6, 7):
+            raise ErrorPBF("Compresión no soportada (solo zlib); regenera el extracto con osmium")
+    raise ErrorPBF("Blob sin datos")
+
+
+def verificar_cabecera(blob: bytes) -> List[str]:
+    """Funcionalidades requeridas del HeaderBlock; ErrorPBF si alguna no se soporta"""
+    requeridas = [bytes(v).decode("utf-8") for n, v in campos(descomprimir(blob)) if n == 4]
+    faltantes = set(requeridas) - FUNCIONALIDADES_SOPORTADAS
+    if faltantes:
+        raise ErrorPBF(f"Funcionalidades no soportadas: {', '.join(sorted(faltantes))}")
+    return requeridas
+
+
+def _etiquetas(claves: List[int], valores: List[int], tabla: List[str]) -> Dict[str, str]:
+    return {tabla[k]: tabla[v] for k, v in zip(claves, valores)}
+
+
+def decodificar_bloque(datos: bytes) -> Iterator[Tuple]:
+    """
+    Elementos de un PrimitiveBlock ya descomprimido:
+        ("node", id, lat, lon, etiquetas)
+        ("way", id, etiquetas, refs)
+    Las relaciones se ignoran.
+    """
+    tabla: List[str] = []
+    grupos: List[memoryview] = []
+    granularidad, lat_offset, lon_offset = 100, 0, 0
+    for numero, valor in campos(datos):
+        if numero == 1:
+            tabla = [bytes(s).decode("utf-8") for n, s in campos(valor) if n == 1]
+        elif numero == 2:
+            grupos.append(valor)
+        elif numero == 17:
+            granularidad = valor
+        elif numero == 19:
+            lat_offset = _int64(valor)
+        elif numero == 20:
+            lon_offset = _int64(valor)
+
+    escala = 1e-9
+    for grupo in grupos:
+        for numero, valor in campos(grupo):
+            if numero == 1:
+                yield _nodo(valor, tabla, granularidad, lat_offset, lon_offset, escala)
+            elif numero == 2:
+                yield from _nodos_densos(valor, tabla, granularidad, lat_offset, lon_offset, escala)
+            elif numero == 3:
+                yield _via(valor, tabla)
+
+
+def _nodo(buf: memoryview, tabla, granularidad, lat_offset, lon_offset, escala) -> Tuple:
+    nodo_id = lat = lon = 0
+    claves: List[int] = []
+    valores: List[int] = []
+    for numero, valor in campos(buf):
+        if numero == 1:
+            nodo_id = _zigzag(valor)
+        elif numero == 2:
+            claves = empaquetados(valor)
+        elif numero == 3:
+            valores = empaquetados(valor)
+        elif numero == 8:
+            lat = _zigzag(valor)
+        elif numero == 9:
+            lon = _zigzag(valor)
+    return (
+        "node",
+        nodo_id,
+        escala * (lat_offset + granularidad * lat),
+        escala * (lon_offset + granularidad * lon),
+        _etiquetas(claves, valores, tabla),
+    )
+
+
+def _nodos_densos(buf: memoryview, tabla, granularidad, lat_offset, lon_offset, escala) -> Iterator[Tuple]:
+    ids: List[int] = []
+    lats: List[int] = []
+    lons: List[int] = []
+    claves_valores: List[int] = []
+    for numero, valor in campos(buf):
+        if numero == 1:
+            ids = _deltas(empaquetados(valor))
+        elif numero == 8:
+            lats = _deltas(empaquetados(valor))
+        elif numero == 9:
+            lons = _deltas(empaquetados(valor))
+        elif numero == 10:
+            claves_valores = empaquetados(valor)
+
+    # keys_vals: pares clave/valor de cada nodo separados por un 0
+    pos = 0
+    sin_etiquetas: Dict[str, str] = {}
+    for i, nodo_id in enumerate(ids):
+        etiquetas = sin_etiquetas
+        if claves_valores:
+            if claves_valores[pos]:
+                etiquetas = {}
+                while claves_valores[pos]:
+                    etiquetas[tabla[claves_valores[pos]]] = tabla[claves_valores[pos + 1]]
+                    pos += 2
+            pos += 1
+        yield (
+            "node",
+            nodo_id,
+            escala * (lat_offset + granularidad * lats[i]),
+            escala * (lon_offset + granularidad * lons[i]),
+            etiquetas,
+        )
+
+
+def _via(buf: memoryview, tabla) -> Tuple:
+    via_id = 0
+    claves: List[int] = []
+    valores: List[int] = []
+    refs: List[int] = []
+    for numero, valor in campos(buf):
+        if numero == 1:
+            via_id = valor
+        elif numero == 2:
+            claves = empaquetados(valor)
+        elif numero == 3:
+            valores = empaquetados(valor)
+        elif numero == 8:
+            refs = _deltas(empaquetados(valor))
+    return ("way", via_id, _etiquetas(claves, valores, tabla), refs)
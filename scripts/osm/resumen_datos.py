@@ -6,6 +6,8 @@ Muestra resumen de datos OSM descargados para Hermosillo.
 import json
 from pathlib import Path
 
+from flujo_geojson import contar_features, ruta_capa
+
 def mostrar_resumen():
     """Muestra resumen de todos los archivos GeoJSON"""
     
@@ -25,24 +27,23 @@ def mostrar_resumen():
     total_features = 0
     
     for archivo, descripcion in archivos.items():
-        ruta = osm_dir / archivo
+        # Si existe la versión columnar (.hmgc) al día, se usa esa
+        ruta = ruta_capa(osm_dir / archivo)
         
         if ruta.exists():
-            with open(ruta, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            count = len(data['features'])
+            # Se recorre la capa sin cargarla completa en memoria
+            count, primera = contar_features(ruta)
             total_features += count
             size_mb = ruta.stat().st_size / 1024 / 1024
             
             print(f"[OK] {descripcion}")
-            print(f"     Archivo: {archivo}")
+            print(f"     Archivo: {ruta.name}")
             print(f"     Features: {count:,}")
             print(f"     Tamaño: {size_mb:.2f} MB")
             
             # Mostrar sample de propiedades
-            if count > 0:
-                sample = data['features'][0]['properties']
+            if primera is not None:
+                sample = primera['properties']
                 props = list(sample.keys())[:5]
                 print(f"     Propiedades: {', '.join(props)}")
             print()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Precomprime los datos estáticos (JSON y GeoJSON) del build.
+
+Genera junto a cada archivo sus variantes .gz (nivel 9) y .br (calidad 11,
+si está instalado el paquete brotli) para servidores que entregan archivos
+precomprimidos (nginx gzip_static/brotli_static, Caddy precompressed, etc.).
+Con --minificar reescribe antes el JSON sin espacios: el GeoJSON de calles
+principales pasa de ~1.5 MB a ~0.6 MB sin comprimir.
+
+Uso (después de `npm run build`):
+    python scripts/precomprimir_datos.py dist/datajson --minificar
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from reglamento_core.compresion import MIN_BYTES_COMPRESION, brotli, comprimir
+
+EXTENSIONES = {".json", ".geojson"}
+
+
+def minificar(ruta: Path) -> bool:
+    """Reescribe el JSON en forma compacta; devuelve True si cambió"""
+    original = ruta.read_bytes()
+    compacto = json.dumps(json.loads(original), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if len(compacto) >= len(original):
+        return False
+    ruta.write_bytes(compacto)
+    return True
+
+
+def precomprimir(ruta: Path, forzar: bool = False) -> dict:
+    """Escribe las variantes comprimidas de un archivo; devuelve sus tamaños"""
+    contenido = ruta.read_bytes()
+    tamanos = {"original": len(contenido)}
+    codificaciones = {"gzip": ".gz", "br": ".br"} if brotli is not None else {"gzip": ".gz"}
+
+    for codificacion, extension in codificaciones.items():
+        destino = ruta.with_name(ruta.name + extension)
+        if not forzar and destino.exists() and destino.stat().st_mtime >= ruta.stat().st_mtime:
+            tamanos[codificacion] = destino.stat().st_size
+            continue
+        comprimido = comprimir(contenido, codificacion, nivel_alto=True)
+        # Escritura atómica: un servidor nunca ve la variante a medio escribir
+        temporal = destino.with_name(destino.name + ".tmp")
+        temporal.write_bytes(comprimido)
+        os.replace(temporal, destino)
+        tamanos[codificacion] = len(comprimido)
+    return tamanos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precomprime JSON/GeoJSON estáticos (.gz y .br)")
+    parser.add_argument("directorio", nargs="?", default="dist/datajson")
+    parser.add_argument("--minificar", action="store_true", help="reescribir el JSON sin espacios antes de comprimir")
+    parser.add_argument("--forzar", action="store_true", help="regenerar aunque las variantes estén al día")
+    args = parser.parse_args()
+
+    raiz = Path(args.directorio)
+    if not raiz.is_dir():
+        print(f"[ERROR] No existe el directorio {raiz} (¿ejecutaste npm run build?)")
+        sys.exit(1)
+
+    if brotli is None:
+        print("[AVISO] Paquete brotli no instalado: solo se generan variantes .gz")
+
+    total_original = total_gzip = 0
+    for ruta in sorted(raiz.rglob("*")):
+        if ruta.suffix not in EXTENSIONES or not ruta.is_file():
+            continue
+        if args.minificar and minificar(ruta):
+            print(f"[OK] Minificado {ruta.relative_to(raiz)}")
+        if ruta.stat().st_size < MIN_BYTES_COMPRESION:
+            continue
+
+        tamanos = precomprimir(ruta, args.forzar)
+        total_original += tamanos["original"]
+        total_gzip += tamanos["gzip"]
+        variantes = ", ".join(f"{c} {t / 1024:.1f} KB" for c, t in tamanos.items() if c != "original")
+        print(f"[OK] {ruta.relative_to(raiz)}: {tamanos['original'] / 1024:.1f} KB → {variantes}")
+
+    if total_original:
+        print(f"\nTotal: {total_original / 1024:.1f} KB → gzip {total_gzip / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()